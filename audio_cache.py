@@ -0,0 +1,181 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+from io_pool import IOPool, Overloaded
+
+AUDIO_DIR = Path(os.environ.get("VOCAB_AUDIO_DIR", "audio_cache"))
+# Clips kept on disk; the least recently played are deleted past this
+AUDIO_CACHE_MB = int(os.environ.get("VOCAB_AUDIO_CACHE_MB", "256"))
+# Seconds browsers may reuse a clip without asking; after that the ETag
+# makes the revalidation a 304
+MAX_AGE = 7 * 24 * 3600
+# Renders running at once, and allowed to wait for a thread
+TTS_WORKERS = int(os.environ.get("VOCAB_TTS_WORKERS", "8"))
+TTS_QUEUE = int(os.environ.get("VOCAB_TTS_QUEUE", "128"))
+# Seconds a request waits for its clip; the render carries on and is cached
+RENDER_TIMEOUT = 10.0
+# Slots background pre-rendering leaves free for clips someone is waiting on
+PRERENDER_HEADROOM = TTS_QUEUE // 2
+
+
+def clip_key(text: str, lang: str) -> str:
+    """Content address of the clip for (text, lang); also its ETag."""
+    return hashlib.sha256(f"{lang}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+class AudioCache:
+    """
+    Rendered speech on disk, one file per (text, lang) under
+    `directory/<key[:2]>/<key>.mp3`, bounded to `max_bytes` with
+    least-recently-played eviction. The play order survives restarts
+    through file mtimes.
+
+    `render(text, lang, fp)` writes the MP3 to a binary file. Renders run
+    on a bounded IOPool, never on the request thread, and a clip is
+    rendered once: concurrent requests for it wait on the same render.
+    """
+
+    def __init__(self, render, directory: Path = AUDIO_DIR, max_bytes: int = AUDIO_CACHE_MB * 2**20):
+        self.render = render
+        # Absolute, since Flask resolves relative paths against the app package
+        self.directory = Path(directory).absolute()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._files = OrderedDict()  # key -> size, least recently played first
+        self._size = 0
+        self._inflight = {}
+        self._pool = IOPool("vocab-tts", TTS_WORKERS, TTS_QUEUE)
+        self.hits = 0
+        self.rendered = 0
+        self.evicted = 0
+        self.prerendered = 0
+        self.dropped = 0
+        self._scan()
+
+    def _scan(self) -> None:
+        found = []
+        for path in self.directory.glob("*/*.mp3"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            found.append((st.st_mtime, path.stem, st.st_size))
+        for _, key, size in sorted(found):
+            self._files[key] = size
+            self._size += size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.mp3"
+
+    def get(self, text: str, lang: str, timeout: float = RENDER_TIMEOUT):
+        """
+        (path, key) of the clip, rendering it first if needed. Raises
+        Overloaded if the render pool is full, TimeoutError if the render
+        takes longer than `timeout`, or whatever `render` raised.
+        """
+        text = normalize(text)
+        key = clip_key(text, lang)
+        path = self._path(key)
+        future = self._start(text, lang, key, path)
+        if future is None:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # Evicted by another worker since; render it again
+                return self.get(text, lang, timeout)
+            return path, key
+        future.result(timeout)
+        return path, key
+
+    def _start(self, text: str, lang: str, key: str, path: Path, headroom: int = 0):
+        # None if the clip is on disk, else the Future of its render,
+        # submitting one unless it is already in flight
+        with self._lock:
+            if key in self._files and path.exists():
+                self._files.move_to_end(key)
+                self.hits += 1
+                return None
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._inflight[key] = Future()
+        try:
+            self._pool.submit(self._render, text, lang, key, path, future, headroom=headroom)
+        except Overloaded:
+            with self._lock:
+                self._inflight.pop(key, None)
+            raise
+        return future
+
+    def _render(self, text: str, lang: str, key: str, path: Path, future: Future) -> None:
+        try:
+            self._write(text, lang, key, path)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(None)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _write(self, text: str, lang: str, key: str, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                self.render(text, lang, f)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        size = path.stat().st_size
+        with self._lock:
+            self._size += size - self._files.pop(key, 0)
+            self._files[key] = size
+            self.rendered += 1
+            evict = []
+            while self._size > self.max_bytes and len(self._files) > 1:
+                old, old_size = self._files.popitem(last=False)
+                self._size -= old_size
+                evict.append(old)
+            self.evicted += len(evict)
+        for old in evict:
+            self._path(old).unlink(missing_ok=True)
+
+    def prerender(self, texts, lang: str) -> None:
+        """Render missing clips in the background, skipping them while the pool is busy."""
+        for text in texts:
+            text = normalize(text)
+            key = clip_key(text, lang)
+            with self._lock:
+                if key in self._files or key in self._inflight:
+                    continue
+            try:
+                self._start(text, lang, key, self._path(key), headroom=PRERENDER_HEADROOM)
+            except Overloaded:
+                with self._lock:
+                    self.dropped += 1
+                continue
+            with self._lock:
+                self.prerendered += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "clips": len(self._files),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "rendered": self.rendered,
+                "prerendered": self.prerendered,
+                "evicted": self.evicted,
+                "dropped": self.dropped,
+                "pool": self._pool.stats(),
+            }
@@ -0,0 +1,141 @@
+"""
+Resident memory of the word cache, per million entries.
+
+    python benchmarks/cache_memory_bench.py [--entries 200000]
+
+Writes a cache log of `--entries` words keyed like index.py ("en-hi-word")
+and loads it, each layout in a fresh interpreter, reporting the private RSS
+it adds (and, separately, mapped log pages, which workers share):
+
+  dict              the old cached_word_data: every entry decoded into a dict
+  offset dict       the previous WordStore index, {key: (offset, length)}
+  offset dict+warm  ... plus every entry decoded, as a fully warm WordCache was
+  WordStore         the mmap'd log with its array-backed hash index
+  WordCache warm    ... plus every entry resident in packed form (the
+                    server keeps at most VOCAB_CACHE_RESIDENT of them)
+
+Each layout also reports the mean time of one lookup.
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+LAYOUTS = ("dict", "offset dict", "offset dict+warm", "WordStore", "WordCache warm")
+
+
+def rss_bytes():
+    """(private, file-backed) resident bytes; mapped file pages are shared between processes."""
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("RssAnon", "RssFile"):
+                fields[name] = int(value.split()[0]) * 1024
+    return fields["RssAnon"], fields["RssFile"]
+
+
+def make_log(path: Path, entries: int) -> list:
+    rng = random.Random(0)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    keys = []
+    with open(path, "wb") as f:
+        for i in range(entries):
+            word = "".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) + str(i)
+            key = f"en-hi-{word}"
+            value = {
+                "meaning": "अनुवाद" + word[:3],
+                "example": f"Part of Speech: noun\nDefinition: a sample gloss for {word}\nExample: “the {word} was here.”",
+            }
+            f.write(json.dumps(key, ensure_ascii=False).encode("utf-8") + b"\t"
+                    + json.dumps(value, ensure_ascii=False).encode("utf-8") + b"\n")
+            keys.append(key)
+    return keys
+
+
+def measure(layout: str, path: str, keys_path: str) -> dict:
+    keys = json.loads(Path(keys_path).read_text())
+    sample = random.Random(1).sample(keys, min(len(keys), 100_000))
+    base = rss_bytes()
+
+    if layout == "dict":
+        data = {}
+        with open(path, "rb") as f:
+            for line in f:
+                k, _, v = line.partition(b"\t")
+                data[json.loads(k)] = json.loads(v)
+        lookup = data.get
+    elif layout.startswith("offset dict"):
+        index = {}
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                k, _, v = line.partition(b"\t")
+                index[json.loads(k)] = (offset + len(k) + 1, len(v) - 1)
+                offset += len(line)
+        f = open(path, "rb")
+
+        def read(key):
+            loc = index.get(key)
+            f.seek(loc[0])
+            return json.loads(f.read(loc[1]))
+
+        lookup = read
+        if layout.endswith("+warm"):
+            resident = {k: read(k) for k in index}
+            lookup = resident.get
+    else:
+        from word_store import WordStore
+        from word_cache import WordCache
+
+        store = WordStore(Path(path))
+        lookup = store.get
+        if layout == "WordCache warm":
+            cache = WordCache(store, refresh_interval=3600, max_resident=len(keys))
+            for k in keys:
+                cache.get(k)
+            lookup = cache.get
+
+    private, shared = (after - before for after, before in zip(rss_bytes(), base))
+    start = time.perf_counter()
+    for k in sample:
+        lookup(k)
+    per_lookup = (time.perf_counter() - start) / len(sample)
+    return {"private": private, "shared": shared, "lookup_us": per_lookup * 1e6}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--measure", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(*args.measure)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "total_word.jsonl"
+        keys_path = Path(tmp) / "keys.json"
+        keys_path.write_text(json.dumps(make_log(path, args.entries)))
+        print(f"{args.entries:,} entries, log {path.stat().st_size / 1e6:.1f} MB")
+        scale = 1_000_000 / args.entries
+        for layout in LAYOUTS:
+            out = subprocess.run(
+                [sys.executable, __file__, "--measure", layout, str(path), str(keys_path)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(out)
+            print(f"{layout:<18} {r['private'] * scale / 2**20:8.1f} MB per million  "
+                  f"{r['private'] / args.entries:6.0f} B/entry  "
+                  f"(+{r['shared'] * scale / 2**20:5.1f} MB shared)  {r['lookup_us']:6.2f} us/lookup")
+
+
+if __name__ == "__main__":
+    main()
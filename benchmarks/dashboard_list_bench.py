@@ -0,0 +1,103 @@
+"""
+Dashboard list and count requests against a large cache.
+
+    python benchmarks/dashboard_list_bench.py [--entries 500000]
+
+Fills a cache log with `--entries` words and a learner with a tenth as many
+known and unknown words, then times, through the app's test client:
+
+  full list         every cached key in one response, as /cache/words used to
+  first page        the first 100 keys in word order
+  deep page         100 keys from a cursor in the middle
+  prefix page       100 keys starting with a two-letter prefix
+  substring page    100 keys containing a rare substring (scans until full)
+  stats             the four counts, from counters
+  counts by union   the distinct total as /words/total used to compute it
+
+The first page also reports the one-off cost of sorting the keys, paid
+on the first listing after start-up.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def make_log(path: Path, entries: int) -> list:
+    rng = random.Random(0)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = []
+    with open(path, "wb") as f:
+        for i in range(entries):
+            word = "".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) + str(i)
+            value = {"meaning": "अनुवाद", "example": f"Definition: a sample gloss for {word}"}
+            f.write(json.dumps(word, ensure_ascii=False).encode("utf-8") + b"\t"
+                    + json.dumps(value, ensure_ascii=False).encode("utf-8") + b"\n")
+            words.append(word)
+    return words
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        words = make_log(Path("total_word.jsonl"), args.entries)
+        os.environ["VOCAB_PROVIDERS"] = "local"
+        from vocab import create_app
+
+        app = create_app()
+        engine = app.extensions["vocab"]
+        state = engine.state("", "en", "hi")
+        for w in words[: args.entries // 10]:
+            state.add_known(w)
+        for w in words[args.entries // 20: args.entries // 20 + args.entries // 10]:
+            state.add_unknown(w)
+        client = app.test_client()
+        middle = sorted(words)[len(words) // 2]
+
+        def get(url):
+            resp = client.get(url)
+            assert resp.status_code == 200, resp.status_code
+            return resp
+
+        start = time.perf_counter()
+        get("/dashboard/api/cache/words")
+        first_build = (time.perf_counter() - start) * 1000
+        print(f"{args.entries:,} cached words, {state.counts()['total']:,} on the learner's lists")
+        rows = [
+            ("full list", lambda: json.dumps({"words": engine.word_cache.keys()})),
+            ("first page", lambda: get("/dashboard/api/cache/words")),
+            ("deep page", lambda: get(f"/dashboard/api/cache/words?cursor={middle}")),
+            ("prefix page", lambda: get("/dashboard/api/cache/words?prefix=qu")),
+            ("substring page", lambda: get("/dashboard/api/cache/words?q=zzq")),
+            ("stats", lambda: get("/dashboard/api/stats")),
+            ("counts by union", lambda: len(set(state.known_words()) | set(state.unknown_words()))),
+        ]
+        for name, fn in rows:
+            print(f"{name:<16} {timed(fn):9.2f} ms")
+        print(f"(first listing after start-up, sorting the keys: {first_build:.0f} ms)")
+        # Written out before the directory goes away, not by the exit flush after
+        for resident in engine.states.resident():
+            resident.close()
+
+
+if __name__ == "__main__":
+    main()
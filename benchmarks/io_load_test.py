@@ -0,0 +1,182 @@
+"""
+Concurrent lookups and speech against a slow upstream, in one server process.
+
+    python benchmarks/io_load_test.py [--clients 200] [--requests 1000] [--latency 0.3]
+
+Starts a local stand-in for the translate/dictionary APIs that answers
+after `--latency` seconds, then, for each pool size, a fresh app process
+(the vocab app on Werkzeug's threaded server, no lexicon, empty cache) and
+`--clients` concurrent clients asking for words nobody asked for before:
+half /dashboard/api/word/info, half /api/vocab/speak with a renderer that
+takes as long as the upstream. Reports throughput, latency percentiles,
+response kinds (placeholders are lookups that missed the deadline) and
+the peak number of calls in flight.
+
+The 8-thread run is the old fixed fetch pool; the others show how far one
+process goes once its I/O threads stop being the bottleneck.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def upstream_stub(latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency)
+            url = urlsplit(self.path)
+            if url.path.startswith("/t"):
+                q = parse_qs(url.query)["q"][0]
+                body = [[["\n".join("HI_" + w for w in q.split("\n")), q, None]]]
+            else:
+                w = unquote(url.path.rsplit("/", 1)[1])
+                body = [{"meanings": [{"partOfSpeech": "noun",
+                                       "definitions": [{"definition": f"def of {w}", "example": f"ex {w}"}]}]}]
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    # Calls still running when an app process is stopped hit closed sockets
+    server.handle_error = lambda request, client_address: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve(port: int, latency: float) -> None:
+    # Child process: the app, with speech rendered by a stand-in as slow as the upstream
+    sys.path.insert(0, str(ROOT))
+    from werkzeug.serving import make_server
+    from vocab import create_app
+
+    def render(text, lang, fp):
+        time.sleep(latency)
+        fp.write(b"ID3" + text.encode() * 50)
+
+    app = create_app()
+    app.extensions["vocab"].audio_cache.render = render
+    make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def load(base: str, clients: int, total: int, tag: str) -> dict:
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def client():
+        session = requests.Session()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            word = f"{tag}w{i}"
+            if i % 2:
+                url = f"{base}/api/vocab/speak?text={word}"
+            else:
+                url = f"{base}/dashboard/api/word/info?word={word}"
+            start = time.perf_counter()
+            try:
+                resp = session.get(url, timeout=60)
+                status = resp.status_code
+                # Lookups past the deadline come back as placeholders
+                if status == 200 and not i % 2 and resp.json()["info"]["hindi"] != f"HI_{word}":
+                    status = "placeholder"
+            except requests.RequestException:
+                status = "error"
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    return {"elapsed": elapsed, "rps": total / elapsed, "p50": pct(0.5), "p99": pct(0.99), "statuses": statuses}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per upstream call and per render")
+    parser.add_argument("--workers", default="8,64,256", help="fetch pool sizes to compare")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.latency)
+        return
+
+    stub = upstream_stub(args.latency)
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}"
+    print(f"{args.clients} clients, {args.requests} requests, upstream latency {args.latency * 1000:.0f} ms")
+    for workers in (int(w) for w in args.workers.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            port = free_port()
+            env = {
+                **os.environ,
+                "VOCAB_TRANSLATE_URL": f"{stub_url}/t",
+                "VOCAB_DICTIONARY_URL": f"{stub_url}/d",
+                "VOCAB_PROVIDERS": "remote",
+                "VOCAB_IO_WORKERS": str(workers),
+                "VOCAB_HTTP_POOL_SIZE": str(workers),
+                "VOCAB_TTS_WORKERS": str(max(8, workers // 4)),
+            }
+            server = subprocess.Popen(
+                [sys.executable, __file__, "--serve", str(port), "--latency", str(args.latency)],
+                cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            base = f"http://127.0.0.1:{port}"
+            try:
+                for _ in range(100):
+                    try:
+                        requests.get(f"{base}/dashboard/api/cache/stats", timeout=1)
+                        break
+                    except requests.RequestException:
+                        time.sleep(0.1)
+                r = load(base, args.clients, args.requests, tag=f"p{workers}")
+                fetch = requests.get(f"{base}/dashboard/api/upstream/stats").json()["fetch"]["pool"]
+                tts = requests.get(f"{base}/dashboard/api/cache/stats").json()["audio"]["pool"]
+            finally:
+                server.terminate()
+                server.wait()
+        codes = " ".join(f"{k}:{v}" for k, v in sorted(r["statuses"].items(), key=str))
+        print(f"fetch pool {workers:>4}  {r['rps']:7.1f} req/s  p50 {r['p50']:7.0f} ms  p99 {r['p99']:7.0f} ms  "
+              f"peak in flight {fetch['peak']:>4} fetch / {tts['peak']:>3} tts  [{codes}]")
+
+
+if __name__ == "__main__":
+    main()
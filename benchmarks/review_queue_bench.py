@@ -0,0 +1,66 @@
+"""
+Next-due review queries for a learner with many cards.
+
+    python benchmarks/review_queue_bench.py [--cards 50000]
+
+Enrolls `--cards` words with due times spread over the past and next
+month, then times, for both state backends:
+
+  due 20            the 20 longest overdue cards (heap / (scope, due) index)
+  review            one graded review, persisted (log append / row upsert)
+  due 20 by sort    the same 20 found by sorting every card, for comparison
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def timed(fn, repeat: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cards", type=int, default=50_000)
+    args = parser.parse_args()
+
+    from state_backend import InProcessState, SQLiteState
+
+    rng = random.Random(0)
+    now = time.time()
+    words = [f"word{i}" for i in range(args.cards)]
+    month = 30 * 86400
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        for state in (InProcessState("bench", "bench"), SQLiteState("bench", "bench", Path("bench.db"))):
+            start = time.perf_counter()
+            for w in words:
+                state.enroll([w], now + rng.uniform(-month, month))
+            load = time.perf_counter() - start
+            cards = state.due_reviews(args.cards, now + month)
+
+            def by_sort():
+                return sorted((c for c in cards if c["due"] <= now), key=lambda c: c["due"])[:20]
+
+            grades = ["again", "hard", "good", "easy"]
+            print(f"{state.backend}: {args.cards:,} cards enrolled in {load:.1f} s")
+            for name, fn in [
+                ("due 20", lambda: state.due_reviews(20, now)),
+                ("review", lambda: state.review(rng.choice(words), rng.choice(grades), now)),
+                ("due 20 by sort", by_sort),
+            ]:
+                print(f"  {name:<16} {timed(fn):8.3f} ms")
+            state.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Tokenizer throughput on a large text.
+
+    python benchmarks/tokenizer_bench.py [--words 1000000] [--lang en] [--chunk 4096]
+
+Compares the old `re.findall(r"\\b[a-zA-Z]+\\b", text.lower())` scan with
+tokenizer.iter_words over the whole string and over streamed chunks, and
+with the lemmatizer on top.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import tokenizer  # noqa: E402
+
+SAMPLES = {
+    "en": "The teacher's students were running quickly through the old café, "
+          "and nobody knew why they didn't stop. Naïve questions got 42 answers.",
+    "hi": "मैं हिंदी में लिख रहा हूँ और बच्चे स्कूल जा रहे हैं। क्षत्रिय परिवार 42 साल से यहाँ है।",
+    "ru": "Учитель сказал, что студенты бегали по старому кафе 42 минуты.",
+}
+
+
+def make_text(words: int, lang: str) -> str:
+    vocab = SAMPLES.get(lang, SAMPLES["en"]).split()
+    rng = random.Random(0)
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def timed(label: str, fn, n_chars: int) -> None:
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count:>9} words  {elapsed * 1000:8.1f} ms  "
+          f"{count / elapsed / 1e6:6.2f} Mwords/s  {n_chars / elapsed / 1e6:6.1f} Mchars/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=int, default=1_000_000)
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--chunk", type=int, default=4096, help="chunk size for the streaming run")
+    args = parser.parse_args()
+
+    text = make_text(args.words, args.lang)
+    tokenizer.pattern(args.lang)  # compile outside the timings
+    print(f"{len(text):,} chars, lang={args.lang}")
+
+    timed("legacy re.findall", lambda: len(re.findall(r"\b[a-zA-Z]+\b", text.lower())), len(text))
+    timed("iter_words(str)", lambda: sum(1 for _ in tokenizer.iter_words(text, args.lang)), len(text))
+
+    chunks = [text[i:i + args.chunk] for i in range(0, len(text), args.chunk)]
+    timed(f"iter_words({args.chunk}-char chunks)",
+          lambda: sum(1 for _ in tokenizer.iter_words(iter(chunks), args.lang)), len(text))
+
+    lexicon = {"run", "know", "student", "stop", "question", "answer", "get"}
+    lemmatize = tokenizer.Lemmatizer(lexicon.__contains__, args.lang)
+    timed("iter_words + lemmatizer",
+          lambda: sum(1 for w in tokenizer.iter_words(text, args.lang) if lemmatize(w)), len(text))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Look-up suggestions against a large cache.
+
+    python benchmarks/word_search_bench.py [--entries 500000] [--words FILE]
+
+Builds a WordSearch over `--entries` words (the lines of `--words`, then
+the same words with common English suffixes until there are enough; random
+letters if no file is given) and times, per query:
+
+  prefix 3         the first three letters of a cached word
+  prefix 6         the first six letters of a cached word
+  one typo         a cached word with one letter replaced, dropped or added
+  swapped letters  a cached word with two neighbouring letters swapped
+  two typos        a cached word of 6+ letters with two such typos
+  edit + delete    caching a new word and deleting it again
+
+It also reports building the index (sorted keys, word set and segment
+index), and how often a typo query suggested the word it was made from.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from word_search import WordSearch  # noqa: E402
+
+SUFFIXES = ["s", "ed", "ing", "ly", "er", "ness", "able", "ful", "less", "ment"]
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def make_words(entries: int, path: str, rng: random.Random) -> list:
+    base = [w.strip().lower() for w in open(path, encoding="utf-8") if w.strip()] if path else []
+    words = set(base[:entries])
+    while len(words) < entries:
+        if base:
+            words.add(rng.choice(base) + rng.choice(SUFFIXES) + (rng.choice(SUFFIXES) if rng.random() < 0.5 else ""))
+        else:
+            words.add("".join(rng.choice(LETTERS) for _ in range(rng.randint(4, 12))))
+    return sorted(words)
+
+
+def typo(word: str, rng: random.Random) -> str:
+    i = rng.randrange(len(word))
+    edit = rng.randrange(3)
+    if edit == 0:
+        return word[:i] + rng.choice(LETTERS) + word[i + 1:]
+    if edit == 1 and len(word) > 4:
+        return word[:i] + word[i + 1:]
+    return word[:i] + rng.choice(LETTERS) + word[i:]
+
+
+def swap(word: str, rng: random.Random) -> str:
+    i = rng.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def per_query(fn, queries) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=500_000)
+    parser.add_argument("--words", help="a word list, one per line")
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = make_words(args.entries, args.words, rng)
+    start = time.perf_counter()
+    search = WordSearch(words)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(words):,} words: index built in {build_ms:.0f} ms")
+
+    sample = [w for w in rng.sample(words, args.queries * 2) if len(w) >= 6][: args.queries]
+    typos = [(typo(w, rng), w) for w in sample]
+    swaps = [(swap(w, rng), w) for w in sample]
+    doubles = [(typo(typo(w, rng), rng), w) for w in sample]
+    rows = [
+        ("prefix 3", [w[:3] for w in sample]),
+        ("prefix 6", [w[:6] for w in sample]),
+        ("one typo", [q for q, _ in typos]),
+        ("swapped letters", [q for q, _ in swaps]),
+        ("two typos", [q for q, _ in doubles]),
+    ]
+    for name, queries in rows:
+        print(f"{name:<16} {per_query(search.suggest, queries):8.3f} ms")
+    fresh = [w + "qx" for w in sample]
+
+    def edit(word):
+        search.add(word)
+        search.discard(word)
+
+    print(f"{'edit + delete':<16} {per_query(edit, fresh):8.3f} ms")
+    for name, pairs in (("one typo", typos), ("swapped letters", swaps), ("two typos", doubles)):
+        found = sum(any(s["word"] == w for s in search.suggest(q)) for q, w in pairs)
+        print(f"{name}: the intended word suggested for {found / len(pairs):.0%} of queries")
+
+
+if __name__ == "__main__":
+    main()
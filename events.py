@@ -0,0 +1,103 @@
+import json
+import queue
+import threading
+from collections import defaultdict
+
+from flask import Response
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT = 15.0
+# Events buffered per subscriber; a client that falls further behind loses
+# the oldest ones rather than growing the server's memory
+QUEUE_SIZE = 256
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for Server-Sent Events.
+
+    Channels are (user, scope) pairs, so a learner's open pages receive only
+    their own updates. Events are delivered only to connections held by this
+    worker process.
+    """
+
+    def __init__(self):
+        self._subs = defaultdict(set)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, channel) -> queue.Queue:
+        q = queue.Queue(QUEUE_SIZE)
+        with self._lock:
+            self._subs[channel].add(q)
+        return q
+
+    def unsubscribe(self, channel, q: queue.Queue) -> None:
+        with self._lock:
+            subs = self._subs.get(channel)
+            if subs is not None:
+                subs.discard(q)
+                if not subs:
+                    del self._subs[channel]
+
+    def listening(self, channel) -> bool:
+        """True if anyone is subscribed, so callers can skip building payloads."""
+        return channel in self._subs
+
+    def publish(self, channel, event: str, data) -> None:
+        with self._lock:
+            subs = list(self._subs.get(channel, ()))
+        if not subs:
+            return
+        message = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        self.published += 1
+        for q in subs:
+            while True:
+                try:
+                    q.put_nowait(message)
+                    break
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def stream(self, channel, initial=()):
+        """
+        SSE text for one connection: the `initial` (event, data) pairs, then
+        every event published on `channel` until the client disconnects.
+        """
+        q = self.subscribe(channel)
+        try:
+            for event, data in initial:
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+            while True:
+                try:
+                    yield q.get(timeout=HEARTBEAT)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(channel, q)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "channels": len(self._subs),
+                "subscribers": sum(len(s) for s in self._subs.values()),
+                "published": self.published,
+                "dropped": self.dropped,
+            }
+
+
+bus = EventBus()
+
+
+def channel(state) -> tuple:
+    return (state.user, state.scope)
+
+
+def sse_response(stream) -> Response:
+    return Response(stream, mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
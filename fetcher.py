@@ -0,0 +1,141 @@
+import os
+import threading
+from concurrent.futures import Future, wait
+
+from io_pool import IOPool, Overloaded
+
+# Bounded pool shared by every lookup so a burst of new words can't open
+# an unbounded number of upstream connections. The threads only wait on
+# the network, so one process can keep hundreds of lookups in flight.
+MAX_WORKERS = int(os.environ.get("VOCAB_IO_WORKERS", "64"))
+# Upstream calls allowed to wait for a thread; words past this are shed
+# for the call and looked up again on a later request
+QUEUE_SIZE = int(os.environ.get("VOCAB_IO_QUEUE", "1024"))
+# Words sent to the translator in a single request
+TRANSLATE_BATCH_SIZE = 25
+# Overall time budget (seconds) for resolving one text's cache misses
+FETCH_DEADLINE = 6.0
+
+_pool = IOPool("vocab-fetch", MAX_WORKERS, QUEUE_SIZE)
+
+# Fetches currently in flight, keyed by (scope, word). A caller that misses
+# on a word someone else is already fetching waits for that fetch instead
+# of starting its own.
+_inflight = {}
+_inflight_lock = threading.Lock()
+_started = 0
+_joined = 0
+_shed = 0
+
+
+class _Pending:
+    # Joins the translation and the dictionary lookup for one word
+    __slots__ = ("key", "word", "meaning", "details", "error", "remaining", "future")
+
+    def __init__(self, key: tuple, word: str):
+        self.key = key
+        self.word = word
+        self.meaning = None
+        self.details = None
+        self.error = None
+        self.remaining = 2
+        self.future = Future()
+
+
+def fetch_word_infos(words, translate, lookup, on_resolved, scope: str = "", deadline: float = None) -> dict:
+    """
+    Resolve a batch of cache misses concurrently.
+
+    `translate(words)` returns {word: meaning} and is called once per chunk of
+    TRANSLATE_BATCH_SIZE words; words missing from its result come back with
+    meaning None. `lookup(word)` fetches dictionary details for one word; if
+    it raises, details is None and the exception is passed along as `error`.
+    As soon as both halves of a word are in, `on_resolved(word, meaning,
+    details, error)` stores it. Returns {word: (meaning, details, error)} for
+    the words resolved within `deadline` (FETCH_DEADLINE by default);
+    stragglers keep running and are stored when they finish, so the next
+    call finds them in the cache. When the pool is full, the words that
+    don't fit come back as (None, None, Overloaded) and nothing is stored.
+
+    Only one fetch per (scope, word) runs at a time across all callers;
+    `scope` must differ between call sites whose translate/lookup/on_resolved
+    produce different results (e.g. another language pair).
+    """
+    global _started, _joined, _shed
+    words = list(dict.fromkeys(words))
+    if not words:
+        return {}
+
+    pending = {}
+    owned = []
+    with _inflight_lock:
+        for w in words:
+            key = (scope, w)
+            p = _inflight.get(key)
+            if p is None:
+                p = _inflight[key] = _Pending(key, w)
+                owned.append(p)
+                _started += 1
+            else:
+                _joined += 1
+            pending[w] = p
+
+    lock = threading.Lock()
+
+    def part_done(p: _Pending) -> None:
+        with lock:
+            p.remaining -= 1
+            if p.remaining:
+                return
+        try:
+            on_resolved(p.word, p.meaning, p.details, p.error)
+        finally:
+            with _inflight_lock:
+                _inflight.pop(p.key, None)
+            p.future.set_result((p.meaning, p.details, p.error))
+
+    def translated(chunk, fut) -> None:
+        try:
+            result = fut.result()
+        except Exception:
+            result = {}
+        for p in chunk:
+            p.meaning = result.get(p.word)
+            part_done(p)
+
+    def looked_up(p: _Pending, fut) -> None:
+        try:
+            p.details = fut.result()
+        except Exception as e:
+            p.error = e
+        part_done(p)
+
+    for i in range(0, len(owned), TRANSLATE_BATCH_SIZE):
+        chunk = owned[i:i + TRANSLATE_BATCH_SIZE]
+        # A chunk's translation and lookups are admitted together, so no
+        # word is left half-fetched
+        try:
+            futures = _pool.submit_many(
+                [(translate, [p.word for p in chunk])] + [(lookup, p.word) for p in chunk]
+            )
+        except Overloaded as e:
+            shed = owned[i:]
+            with _inflight_lock:
+                for p in shed:
+                    _inflight.pop(p.key, None)
+                _shed += len(shed)
+            for p in shed:
+                p.future.set_result((None, None, e))
+            break
+        futures[0].add_done_callback(lambda f, chunk=chunk: translated(chunk, f))
+        for p, fut in zip(chunk, futures[1:]):
+            fut.add_done_callback(lambda f, p=p: looked_up(p, f))
+
+    wait([p.future for p in pending.values()], timeout=FETCH_DEADLINE if deadline is None else deadline)
+    return {w: p.future.result() for w, p in pending.items() if p.future.done()}
+
+
+def stats() -> dict:
+    with _inflight_lock:
+        out = {"inflight": len(_inflight), "started": _started, "joined": _joined, "shed": _shed}
+    return {**out, "pool": _pool.stats()}
@@ -0,0 +1,126 @@
+import codecs
+import json
+import shutil
+import tempfile
+
+from flask import Response, request, stream_with_context
+
+from tokenizer import iter_words
+
+# Bytes read from the upload at a time
+READ_SIZE = 64 * 1024
+# Unknown words resolved per get_word_infos call; each batch is streamed
+# out as soon as it is back
+LOOKUP_BATCH = 25
+
+
+def decode_chunks(stream, read_size: int = READ_SIZE):
+    """Yield text from a binary stream (request body, uploaded file) piece by piece."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        while True:
+            data = stream.read(read_size)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+    finally:
+        stream.close()
+
+
+def ingest(chunks, lang: str, state, get_word_infos, lemmatize=None, batch_size: int = LOOKUP_BATCH):
+    """
+    Stream the unknown words of a document with their info.
+
+    `chunks` is an iterable of text pieces, consumed lazily. Each distinct
+    word is handled once for the whole document: known words are skipped,
+    the rest are added to the learner's unknown list and looked up
+    `batch_size` at a time with `get_word_infos(words) -> {word: info}`.
+    Yields {"word": w, **info} per resolved word, then one summary event
+    {"done": True, ...}. Words still in flight when their batch's deadline
+    passes are retried once at the end, when most have landed in the cache.
+
+    Only the set of distinct words is kept, so memory grows with the
+    document's vocabulary, not its length.
+    """
+    seen = set()
+    batch = []
+    late = []
+    total = unknown = 0
+
+    def resolve(words):
+        infos = get_word_infos(words)
+        for w in words:
+            info = infos.get(w)
+            if info is None:
+                late.append(w)
+            else:
+                yield {"word": w, **info}
+
+    for w in iter_words(chunks, lang):
+        total += 1
+        if lemmatize is not None:
+            w = lemmatize(w)
+        if w in seen:
+            continue
+        seen.add(w)
+        if state.is_known(w):
+            continue
+        state.add_unknown(w)
+        unknown += 1
+        batch.append(w)
+        if len(batch) >= batch_size:
+            yield from resolve(batch)
+            batch = []
+    if batch:
+        yield from resolve(batch)
+
+    pending, late = late, []
+    for i in range(0, len(pending), batch_size):
+        yield from resolve(pending[i:i + batch_size])
+
+    yield {
+        "done": True,
+        "words": total,
+        "distinct": len(seen),
+        "unknown": unknown,
+        "unresolved": late,
+    }
+
+
+def upload_stream():
+    """
+    The uploaded document: the first multipart file if any, else the raw
+    request body. Flask closes parsed uploads when the view returns, before
+    a streamed response is read, so a multipart file is first copied to a
+    temp file of our own (on disk, not in memory).
+    """
+    upload = next(iter(request.files.values()), None)
+    if upload is None:
+        return request.stream
+    tmp = tempfile.TemporaryFile()
+    shutil.copyfileobj(upload.stream, tmp)
+    tmp.seek(0)
+    return tmp
+
+
+def _ndjson(events):
+    for event in events:
+        yield json.dumps(event, ensure_ascii=False) + "\n"
+
+
+def _sse(events):
+    for event in events:
+        name = "done" if event.get("done") else "word"
+        yield f"event: {name}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+def stream_response(events) -> Response:
+    """NDJSON, or Server-Sent Events if asked for with ?format=sse or the Accept header."""
+    if request.args.get("format") == "sse" or "text/event-stream" in request.headers.get("Accept", ""):
+        return Response(stream_with_context(_sse(events)), mimetype="text/event-stream")
+    return Response(stream_with_context(_ndjson(events)), mimetype="application/x-ndjson")
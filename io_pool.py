@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Overloaded(Exception):
+    """The pool's queue is full; shed the work or answer 503."""
+
+
+class IOPool:
+    """
+    Thread pool for blocking network calls with a bounded backlog.
+
+    Up to `workers` calls run at once and `queue_size` more may wait; past
+    that, submit raises Overloaded straight away instead of queueing, so a
+    slow upstream turns into fast refusals rather than a pile of request
+    threads all waiting on it.
+    """
+
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.peak = 0
+
+    def _admit(self, n: int, headroom: int) -> None:
+        with self._lock:
+            if self._pending + n + headroom > self.capacity:
+                self.rejected += n
+                raise Overloaded(f"{self.name}: too much work in flight")
+            self._pending += n
+            self.submitted += n
+            self.peak = max(self.peak, self._pending)
+
+    def _done(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn, *args, headroom: int = 0):
+        """
+        Run fn(*args) on the pool and return its Future. Raises Overloaded
+        if that would leave fewer than `headroom` slots free, so background
+        work can leave room for requests someone is waiting on.
+        """
+        self._admit(1, headroom)
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def submit_many(self, calls, headroom: int = 0) -> list:
+        """Submit (fn, *args) tuples all together or, raising Overloaded, none of them."""
+        calls = list(calls)
+        self._admit(len(calls), headroom)
+        futures = []
+        for fn, *args in calls:
+            future = self._executor.submit(fn, *args)
+            future.add_done_callback(self._done)
+            futures.append(future)
+        return futures
+
+    def pending(self) -> int:
+        return self._pending
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "pending": self._pending,
+                "peak": self.peak,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,184 @@
+"""
+On-disk bilingual lexicon with definitions, read through mmap.
+
+    python lexicon.py build kaikki-en.jsonl --lang en -o lexicon/lexicon.en.vlx
+
+The file holds one record per word, sorted by the word's UTF-8 bytes:
+
+    b"VLEX0001" | count: u64 | count x record offset: u64 | records
+
+and each record is `word \\t json \\n`, with json
+
+    {"tr": {"hi": ["...", ...], ...}, "senses": [{"pos": ..., "def": ..., "ex": ...}, ...]}
+
+A lookup is a binary search over the offset table, touching a few pages of
+the mapped file, so it needs no parsing at startup and no per-word heap.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+MAGIC = b"VLEX0001"
+_HEADER = struct.Struct("<8sQ")
+_OFFSET = struct.Struct("<Q")
+
+# Kept per word when building
+MAX_SENSES = 5
+MAX_TRANSLATIONS = 3
+
+
+class Lexicon:
+    """Read-only view of a lexicon file; safe to share between threads."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a lexicon file")
+        self._table = _HEADER.size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _key_at(self, i: int):
+        start = _OFFSET.unpack_from(self._mm, self._table + i * _OFFSET.size)[0]
+        tab = self._mm.find(b"\t", start)
+        return self._mm[start:tab], tab
+
+    def get(self, word: str):
+        """The record for `word` as a dict, or None."""
+        key = word.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            k, tab = self._key_at(mid)
+            if k < key:
+                lo = mid + 1
+            elif k > key:
+                hi = mid
+            else:
+                end = self._mm.find(b"\n", tab)
+                return json.loads(self._mm[tab + 1:end])
+        return None
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def _record(entry: dict) -> dict:
+    translations = {}
+    for t in entry.get("translations", []) + [
+        t for sense in entry.get("senses", []) for t in sense.get("translations", [])
+    ]:
+        code = t.get("code") or t.get("lang_code")
+        if code and t.get("word"):
+            words = translations.setdefault(code, [])
+            if t["word"] not in words and len(words) < MAX_TRANSLATIONS:
+                words.append(t["word"])
+    senses = []
+    for sense in entry.get("senses", []):
+        glosses = sense.get("glosses") or []
+        if not glosses:
+            continue
+        examples = [e["text"] for e in sense.get("examples", []) if e.get("text")]
+        senses.append({"pos": entry.get("pos", ""), "def": glosses[0], "ex": examples[0] if examples else ""})
+        if len(senses) >= MAX_SENSES:
+            break
+    return {"tr": translations, "senses": senses}
+
+
+def _merge(a: dict, b: dict) -> dict:
+    for code, words in b["tr"].items():
+        mine = a["tr"].setdefault(code, [])
+        mine.extend(w for w in words if w not in mine)
+        del mine[MAX_TRANSLATIONS:]
+    a["senses"] = (a["senses"] + b["senses"])[:MAX_SENSES]
+    return a
+
+
+def build(dump_path: Path, out_path: Path, lang: str = "en") -> int:
+    """
+    Build a lexicon from a Kaikki/Wiktionary JSONL dump, keeping entries of
+    `lang`. Records are spooled to a temp file and only (key, offset) pairs
+    are sorted in memory. Returns the number of words written.
+    """
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    index = []
+    with tempfile.TemporaryFile() as spool:
+        with open(dump_path, "rb") as f:
+            for seq, raw in enumerate(f):
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue
+                word = entry.get("word")
+                if not word or entry.get("lang_code", lang) != lang or "\t" in word or "\n" in word:
+                    continue
+                data = json.dumps(_record(entry), ensure_ascii=False).encode("utf-8") + b"\n"
+                index.append((word.lower().encode("utf-8"), seq, spool.tell(), len(data)))
+                spool.write(data)
+        index.sort()
+
+        # Table slots for every entry; merging only makes the table shorter
+        # than reserved, and the gap is left unused
+        tmp = out_path.with_name(out_path.name + ".tmp")
+        with open(tmp, "wb") as out:
+            table_pos = _HEADER.size
+            out.seek(table_pos + _OFFSET.size * len(index))
+            offsets = []
+            current = None
+
+            def flush():
+                offsets.append(out.tell())
+                out.write(current[0] + b"\t" + json.dumps(current[1], ensure_ascii=False).encode("utf-8") + b"\n")
+
+            # Entries of the same word (one per part of speech, or differing
+            # only in case) are adjacent after sorting and merged into one
+            for key, _, offset, length in index:
+                spool.seek(offset)
+                rec = json.loads(spool.read(length))
+                if current is not None and current[0] == key:
+                    _merge(current[1], rec)
+                    continue
+                if current is not None:
+                    flush()
+                current = (key, rec)
+            if current is not None:
+                flush()
+            out.seek(0)
+            out.write(_HEADER.pack(MAGIC, len(offsets)))
+            out.write(b"".join(_OFFSET.pack(o) for o in offsets))
+        os.replace(tmp, out_path)
+    return len(offsets)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or query an offline lexicon.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="build a lexicon from a Kaikki/Wiktionary JSONL dump")
+    b.add_argument("dump", type=Path)
+    b.add_argument("--lang", default="en", help="language of the headwords to keep")
+    b.add_argument("-o", "--output", type=Path, help="default: lexicon/lexicon.<lang>.vlx")
+    g = sub.add_parser("get", help="print the record for a word")
+    g.add_argument("lexicon", type=Path)
+    g.add_argument("word")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        out = args.output or Path("lexicon") / f"lexicon.{args.lang}.vlx"
+        n = build(args.dump, out, args.lang)
+        print(f"{n} words -> {out}", file=sys.stderr)
+    else:
+        print(json.dumps(Lexicon(args.lexicon).get(args.word.lower()), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Rewrite the word cache in the current schema (see word_entry.py).
+
+    python migrate_cache.py            # upgrade total_word.jsonl in place
+    python migrate_cache.py --dry-run  # only count what would change
+
+Run it in the server's directory. A cache still in total_word.json is
+imported first. Version 1 entries become summaries, in batches of
+BATCH_SIZE appends, and the log is then compacted so the old records
+are dropped; entries already current are left alone, so running it again
+does nothing. Senses the old entries never kept are fetched later, the
+first time someone asks for them. Servers read old entries either way,
+so this can run while they are up: batches and the compaction take the
+log's lock file (see WordStore), so nothing the servers write meanwhile
+is lost, and they pick up the compacted log on their next refresh.
+"""
+import argparse
+import sys
+from itertools import islice
+
+from word_entry import SCHEMA_VERSION, upgrade
+from word_store import WordStore
+
+# Entries rewritten per append
+BATCH_SIZE = 1000
+
+
+def _upgraded(value):
+    # The current form of an outdated entry, None if it is current already
+    if isinstance(value, dict) and value.get("v") != SCHEMA_VERSION:
+        return upgrade(value)
+    return None
+
+
+def migrate(store: WordStore, dry_run: bool = False) -> int:
+    """Upgrade every outdated entry of `store`; the number of them."""
+    if dry_run:
+        return sum(_upgraded(value) is not None for _, value in store.items())
+    upgraded = 0
+    # Keys are listed before the first write, so appends don't move under the walk
+    keys = iter(store.keys())
+    while True:
+        batch = list(islice(keys, BATCH_SIZE))
+        if not batch:
+            break
+        # Each batch is re-read under the log's lock, so a server's write
+        # since the listing is upgraded (or kept) rather than overwritten
+        upgraded += store.update_many(batch, _upgraded)
+    if upgraded:
+        store.compact()
+    return upgraded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rewrite the word cache in the current schema.")
+    parser.add_argument("--dry-run", action="store_true", help="count outdated entries without writing")
+    args = parser.parse_args()
+
+    from vocab.engine import CACHE_JSON_PATH, CACHE_LOG_PATH
+
+    store = WordStore(CACHE_LOG_PATH, legacy_path=CACHE_JSON_PATH, legacy_transform=upgrade)
+    total = len(store)
+    upgraded = migrate(store, args.dry_run)
+    verb = "would upgrade" if args.dry_run else "upgraded"
+    print(f"[migrate] {verb} {upgraded} of {total} entries to version {SCHEMA_VERSION}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from upstream import NotFoundError
+from word_cache import WordCache
+
+# Kinds of failure, each with its own re-probe schedule
+NOT_FOUND = "not_found"  # upstream answered: it has nothing for this word
+ERROR = "error"          # timeout, 5xx, open breaker... expected to heal
+
+# (first retry delay, longest retry delay) in seconds; the delay doubles
+# after every failed re-probe
+RETRY_SCHEDULE = {
+    NOT_FOUND: (24 * 3600, 30 * 24 * 3600),
+    ERROR: (30, 3600),
+}
+
+# Placeholder meanings older versions wrote into the word cache on failure
+POISONED_MEANINGS = ("Translation not available", "अनुवाद उपलब्ध नहीं है")
+
+
+def failure_kind(error: Exception) -> str:
+    return NOT_FOUND if isinstance(error, NotFoundError) else ERROR
+
+
+def is_poisoned(info: dict) -> bool:
+    return info.get("meaning") in POISONED_MEANINGS
+
+
+class NegativeCache:
+    """
+    Failed lookups, kept apart from the real word data.
+
+    Each entry records what kind of failure happened, how many times in a
+    row, and when it is worth asking upstream again. Until then the word is
+    answered locally; once due, the next request re-probes it and either
+    clears the entry or pushes the next retry further out.
+    """
+
+    def __init__(self, cache: WordCache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def record(self, key: str, kind: str) -> dict:
+        with self._lock:
+            prev = self.cache.get(key)
+            failures = prev["failures"] + 1 if prev and prev["kind"] == kind else 1
+            first, longest = RETRY_SCHEDULE[kind]
+            entry = {
+                "kind": kind,
+                "failures": failures,
+                "retry_at": time.time() + min(longest, first * 2 ** (failures - 1)),
+            }
+            self.cache.put(key, entry)
+        return entry
+
+    def clear(self, key: str) -> None:
+        if key in self.cache:
+            self.cache.delete(key)
+
+    def blocked(self, key: str) -> bool:
+        """True while a recorded failure is still waiting for its re-probe."""
+        entry = self.cache.get(key)
+        if entry is None or time.time() >= entry["retry_at"]:
+            return False
+        self.suppressed += 1
+        return True
+
+    def due(self, key: str) -> bool:
+        """True if a failure was recorded for `key` and it is time to retry."""
+        entry = self.cache.get(key)
+        return entry is not None and time.time() >= entry["retry_at"]
+
+    def stats(self) -> dict:
+        return {"entries": len(self.cache), "suppressed": self.suppressed}
@@ -0,0 +1,338 @@
+"""
+Pre-populate the word cache so a cold server answers common words without
+network calls.
+
+    python prewarm.py --words top20k.txt
+    python prewarm.py --dictionary kaikki-en.jsonl --limit 20000
+    python prewarm.py --words top20k.txt --dictionary kaikki-en.jsonl
+
+--words is a frequency-ranked list, one word per line (extra columns such
+as counts are ignored). --dictionary is an offline Wiktionary dump in the
+Kaikki JSONL format. With both, the top words are taken from the list and
+filled from the dump first; only what the dump lacks goes to the network.
+Progress is checkpointed next to the input, so an interrupted run resumes
+where it stopped; words already in the cache are never fetched again.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import providers
+from negative_cache import ERROR, failure_kind
+from word_entry import MAX_SENSES, make_sense
+
+# Words resolved and written to the cache per round
+BATCH_SIZE = 200
+# Concurrent upstream requests while prewarming
+CONCURRENCY = 8
+# Words per translate request
+TRANSLATE_CHUNK = 25
+# Seconds between progress reports
+REPORT_INTERVAL = 2.0
+
+
+def read_word_list(path: Path, start: int = 0):
+    """Yield (line number, word) from a frequency list, skipping the first `start` lines."""
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            if n < start:
+                continue
+            fields = line.split()
+            if fields and not fields[0].startswith("#"):
+                yield n + 1, fields[0].lower()
+
+
+def read_kaikki(path: Path, lang: str, tgt: str, start: int = 0):
+    """
+    Yield (byte offset after the entry, word, info) from a Kaikki/Wiktionary
+    JSONL dump, one per word: consecutive lines for the same word (one per
+    part of speech) are merged. `info` has "meaning" (None if the dump has
+    no `tgt` translation) and "senses", every glossed sense in dump order
+    up to MAX_SENSES.
+    """
+    current = None
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for raw in f:
+            offset += len(raw)
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            if entry.get("lang_code", lang) != lang or not entry.get("word"):
+                continue
+            word = entry["word"].lower()
+            if current is not None and current[0] != word:
+                yield current[2], current[0], current[1]
+                current = None
+            if current is None:
+                current = (word, {"meaning": None, "senses": []}, offset)
+            info = current[1]
+            if info["meaning"] is None:
+                info["meaning"] = _kaikki_translation(entry, tgt)
+            for sense in entry.get("senses", []):
+                if len(info["senses"]) >= MAX_SENSES:
+                    break
+                glosses = sense.get("glosses") or []
+                if glosses:
+                    examples = [e.get("text", "") for e in sense.get("examples", [])]
+                    info["senses"].append(make_sense(entry.get("pos", ""), glosses[0], examples))
+            current = (word, info, offset)
+        if current is not None:
+            yield current[2], current[0], current[1]
+
+
+def _kaikki_translation(entry: dict, tgt: str):
+    translations = list(entry.get("translations", []))
+    for sense in entry.get("senses", []):
+        translations.extend(sense.get("translations", []))
+    for t in translations:
+        if (t.get("code") or t.get("lang_code")) == tgt and t.get("word"):
+            return t["word"]
+    return None
+
+
+class Checkpoint:
+    """
+    Position reached in one input file (line number or byte offset) and
+    words seen so far, saved atomically after every batch.
+    """
+
+    def __init__(self, source: Path):
+        self.path = source.with_name(source.name + ".prewarm")
+
+    def load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return data["position"], data["seen"]
+        except (OSError, ValueError, KeyError):
+            return 0, 0
+
+    def save(self, position: int, seen: int) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"position": position, "seen": seen}), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+class Prewarmer:
+    """
+    Resolves words in batches and writes each batch to the cache in one
+    append. Offline entries are stored as they are; the rest are fetched
+    with at most `concurrency` upstream requests in flight (translations
+    TRANSLATE_CHUNK words per request). Failures are recorded in the
+    negative cache exactly as live lookups would.
+    """
+
+    def __init__(self, cache, negative_cache, lookup_senses, src: str = "en",
+                 tgt: str = "hi", concurrency: int = CONCURRENCY, batch_size: int = BATCH_SIZE):
+        self.cache = cache
+        self.negative_cache = negative_cache
+        self.lookup_senses = lookup_senses
+        self.src = src
+        self.tgt = tgt
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="vocab-prewarm")
+        self.started_at = None
+        self.finished_at = None
+        self.limit = None
+        self.seen = 0
+        self.skipped = 0
+        self.offline = 0
+        self.fetched = 0
+        self.failed = 0
+        self.error = None
+        self.cancelled = False
+
+    def run(self, words_path: Path = None, dump_path: Path = None, limit: int = None,
+            offline_only: bool = False, report=None) -> dict:
+        self.started_at = time.monotonic()
+        self.limit = limit
+        last_report = 0.0
+        try:
+            for _ in self._rounds(words_path, dump_path, limit, offline_only):
+                now = time.monotonic()
+                if report is not None and now - last_report >= REPORT_INTERVAL:
+                    report(self.progress())
+                    last_report = now
+        except Exception as e:
+            self.error = str(e)
+            raise
+        finally:
+            self._executor.shutdown()
+            self.finished_at = time.monotonic()
+            if report is not None:
+                report(self.progress())
+        return self.progress()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def _rounds(self, words_path, dump_path, limit, offline_only):
+        if words_path is None:
+            # Dump only: take its entries in file order
+            checkpoint = Checkpoint(dump_path)
+            start, self.seen = checkpoint.load()
+            batch = []
+            for offset, word, info in read_kaikki(dump_path, self.src, self.tgt, start):
+                if limit is not None and self.seen >= limit:
+                    break
+                self.seen += 1
+                batch.append((word, info))
+                if len(batch) >= self.batch_size:
+                    self._resolve(batch, offline_only)
+                    checkpoint.save(offset, self.seen)
+                    batch = []
+                    yield
+                if self.cancelled:
+                    return
+            self._resolve(batch, offline_only)
+            checkpoint.clear()
+            return
+
+        checkpoint = Checkpoint(words_path)
+        start, self.seen = checkpoint.load()
+        offline = {}
+        if dump_path is not None:
+            # Top words only, so the join stays as small as the word list
+            remaining = None if limit is None else max(0, limit - self.seen)
+            wanted = {w for _, w in islice(read_word_list(words_path, start), remaining)}
+            for _, word, info in read_kaikki(dump_path, self.src, self.tgt):
+                if word in wanted:
+                    offline[word] = info
+        batch = []
+        for n, word in read_word_list(words_path, start):
+            if limit is not None and self.seen >= limit:
+                break
+            self.seen += 1
+            batch.append((word, offline.get(word)))
+            if len(batch) >= self.batch_size:
+                self._resolve(batch, offline_only)
+                checkpoint.save(n, self.seen)
+                batch = []
+                yield
+            if self.cancelled:
+                return
+        self._resolve(batch, offline_only)
+        checkpoint.clear()
+
+    def _resolve(self, batch, offline_only: bool) -> None:
+        entries = []
+        to_translate = []
+        to_fetch = []
+        for word, info in dict(batch).items():
+            if word in self.cache:
+                self.skipped += 1
+            elif info is not None and info["meaning"] is not None:
+                entries.append((word, info))
+            elif offline_only:
+                self.failed += 1
+            elif info is not None:
+                # The dump has the definition, only the translation is missing
+                to_translate.append((word, info["senses"]))
+            else:
+                to_fetch.append(word)
+        self.offline += len(entries)
+
+        pending = [w for w, _ in to_translate] + to_fetch
+        chunks = [pending[i:i + TRANSLATE_CHUNK] for i in range(0, len(pending), TRANSLATE_CHUNK)]
+        translated = {}
+        for result in self._executor.map(lambda c: providers.translate_batch(c, self.src, self.tgt), chunks):
+            translated.update(result)
+
+        def lookup(word):
+            try:
+                return self.lookup_senses(word), None
+            except Exception as e:
+                return [], e
+
+        looked_up = dict(zip(to_fetch, self._executor.map(lookup, to_fetch)))
+
+        failed = 0
+        for word, senses in to_translate:
+            if word in translated:
+                entries.append((word, {"meaning": translated[word], "senses": senses}))
+            else:
+                failed += 1
+                self.negative_cache.record(word, ERROR)
+        for word in to_fetch:
+            meaning = translated.get(word)
+            senses, error = looked_up[word]
+            if meaning is None:
+                failed += 1
+                self.negative_cache.record(word, ERROR if error is None else failure_kind(error))
+                continue
+            entries.append((word, {"meaning": meaning, "senses": senses or []}))
+            if error is None:
+                self.negative_cache.clear(word)
+            else:
+                self.negative_cache.record(word, failure_kind(error))
+        self.fetched += len(to_translate) + len(to_fetch) - failed
+        self.failed += failed
+        if entries:
+            self.cache.put_many(entries)
+
+    def progress(self) -> dict:
+        end = self.finished_at or time.monotonic()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        rate = self.seen / elapsed if elapsed else 0.0
+        out = {
+            "running": self.finished_at is None,
+            "seen": self.seen,
+            "limit": self.limit,
+            "cached_already": self.skipped,
+            "offline": self.offline,
+            "fetched": self.fetched,
+            "failed": self.failed,
+            "elapsed_s": round(elapsed, 1),
+            "words_per_s": round(rate, 1),
+            "error": self.error,
+        }
+        if self.limit and rate and out["running"]:
+            out["eta_s"] = round(max(0, self.limit - self.seen) / rate, 1)
+        return out
+
+
+def _print_progress(p: dict) -> None:
+    total = f"/{p['limit']}" if p["limit"] else ""
+    eta = f"  eta {p['eta_s']}s" if "eta_s" in p else ""
+    print(f"[prewarm] {p['seen']}{total} words  cached {p['cached_already']}  offline {p['offline']}  "
+          f"fetched {p['fetched']}  failed {p['failed']}  {p['words_per_s']} words/s{eta}",
+          file=sys.stderr, flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pre-populate the word cache.")
+    parser.add_argument("--words", type=Path, help="frequency-ranked word list, one word per line")
+    parser.add_argument("--dictionary", type=Path, help="Kaikki/Wiktionary JSONL dump")
+    parser.add_argument("--limit", type=int, help="stop after this many words")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--offline", action="store_true", help="never call upstream; use the dump only")
+    args = parser.parse_args()
+    if args.words is None and args.dictionary is None:
+        parser.error("give --words, --dictionary or both")
+
+    # The server's own cache files, in the current directory
+    from vocab.engine import Engine, get_senses
+
+    engine = Engine()
+    prewarmer = Prewarmer(engine.entries, engine.negative_cache, get_senses,
+                          concurrency=args.concurrency, batch_size=args.batch_size)
+    try:
+        prewarmer.run(args.words, args.dictionary, args.limit, args.offline, report=_print_progress)
+    except KeyboardInterrupt:
+        print("[prewarm] interrupted; run again to resume", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
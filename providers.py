@@ -0,0 +1,196 @@
+"""
+Where translations and definitions come from.
+
+A lookup goes through an ordered chain of providers and stops at the first
+one that has an answer. The local provider reads the mmap lexicons built by
+`python lexicon.py build`; the remote one calls the translate and
+dictionary APIs through `upstream`. With the default order, "local,remote",
+the network is only touched for words the lexicon lacks.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+
+import upstream
+from lexicon import Lexicon
+from tokenizer import valid_lang
+
+# Provider order, first to last
+PROVIDERS = os.environ.get("VOCAB_PROVIDERS", "local,remote")
+# Directory holding lexicon.<lang>.vlx files
+LEXICON_DIR = Path(os.environ.get("VOCAB_LEXICON_DIR", "lexicon"))
+
+
+class RemoteProvider:
+    name = "remote"
+
+    def translate(self, text: str, src: str, tgt: str) -> str:
+        return upstream.translate(text, src, tgt)
+
+    def translate_batch(self, words: list, src: str, tgt: str) -> dict:
+        return upstream.translate_batch(words, src, tgt)
+
+    def lookup_entries(self, word: str, lang: str) -> list:
+        return upstream.lookup_entries(word, lang)
+
+
+class LexiconProvider:
+    """
+    Answers from LEXICON_DIR/lexicon.<lang>.vlx. Each file is opened on first
+    use; a language without a file (or not a language code at all) simply
+    has no local answers.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: Path = LEXICON_DIR):
+        self.directory = Path(directory)
+        self._lexicons = {}
+        self._lock = threading.Lock()
+
+    def _lexicon(self, lang: str):
+        lexicon = self._lexicons.get(lang)
+        if lexicon is not None or not valid_lang(lang):
+            return lexicon
+        path = self.directory / f"lexicon.{lang}.vlx"
+        # Misses aren't remembered, so only languages with a file are ever
+        # held, and a file built later is picked up
+        if not path.exists():
+            return None
+        with self._lock:
+            if lang not in self._lexicons:
+                self._lexicons[lang] = Lexicon(path)
+            return self._lexicons[lang]
+
+    def _get(self, word: str, lang: str):
+        lexicon = self._lexicon(lang)
+        return lexicon.get(word.lower()) if lexicon is not None else None
+
+    def translate(self, text: str, src: str, tgt: str) -> str:
+        translations = (self._get(text, src) or {}).get("tr", {}).get(tgt)
+        if not translations:
+            raise upstream.NotFoundError(f"local: no {tgt} translation")
+        return translations[0]
+
+    def translate_batch(self, words: list, src: str, tgt: str) -> dict:
+        out = {}
+        for w in words:
+            translations = (self._get(w, src) or {}).get("tr", {}).get(tgt)
+            if translations:
+                out[w] = translations[0]
+        return out
+
+    def lookup_entries(self, word: str, lang: str) -> list:
+        """Senses in the dictionaryapi.dev shape, grouped by part of speech."""
+        record = self._get(word, lang)
+        if not record or not record["senses"]:
+            raise upstream.NotFoundError("local: not found")
+        meanings = {}
+        for sense in record["senses"]:
+            definition = {"definition": sense["def"]}
+            if sense["ex"]:
+                definition["example"] = sense["ex"]
+            meanings.setdefault(sense["pos"], []).append(definition)
+        return [{
+            "word": word,
+            "meanings": [{"partOfSpeech": pos, "definitions": d} for pos, d in meanings.items()],
+        }]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {lang: len(lx) for lang, lx in self._lexicons.items() if lx is not None}
+
+
+_AVAILABLE = {"local": LexiconProvider, "remote": RemoteProvider}
+
+chain = [_AVAILABLE[name.strip()]() for name in PROVIDERS.split(",") if name.strip()]
+
+_lock = threading.Lock()
+_counters = {p.name: {"hits": 0, "misses": 0, "errors": 0, "total_ms": 0.0} for p in chain}
+
+
+def _observe(provider, start: float, hits: int, misses: int, errors: int = 0) -> None:
+    ms = (time.perf_counter() - start) * 1000
+    with _lock:
+        c = _counters[provider.name]
+        c["hits"] += hits
+        c["misses"] += misses
+        c["errors"] += errors
+        c["total_ms"] += ms
+
+
+def translate(text: str, src: str, tgt: str) -> str:
+    """First provider's translation of `text`; raises the last provider's error if none has one."""
+    error = upstream.NotFoundError("no providers")
+    for provider in chain:
+        start = time.perf_counter()
+        try:
+            result = provider.translate(text, src, tgt)
+        except upstream.NotFoundError as e:
+            _observe(provider, start, 0, 1)
+            error = e
+            continue
+        except upstream.UpstreamError as e:
+            _observe(provider, start, 0, 0, 1)
+            error = e
+            continue
+        _observe(provider, start, 1, 0)
+        return result
+    raise error
+
+
+def translate_batch(words: list, src: str, tgt: str) -> dict:
+    """{word: translation} for the words any provider has; each provider gets only what is still missing."""
+    out = {}
+    missing = list(words)
+    for provider in chain:
+        if not missing:
+            break
+        start = time.perf_counter()
+        found = provider.translate_batch(missing, src, tgt)
+        _observe(provider, start, len(found), len(missing) - len(found))
+        out.update(found)
+        missing = [w for w in missing if w not in found]
+    return out
+
+
+def lookup_entries(word: str, lang: str) -> list:
+    """
+    Dictionary entries for `word` from the first provider that has them.
+    If none has, the last provider's error is raised: NotFoundError if it
+    has no entry either, UpstreamError if it couldn't be reached.
+    """
+    error = upstream.NotFoundError("no providers")
+    for provider in chain:
+        start = time.perf_counter()
+        try:
+            entries = provider.lookup_entries(word, lang)
+        except upstream.NotFoundError as e:
+            _observe(provider, start, 0, 1)
+            error = e
+            continue
+        except upstream.UpstreamError as e:
+            _observe(provider, start, 0, 0, 1)
+            error = e
+            continue
+        _observe(provider, start, 1, 0)
+        return entries
+    raise error
+
+
+def stats() -> dict:
+    with _lock:
+        out = {}
+        for name, c in _counters.items():
+            calls = c["hits"] + c["misses"] + c["errors"]
+            out[name] = {
+                "hits": c["hits"],
+                "misses": c["misses"],
+                "errors": c["errors"],
+                "avg_ms": round(c["total_ms"] / calls, 3) if calls else 0.0,
+            }
+    for provider in chain:
+        if isinstance(provider, LexiconProvider):
+            out[provider.name]["lexicons"] = provider.stats()
+    return {"order": [p.name for p in chain], "providers": out}
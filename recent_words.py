@@ -0,0 +1,94 @@
+"""
+The words a learner met most recently, and how often lately.
+
+Two bounded structures, both oldest first: the distinct words by when they
+were last seen (an OrderedDict, so a sighting moves its word to the end
+in O(1)), and the sightings themselves as (time, word) in a deque. Queries
+walk either from the newest end and stop at the window's start, so "the
+last hour" costs what the last hour holds, not the whole history.
+"""
+import os
+import time
+from collections import Counter, OrderedDict, deque
+
+# Distinct words remembered in recency order
+RECENT_DEPTH = int(os.environ.get("VOCAB_RECENT_DEPTH", "1000"))
+# Sightings remembered for most-seen queries
+RECENT_HISTORY = int(os.environ.get("VOCAB_RECENT_HISTORY", "10000"))
+# Words returned when the caller doesn't say
+RECENT_LIMIT = 10
+
+
+class RecentWords:
+    """
+    Recency of one learner's words. Not locked: the owning state object
+    calls it with its own lock held.
+    """
+
+    def __init__(self, depth: int = RECENT_DEPTH, history: int = RECENT_HISTORY):
+        self.depth = depth
+        self._last = OrderedDict()  # word -> last seen, least recent first
+        self._sightings = deque(maxlen=history)  # (time, word), oldest first
+
+    @classmethod
+    def from_json(cls, data, depth: int = RECENT_DEPTH, history: int = RECENT_HISTORY):
+        """Load what to_json saved, or the newest-first list files had before."""
+        recent = cls(depth, history)
+        if isinstance(data, list):
+            data = {"words": [[item["word"], item["timestamp"]] for item in reversed(data)
+                              if isinstance(item, dict) and "word" in item and "timestamp" in item]}
+        elif not isinstance(data, dict):
+            data = {}
+        for word, ts in data.get("words", [])[-depth:]:
+            recent._last[word] = ts
+        recent._sightings.extend((ts, word) for ts, word in data.get("sightings", []))
+        return recent
+
+    def to_json(self) -> dict:
+        return {
+            "words": [[w, ts] for w, ts in self._last.items()],
+            "sightings": [[ts, w] for ts, w in self._sightings],
+        }
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def touch(self, word: str, now: float = None) -> None:
+        """Record a sighting of `word`, making it the most recent."""
+        now = time.time() if now is None else now
+        last = self._last
+        last[word] = now
+        last.move_to_end(word)
+        if len(last) > self.depth:
+            last.popitem(last=False)
+        self._sightings.append((now, word))
+
+    def latest(self, limit: int = RECENT_LIMIT, since: float = None) -> list:
+        """[{"word", "timestamp"}] newest first, seen at or after `since` if given."""
+        out = []
+        for word in reversed(self._last):
+            if len(out) >= limit:
+                break
+            ts = self._last[word]
+            if since is not None and ts < since:
+                break
+            out.append({"word": word, "timestamp": ts})
+        return out
+
+    def top(self, limit: int = RECENT_LIMIT, since: float = None) -> list:
+        """
+        [{"word", "count", "timestamp"}] of the most sighted words, at or
+        after `since` if given; ties go to the more recently seen.
+        """
+        counts = Counter()
+        last = {}
+        for ts, word in reversed(self._sightings):
+            if since is not None and ts < since:
+                break
+            counts[word] += 1
+            last.setdefault(word, ts)
+        return [{"word": w, "count": n, "timestamp": last[w]} for w, n in counts.most_common(limit)]
+
+    def stats(self) -> dict:
+        return {"words": len(self._last), "depth": self.depth,
+                "sightings": len(self._sightings), "history": self._sightings.maxlen}
@@ -0,0 +1,216 @@
+"""
+Spaced-repetition reviews of a learner's unknown words (SM-2).
+
+Each word under review has a card, {"due", "interval", "ease", "reps",
+"lapses"}: when it is next due (epoch seconds), the last interval in days,
+its ease factor, the successful reviews in a row and how often it was
+forgotten after being learned. A review grades the recall "again",
+"hard", "good" or "easy" (SM-2 qualities 1, 3, 4 and 5) and schedules the
+next one; a word whose interval reaches GRADUATE_DAYS is known.
+
+ReviewQueue keeps the cards of one learner in memory with a heap of due
+times, so the next N due cards cost O(N log n) however many there are,
+and persists each change as one appended line (ReviewLog).
+"""
+import heapq
+import json
+import os
+import threading
+from pathlib import Path
+
+# SM-2 recall quality of each answer
+GRADES = {"again": 1, "hard": 3, "good": 4, "easy": 5}
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+# Intervals, in days, after the first and second successful review
+FIRST_INTERVAL = 1.0
+SECOND_INTERVAL = 6.0
+# Extra stretch of an "easy" answer
+EASY_BONUS = 1.3
+# Seconds before a forgotten word comes back
+RELEARN_DELAY = 600
+# A word reviewed into an interval this long (days) moves to the known list
+GRADUATE_DAYS = float(os.environ.get("VOCAB_REVIEW_GRADUATE_DAYS", "21"))
+# Cards returned when the caller doesn't say, and the most it may ask for
+REVIEW_LIMIT = 20
+MAX_REVIEW_LIMIT = 200
+
+DAY = 86400.0
+_FIELDS = ("due", "interval", "ease", "reps", "lapses")
+
+
+def new_card(now: float) -> dict:
+    """A card never reviewed, due at `now`."""
+    return {"due": now, "interval": 0.0, "ease": INITIAL_EASE, "reps": 0, "lapses": 0}
+
+
+def schedule(card: dict, grade: str, now: float) -> dict:
+    """The card after answering `grade` at `now`. Raises ValueError for an unknown grade."""
+    if grade not in GRADES:
+        raise ValueError(f"grade must be one of {', '.join(GRADES)}")
+    q = GRADES[grade]
+    ease = round(max(MIN_EASE, card["ease"] + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)), 3)
+    if q < 3:
+        return {"due": now + RELEARN_DELAY, "interval": 0.0, "ease": ease, "reps": 0,
+                "lapses": card["lapses"] + (card["reps"] > 0)}
+    reps = card["reps"] + 1
+    if reps == 1:
+        interval = FIRST_INTERVAL
+    elif reps == 2:
+        interval = SECOND_INTERVAL
+    else:
+        interval = card["interval"] * ease
+    if grade == "easy":
+        interval *= EASY_BONUS
+    interval = round(interval, 2)
+    return {"due": now + interval * DAY, "interval": interval, "ease": ease, "reps": reps,
+            "lapses": card["lapses"]}
+
+
+def _line(word: str, card) -> bytes:
+    # [word, due, interval, ease, reps, lapses], or [word] for a removed card
+    row = [word] if card is None else [word] + [card[f] for f in _FIELDS]
+    return json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class ReviewLog:
+    """
+    Append-only file of card changes, one JSON line each; the last line
+    of a word wins. load() rewrites the file once stale lines outnumber
+    the cards it holds.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.appends = 0
+
+    def load(self) -> dict:
+        cards = {}
+        lines = 0
+        try:
+            with open(self.path, "rb") as f:
+                for raw in f:
+                    try:
+                        row = json.loads(raw)
+                        if len(row) == 1:
+                            cards.pop(row[0], None)
+                        else:
+                            cards[row[0]] = dict(zip(_FIELDS, row[1:]))
+                    except (ValueError, TypeError, IndexError):
+                        continue
+                    lines += 1
+        except OSError:
+            return {}
+        if lines > 2 * len(cards) + 64:
+            self._rewrite(cards)
+        return cards
+
+    def _rewrite(self, cards: dict) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(_line(w, c) for w, c in cards.items()))
+        os.replace(tmp_path, self.path)
+
+    def append(self, changes) -> None:
+        """Record (word, card or None) changes in one write."""
+        data = b"".join(_line(w, c) for w, c in changes)
+        if not data:
+            return
+        with self._lock, open(self.path, "ab") as f:
+            f.write(data)
+            self.appends += 1
+
+
+class ReviewQueue:
+    """
+    Cards of one learner by word, and a heap of (due, word) over them.
+    A changed card pushes a new heap entry and leaves its old one behind,
+    skipped when met (its due time no longer matches the card) and dropped
+    when the heap is rebuilt. Not locked: the owning state object calls it
+    with its own lock held.
+    """
+
+    def __init__(self, cards: dict = None, log: ReviewLog = None):
+        self._cards = cards or {}
+        self._log = log
+        self._heap = [(c["due"], w) for w, c in self._cards.items()]
+        heapq.heapify(self._heap)
+
+    @classmethod
+    def load(cls, path: Path):
+        log = ReviewLog(path)
+        return cls(log.load(), log)
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def __contains__(self, word) -> bool:
+        return word in self._cards
+
+    def get(self, word: str):
+        return self._cards.get(word)
+
+    def _set(self, changes) -> None:
+        heap = self._heap
+        for word, card in changes:
+            if card is None:
+                self._cards.pop(word, None)
+            else:
+                self._cards[word] = card
+                heapq.heappush(heap, (card["due"], word))
+        if self._log is not None:
+            self._log.append(changes)
+        if len(heap) > 2 * len(self._cards) + 64:
+            self._heap = [(c["due"], w) for w, c in self._cards.items()]
+            heapq.heapify(self._heap)
+
+    def enroll(self, words, now: float) -> int:
+        """Give the words without a card one due now; how many were new."""
+        changes = [(w, new_card(now)) for w in dict.fromkeys(words) if w not in self._cards]
+        self._set(changes)
+        return len(changes)
+
+    def review(self, word: str, grade: str, now: float) -> dict:
+        """Schedule `word` after answering `grade`; a word without a card gets one first."""
+        card = schedule(self._cards.get(word) or new_card(now), grade, now)
+        self._set([(word, card)])
+        return card
+
+    def discard(self, word: str) -> bool:
+        if word not in self._cards:
+            return False
+        self._set([(word, None)])
+        return True
+
+    def due(self, limit: int, now: float) -> list:
+        """[(word, card)] due at or before `now`, the longest overdue first."""
+        heap = self._heap
+        cards = self._cards
+        out = []
+        seen = set()
+        while heap and len(out) < limit and heap[0][0] <= now:
+            due, word = heapq.heappop(heap)
+            card = cards.get(word)
+            if card is not None and card["due"] == due and word not in seen:
+                seen.add(word)
+                out.append((word, card))
+        # The live entries go back; the stale ones popped on the way stay out
+        for word, card in out:
+            heapq.heappush(heap, (card["due"], word))
+        return out
+
+    def next_due(self):
+        """When the next card is due, or None if there are none."""
+        heap = self._heap
+        while heap:
+            due, word = heap[0]
+            card = self._cards.get(word)
+            if card is not None and card["due"] == due:
+                return due
+            heapq.heappop(heap)
+        return None
+
+    def stats(self) -> dict:
+        return {"cards": len(self._cards), "heap": len(self._heap), "next_due": self.next_due(),
+                "appends": self._log.appends if self._log is not None else 0}
@@ -0,0 +1,79 @@
+"""
+Cursor pages over word lists, in word order, filtered by prefix and substring.
+
+A page is (words, next): `next` is the last word of a full page when more
+follow, to be passed back as `cursor`, else None. Cursors are words, so a
+page stays correct while words are added or removed between requests.
+"""
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+# Words per page when the client doesn't say, and the most it may ask for
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Sorts after every word that starts with a given prefix
+_TOP = "\U0010ffff"
+
+
+def _finish(words: list, limit: int):
+    # `words` holds up to limit + 1 matches; the extra one only says a next page exists
+    if len(words) > limit:
+        words = words[:limit]
+        return words, words[-1]
+    return words, None
+
+
+class SortedWords:
+    """
+    Distinct words in a sorted list, updated in place as words come and go.
+
+    A page bisects to the prefix range and the cursor, so without a
+    substring filter it costs O(log n + limit) however many words there
+    are; a substring filter scans the range until the page is full.
+    """
+
+    def __init__(self, words=()):
+        self._words = sorted(set(words))
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __iter__(self):
+        return iter(self._words)
+
+    def add(self, word: str) -> bool:
+        """Insert `word`; False if it was already there."""
+        words = self._words
+        i = bisect_left(words, word)
+        if i == len(words) or words[i] != word:
+            words.insert(i, word)
+            return True
+        return False
+
+    def discard(self, word: str) -> bool:
+        """Remove `word`; False if it wasn't there."""
+        words = self._words
+        i = bisect_left(words, word)
+        if i < len(words) and words[i] == word:
+            del words[i]
+            return True
+        return False
+
+    def page(self, cursor: str = None, limit: int = PAGE_SIZE, prefix: str = "",
+             contains: str = "", reverse: bool = False):
+        words = self._words
+        lo, hi = 0, len(words)
+        if prefix:
+            lo, hi = bisect_left(words, prefix), bisect_left(words, prefix + _TOP)
+        if cursor is not None:
+            if reverse:
+                hi = min(hi, bisect_left(words, cursor))
+            else:
+                lo = max(lo, bisect_right(words, cursor))
+        if not contains:
+            if reverse:
+                return _finish(words[max(lo, hi - limit - 1):hi][::-1], limit)
+            return _finish(words[lo:min(hi, lo + limit + 1)], limit)
+        span = (words[i] for i in range(hi - 1, lo - 1, -1)) if reverse else islice(words, lo, hi)
+        return _finish(list(islice((w for w in span if contains in w), limit + 1)), limit)
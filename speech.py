@@ -0,0 +1,421 @@
+"""
+Speech recognition on the server, for pages without the Web Speech API.
+
+A page opens a stream, then posts the microphone's audio to it in chunks
+as it records: 16-bit little-endian PCM at the rate given when opening
+(mono, or interleaved channels of which the first is used), or a WAV file
+whose header comes first. Each chunk is decoded as it arrives and cut
+into utterances at pauses (an energy threshold over FRAME_MS frames);
+finished utterances are recognized on a bounded worker pool, never on the
+request thread, and their text is returned by the same or a later post.
+
+Recognition uses the speech_recognition package, with VOCAB_STT_ENGINE
+picking the engine: "google" (the free web API), or "sphinx" or "vosk",
+which run offline (pocketsphinx, or vosk with a model in ./model). The
+CPU time each stream costs, decoding and recognition, is counted; past
+STREAM_CPU_SECONDS the stream is refused more audio.
+"""
+import json
+import math
+import operator
+import os
+import secrets
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+
+from io_pool import IOPool, Overloaded
+
+try:
+    import speech_recognition as sr
+except ImportError:  # only the /api/vocab/listen routes need it
+    sr = None
+
+STT_ENGINE = os.environ.get("VOCAB_STT_ENGINE", "google")
+# Recognitions running at once, and allowed to wait for a thread
+STT_WORKERS = int(os.environ.get("VOCAB_STT_WORKERS", "2"))
+STT_QUEUE = int(os.environ.get("VOCAB_STT_QUEUE", "16"))
+# Streams open at once; idle ones are closed after STREAM_IDLE seconds
+MAX_STREAMS = int(os.environ.get("VOCAB_STT_MAX_STREAMS", "32"))
+STREAM_IDLE = 60.0
+# CPU seconds one stream may use before it is refused more audio
+STREAM_CPU_SECONDS = float(os.environ.get("VOCAB_STT_CPU_SECONDS", "120"))
+# Most audio one post may carry; the page posts half a second at a time,
+# and this is half a minute of 16 kHz mono
+MAX_POST_BYTES = 1024 * 1024
+# Seconds the final post of a stream waits for recognitions in flight
+FINAL_TIMEOUT = 10.0
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+# Most bytes a WAV upload may put before its audio; longer headers are refused
+MAX_HEADER_BYTES = 64 * 1024
+# Silence that ends an utterance, the least speech worth recognizing, and
+# the longest utterance before it is cut anyway
+PAUSE_MS = 600
+MIN_SPEECH_MS = 250
+MAX_UTTERANCE_MS = 15000
+# Audio kept from before the first loud frame, so onsets aren't clipped
+PREROLL_MS = 300
+# A frame is speech when its RMS is SPEECH_RATIO times the noise floor and
+# at least MIN_SPEECH_RMS
+SPEECH_RATIO = 3.0
+MIN_SPEECH_RMS = 300.0
+
+
+class StreamLimit(Exception):
+    """The stream used up its CPU allowance, or sent too much audio at once."""
+
+
+def recognizer(engine: str = STT_ENGINE):
+    """
+    recognize(pcm, rate, lang) -> text with `engine`, where `pcm` is mono
+    16-bit audio; "" if no speech was made out. None if speech_recognition
+    isn't installed.
+    """
+    if sr is None:
+        return None
+    r = sr.Recognizer()
+    if engine == "google":
+        call = r.recognize_google
+    elif engine == "sphinx":
+        call = r.recognize_sphinx
+    elif engine == "vosk":
+        def call(audio, language):
+            # Returns the recognizer's JSON; the model in ./model has one language
+            return json.loads(r.recognize_vosk(audio)).get("text", "")
+    else:
+        raise ValueError(f"Unknown VOCAB_STT_ENGINE: {engine!r}")
+
+    def recognize(pcm: bytes, rate: int, lang: str) -> str:
+        try:
+            return call(sr.AudioData(pcm, rate, 2), language=lang)
+        except sr.UnknownValueError:
+            return ""
+
+    return recognize
+
+
+def _rms(frame) -> float:
+    return math.sqrt(sum(map(operator.mul, frame, frame)) / len(frame)) if frame else 0.0
+
+
+class PCMDecoder:
+    """
+    Bytes of a PCM or WAV upload in, mono samples out, whatever the chunk
+    boundaries. A WAV header sets the rate and channels; only 16-bit PCM
+    is accepted, with at most MAX_HEADER_BYTES of chunks before the audio.
+    """
+
+    def __init__(self, rate: int = SAMPLE_RATE, channels: int = 1):
+        self.rate = rate
+        self.channels = channels
+        self._buf = b""
+        self._header = None  # None: not looked at yet, False: raw PCM, True: in the data chunk
+
+    def _read_header(self) -> bool:
+        # Walks the RIFF chunks up to "data"; False while more bytes are needed
+        buf = self._buf
+        if len(buf) < 12:
+            return False
+        if buf[:4] != b"RIFF" or buf[8:12] != b"WAVE":
+            self._header = False
+            return True
+        pos = 12
+        while len(buf) >= pos + 8:
+            kind, size = buf[pos:pos + 4], struct.unpack("<I", buf[pos + 4:pos + 8])[0]
+            if kind == b"data":
+                self._buf = buf[pos + 8:]
+                self._header = True
+                return True
+            if pos + 8 + size > MAX_HEADER_BYTES:
+                raise ValueError(f"WAV header is over {MAX_HEADER_BYTES} bytes")
+            if len(buf) < pos + 8 + size:
+                return False
+            if kind == b"fmt ":
+                fmt, channels, rate, _, _, bits = struct.unpack("<HHIIHH", buf[pos + 8:pos + 24])
+                if fmt != 1 or bits != 16:
+                    raise ValueError("WAV audio must be 16-bit PCM")
+                self.rate, self.channels = rate, channels
+            pos += 8 + size + (size & 1)
+        return False
+
+    def feed(self, data: bytes) -> array:
+        self._buf += data
+        if self._header is None and not self._read_header():
+            # Still no audio: only ever a header's worth is held back
+            if len(self._buf) > MAX_HEADER_BYTES:
+                raise ValueError(f"WAV header is over {MAX_HEADER_BYTES} bytes")
+            return array("h")
+        frame = 2 * self.channels
+        usable = len(self._buf) - len(self._buf) % frame
+        samples = array("h", self._buf[:usable])
+        self._buf = self._buf[usable:]
+        if sys.byteorder == "big":
+            samples.byteswap()
+        return samples[::self.channels] if self.channels > 1 else samples
+
+
+class Segmenter:
+    """
+    Cuts mono samples into utterances: runs of loud frames, with the
+    PREROLL_MS before them, ended by PAUSE_MS of quiet or MAX_UTTERANCE_MS
+    of audio. The noise floor follows the quiet frames, so a noisy room
+    needs louder speech.
+    """
+
+    def __init__(self, rate: int = SAMPLE_RATE):
+        self.rate = rate
+        self.frame = rate * FRAME_MS // 1000
+        self._pending = array("h")
+        self._preroll = deque(maxlen=PREROLL_MS // FRAME_MS)
+        self._utterance = array("h")
+        self._start = 0
+        self._speech = 0
+        self._quiet = 0
+        self._noise = MIN_SPEECH_RMS / SPEECH_RATIO
+        self.position = 0  # samples seen
+
+    def feed(self, samples) -> list:
+        """[(start s, end s, samples)] of the utterances these samples finished."""
+        pending = self._pending
+        pending.extend(samples)
+        out = []
+        n = self.frame
+        used = 0
+        while len(pending) - used >= n:
+            self._frame(pending[used:used + n], out)
+            used += n
+        del pending[:used]
+        return out
+
+    def _frame(self, frame, out) -> None:
+        rms = _rms(frame)
+        loud = rms >= max(MIN_SPEECH_RMS, self._noise * SPEECH_RATIO)
+        if not loud:
+            self._noise = 0.95 * self._noise + 0.05 * rms
+        self.position += len(frame)
+        utterance = self._utterance
+        if not utterance and not loud:
+            self._preroll.append(frame)
+            return
+        if not utterance:
+            self._start = self.position - len(frame) * (len(self._preroll) + 1)
+            for f in self._preroll:
+                utterance.extend(f)
+            self._preroll.clear()
+        utterance.extend(frame)
+        if loud:
+            self._speech += 1
+            self._quiet = 0
+        else:
+            self._quiet += 1
+        if self._quiet * FRAME_MS >= PAUSE_MS or len(utterance) * 1000 >= MAX_UTTERANCE_MS * self.rate:
+            self._finish(out)
+
+    def _finish(self, out) -> None:
+        utterance = self._utterance
+        if self._speech * FRAME_MS >= MIN_SPEECH_MS:
+            # Most of the closing pause is left out
+            keep = len(utterance) - max(0, self._quiet - 3) * self.frame
+            out.append((self._start / self.rate, (self._start + keep) / self.rate, utterance[:keep]))
+        self._utterance = array("h")
+        self._speech = self._quiet = 0
+
+    def flush(self) -> list:
+        """The utterance still open at the end of the audio, if long enough."""
+        out = []
+        if self._utterance:
+            self._finish(out)
+        return out
+
+
+class SpeechStream:
+    """
+    One page's recording: its decoder and segmenter, and the recognitions
+    of its utterances in the order spoken. SpeechStreams.feed holds its
+    lock, so posts to one stream are taken one at a time.
+    """
+
+    def __init__(self, user: str, pair: tuple, lang: str, rate: int, channels: int):
+        self.id = secrets.token_urlsafe(12)
+        self.user = user
+        self.pair = pair
+        self.lang = lang
+        self.decoder = PCMDecoder(rate, channels)
+        self.segmenter = None
+        self.lock = threading.Lock()
+        self.pending = deque()  # (start, end, future), oldest first
+        self.cpu = 0.0
+        self.audio_bytes = 0
+        self.segments = 0
+        self.dropped = 0
+        self.last_active = time.monotonic()
+
+
+class SpeechStreams:
+    """
+    Open speech streams by id, and the pool that recognizes their
+    utterances. `recognize` is as returned by recognizer().
+    """
+
+    def __init__(self, recognize, workers: int = STT_WORKERS, queue_size: int = STT_QUEUE,
+                 max_streams: int = MAX_STREAMS, cpu_seconds: float = STREAM_CPU_SECONDS):
+        self.recognize = recognize
+        self.max_streams = max_streams
+        self.cpu_seconds = cpu_seconds
+        self._pool = IOPool("vocab-stt", workers, queue_size)
+        self._streams = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.expired = 0
+        self.limited = 0
+        self.oversized = 0
+        self.recognized = 0
+        self.cpu = 0.0
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - STREAM_IDLE
+        for sid, stream in list(self._streams.items()):
+            if stream.last_active < cutoff:
+                del self._streams[sid]
+                self.expired += 1
+
+    def open(self, user: str, pair: tuple, lang: str, rate: int = SAMPLE_RATE, channels: int = 1) -> SpeechStream:
+        """
+        A new stream of `user` for the language pair `pair`, recognizing
+        `lang`. Raises Overloaded if MAX_STREAMS are open.
+        """
+        with self._lock:
+            self._expire()
+            if len(self._streams) >= self.max_streams:
+                raise Overloaded("vocab-stt: too many open streams")
+            stream = SpeechStream(user, pair, lang, rate, channels)
+            self._streams[stream.id] = stream
+            self.opened += 1
+            return stream
+
+    def get(self, sid: str, user: str):
+        """The stream `sid` if `user` opened it, else None."""
+        with self._lock:
+            self._expire()
+            stream = self._streams.get(sid)
+        if stream is None or stream.user != user:
+            return None
+        stream.last_active = time.monotonic()
+        return stream
+
+    def close(self, sid: str, user: str) -> bool:
+        """Drop the stream `sid` if `user` opened it; whether it did."""
+        with self._lock:
+            stream = self._streams.get(sid)
+            if stream is None or stream.user != user:
+                return False
+            del self._streams[sid]
+            return True
+
+    def _run(self, pcm: bytes, rate: int, lang: str):
+        start = time.thread_time()
+        try:
+            text, error = self.recognize(pcm, rate, lang), None
+        except Exception as e:
+            text, error = "", str(e)
+        return text, error, time.thread_time() - start
+
+    def feed(self, stream: SpeechStream, chunks, final: bool = False) -> list:
+        """
+        Decode `chunks` of audio into `stream` and return the utterances
+        recognized since the last call, in order: [{"start", "end", "text"}]
+        (with "error" if recognition failed). `final` ends the audio and
+        waits up to FINAL_TIMEOUT for the rest. Raises ValueError for
+        audio it can't decode, and StreamLimit past the CPU allowance or
+        past MAX_POST_BYTES in one call; both are checked chunk by chunk.
+        """
+        with self._lock:
+            self._expire()
+        with stream.lock:
+            self._check_cpu(stream, 0.0)
+            return self._feed(stream, chunks, final)
+
+    def _check_cpu(self, stream: SpeechStream, spent: float) -> None:
+        # `spent`: CPU used by the call in progress, not yet in stream.cpu
+        if stream.cpu + spent > self.cpu_seconds:
+            stream.cpu += spent
+            with self._lock:
+                self.limited += 1
+            raise StreamLimit(f"stream used its {self.cpu_seconds:.0f} s of CPU")
+
+    def _feed(self, stream: SpeechStream, chunks, final: bool) -> list:
+        start = time.thread_time()
+        utterances = []
+        received = 0
+        for data in chunks:
+            received += len(data)
+            if received > MAX_POST_BYTES:
+                with self._lock:
+                    self.oversized += 1
+                raise StreamLimit(f"more than {MAX_POST_BYTES} bytes of audio in one post")
+            self._check_cpu(stream, time.thread_time() - start)
+            stream.audio_bytes += len(data)
+            samples = stream.decoder.feed(data)
+            if stream.segmenter is None and (samples or final):
+                # The decoder knows the rate once a WAV header is read
+                stream.segmenter = Segmenter(stream.decoder.rate)
+            if samples:
+                utterances += stream.segmenter.feed(samples)
+        if final and stream.segmenter is not None:
+            utterances += stream.segmenter.flush()
+        for begin, end, samples in utterances:
+            if sys.byteorder == "big":
+                samples.byteswap()
+            try:
+                future = self._pool.submit(self._run, samples.tobytes(), stream.decoder.rate, stream.lang)
+            except Overloaded:
+                stream.dropped += 1
+                continue
+            stream.pending.append((begin, end, future))
+        stream.cpu += time.thread_time() - start
+        return self._collect(stream, FINAL_TIMEOUT if final else 0)
+
+    def _collect(self, stream: SpeechStream, wait: float) -> list:
+        deadline = time.monotonic() + wait
+        out = []
+        while stream.pending:
+            begin, end, future = stream.pending[0]
+            if not future.done():
+                if time.monotonic() >= deadline:
+                    break
+                try:
+                    future.result(timeout=deadline - time.monotonic())
+                except Exception:
+                    break
+            stream.pending.popleft()
+            text, error, cpu = future.result()
+            stream.cpu += cpu
+            stream.segments += 1
+            with self._lock:
+                self.recognized += 1
+                self.cpu += cpu
+            segment = {"start": round(begin, 2), "end": round(end, 2), "text": text}
+            if error is not None:
+                segment["error"] = error
+            out.append(segment)
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "engine": STT_ENGINE if self.recognize is not None else None,
+                "streams": len(self._streams),
+                "max_streams": self.max_streams,
+                "opened": self.opened,
+                "expired": self.expired,
+                "cpu_limited": self.limited,
+                "oversized_posts": self.oversized,
+                "recognized": self.recognized,
+                "cpu_s": round(self.cpu, 3),
+                "pool": self._pool.stats(),
+            }
@@ -0,0 +1,622 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+from recent_words import RECENT_DEPTH, RECENT_HISTORY, RECENT_LIMIT, RecentWords
+from review_schedule import REVIEW_LIMIT, ReviewLog, ReviewQueue, new_card, schedule
+from sorted_words import PAGE_SIZE, SortedWords
+from write_behind import WriteBehind
+
+# "memory" keeps state in this process (JSON files written behind);
+# "sqlite" shares it between every worker process through one database.
+STATE_BACKEND = os.environ.get("VOCAB_STATE_BACKEND", "memory")
+STATE_DB_PATH = Path(os.environ.get("VOCAB_STATE_DB", "vocab_state.db"))
+# Per-user JSON files (memory backend), sharded into subdirectories by user id hash
+USER_STATE_DIR = Path(os.environ.get("VOCAB_USER_STATE_DIR", "user_state"))
+# Learners whose state is kept in memory at once; the least recently used
+# one is written out and dropped when another has to be loaded
+MAX_RESIDENT_USERS = int(os.environ.get("VOCAB_MAX_RESIDENT_USERS", "256"))
+
+_USER_ID = re.compile(r"[A-Za-z0-9_.@-]{1,64}")
+
+
+def valid_user_id(user: str) -> bool:
+    # "" is the shared learner the app had before users existed
+    return user == "" or (_USER_ID.fullmatch(user) is not None and user.strip(".") != "")
+
+
+def _load_json(path: Path, default):
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return default
+    return data if isinstance(data, type(default)) else default
+
+
+class InvalidScope(ValueError):
+    """A state scope that would put the learner's files outside their directory."""
+
+
+def _user_dir(user: str) -> Path:
+    # The shared learner keeps the original file names in the working directory
+    if not user:
+        return Path(".")
+    shard = hashlib.sha1(user.encode("utf-8")).hexdigest()[:2]
+    return USER_STATE_DIR / shard / user
+
+
+def _state_paths(user: str, scope: str):
+    suffix = f".{scope}" if scope else ""
+    d = _user_dir(user)
+    paths = (
+        d / f"known_word{suffix}.json",
+        d / f"unknown_word{suffix}.json",
+        d / f"progress_word{suffix}.json",
+        d / f"review_word{suffix}.jsonl",
+    )
+    # The scope comes from request language codes; it must not leave the user's directory
+    root = d.resolve()
+    if any(p.resolve().parent != root for p in paths):
+        raise InvalidScope(f"state scope {scope!r} escapes {d}")
+    return paths
+
+
+class InProcessState:
+    """
+    Learner state held in this process: known/unknown sets (each with a
+    sorted copy, so list pages bisect instead of scanning), sighting
+    counters and recent words (see RecentWords), each persisted to the user's own JSON
+    files by write-behind writers, and review cards (see ReviewQueue),
+    appended to a log of their own as they change. Only correct with a
+    single worker process.
+    """
+
+    backend = "memory"
+
+    def __init__(self, scope: str = "", user: str = ""):
+        self.scope = scope
+        self.user = user
+        known_path, unknown_path, progress_path, review_path = _state_paths(user, scope)
+        known_path.parent.mkdir(parents=True, exist_ok=True)
+        progress = _load_json(progress_path, {})
+        self._lock = threading.Lock()
+        self._known = set(_load_json(known_path, []))
+        self._unknown = set(_load_json(unknown_path, []))
+        # Words on both lists, so the distinct total is a subtraction
+        self._both = len(self._known & self._unknown)
+        self._lists = {"known": SortedWords(self._known), "unknown": SortedWords(self._unknown)}
+        self._counts = dict(progress.get("sightings", {}))
+        self._recent = RecentWords.from_json(progress.get("recent"))
+        self._reviews = ReviewQueue.load(review_path)
+        self._known_writer = WriteBehind(known_path, lambda: self._sorted("known"))
+        self._unknown_writer = WriteBehind(unknown_path, lambda: self._sorted("unknown"))
+        self._progress_writer = WriteBehind(progress_path, self._progress)
+        self._writers = (self._known_writer, self._unknown_writer, self._progress_writer)
+
+    def _sorted(self, which: str) -> list:
+        with self._lock:
+            return list(self._lists[which])
+
+    def _progress(self) -> dict:
+        with self._lock:
+            return {"sightings": dict(self._counts), "recent": self._recent.to_json()}
+
+    def is_known(self, word: str) -> bool:
+        return word in self._known
+
+    def known_words(self) -> list:
+        return self._sorted("known")
+
+    def unknown_words(self) -> list:
+        return self._sorted("unknown")
+
+    def page(self, which: str, **options):
+        """A page of the "known" or "unknown" list; see SortedWords.page for the options."""
+        words = self._lists["known" if which == "known" else "unknown"]
+        with self._lock:
+            return words.page(**options)
+
+    def counts(self) -> dict:
+        with self._lock:
+            return {
+                "known": len(self._known),
+                "unknown": len(self._unknown),
+                "total": len(self._known) + len(self._unknown) - self._both,
+            }
+
+    def add_known(self, word: str) -> bool:
+        with self._lock:
+            if word in self._known:
+                return False
+            self._known.add(word)
+            self._lists["known"].add(word)
+            self._both += word in self._unknown
+            self._reviews.discard(word)
+        self._known_writer.mark_dirty()
+        return True
+
+    def add_unknown(self, word: str) -> bool:
+        with self._lock:
+            if word in self._unknown:
+                return False
+            self._unknown.add(word)
+            self._lists["unknown"].add(word)
+            self._both += word in self._known
+        self._unknown_writer.mark_dirty()
+        return True
+
+    def move(self, word: str, to_known: bool) -> None:
+        """Put `word` in one list and take it out of the other."""
+        with self._lock:
+            src, dst = (self._unknown, self._known) if to_known else (self._known, self._unknown)
+            self._both -= word in src and word in dst
+            src.discard(word)
+            dst.add(word)
+            lists = self._lists
+            lists["unknown" if to_known else "known"].discard(word)
+            lists["known" if to_known else "unknown"].add(word)
+            if to_known:
+                self._reviews.discard(word)
+        self._known_writer.mark_dirty()
+        self._unknown_writer.mark_dirty()
+
+    def record_sighting(self, word: str) -> int:
+        with self._lock:
+            n = self._counts[word] = self._counts.get(word, 0) + 1
+        self._progress_writer.mark_dirty()
+        return n
+
+    def touch_recent(self, word: str) -> None:
+        with self._lock:
+            self._recent.touch(word)
+        self._progress_writer.mark_dirty()
+
+    def recent(self, limit: int = RECENT_LIMIT, since: float = None) -> list:
+        """[{"word", "timestamp"}] newest first, last seen at or after `since` if given."""
+        with self._lock:
+            return self._recent.latest(limit, since)
+
+    def top_recent(self, limit: int = RECENT_LIMIT, since: float = None) -> list:
+        """[{"word", "count", "timestamp"}] most sighted first, at or after `since` if given."""
+        with self._lock:
+            return self._recent.top(limit, since)
+
+    def enroll(self, words, now: float = None) -> int:
+        """Put the words not yet under review up for review now; how many were new."""
+        with self._lock:
+            return self._reviews.enroll(words, time.time() if now is None else now)
+
+    def review(self, word: str, grade: str, now: float = None) -> dict:
+        """The card of `word` after answering `grade` (see review_schedule.schedule)."""
+        with self._lock:
+            return self._reviews.review(word, grade, time.time() if now is None else now)
+
+    def due_reviews(self, limit: int = REVIEW_LIMIT, now: float = None) -> list:
+        """[{"word", "due", "interval", "ease", "reps", "lapses"}] due by `now`, longest overdue first."""
+        with self._lock:
+            due = self._reviews.due(limit, time.time() if now is None else now)
+        return [{"word": w, **card} for w, card in due]
+
+    def close(self) -> None:
+        for writer in self._writers:
+            writer.close()
+
+    def stats(self) -> dict:
+        # ReviewQueue isn't locked, and finding the next due card drops stale heap entries
+        with self._lock:
+            reviews = self._reviews.stats()
+        return {
+            "backend": self.backend,
+            "user": self.user,
+            "scope": self.scope,
+            **self.counts(),
+            "recent": self._recent.stats(),
+            "reviews": reviews,
+            "writers": [w.stats() for w in self._writers],
+        }
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS known (scope TEXT NOT NULL, word TEXT NOT NULL, PRIMARY KEY (scope, word)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS unknown (scope TEXT NOT NULL, word TEXT NOT NULL, PRIMARY KEY (scope, word)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sightings (scope TEXT NOT NULL, word TEXT NOT NULL, n INTEGER NOT NULL, PRIMARY KEY (scope, word)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS recent (scope TEXT NOT NULL, word TEXT NOT NULL, ts REAL NOT NULL, PRIMARY KEY (scope, word)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS recent_by_time ON recent (scope, ts);
+CREATE TABLE IF NOT EXISTS recent_sightings (scope TEXT NOT NULL, ts REAL NOT NULL, word TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS recent_sightings_by_time ON recent_sightings (scope, ts);
+CREATE TABLE IF NOT EXISTS reviews (scope TEXT NOT NULL, word TEXT NOT NULL, due REAL NOT NULL,
+    interval REAL NOT NULL, ease REAL NOT NULL, reps INTEGER NOT NULL, lapses INTEGER NOT NULL,
+    PRIMARY KEY (scope, word)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS reviews_by_due ON reviews (scope, due);
+"""
+
+# recent and recent_sightings are cut back to RECENT_DEPTH and
+# RECENT_HISTORY rows per scope on every this-many-th sighting rather than
+# each one, so they may run that far over
+_TRIM_EVERY = 64
+
+# List sizes per scope, kept by triggers on every insert and delete so
+# counting is one row read rather than a scan and a union of both lists
+_COUNTS_SCHEMA = """
+CREATE TABLE list_counts (scope TEXT PRIMARY KEY, known INTEGER NOT NULL DEFAULT 0,
+    unknown INTEGER NOT NULL DEFAULT 0, total INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID;
+INSERT INTO list_counts
+    SELECT scope, SUM(k), SUM(u), COUNT(*) FROM (
+        SELECT scope, word, MAX(k) AS k, MAX(u) AS u FROM (
+            SELECT scope, word, 1 AS k, 0 AS u FROM known
+            UNION ALL SELECT scope, word, 0, 1 FROM unknown)
+        GROUP BY scope, word)
+    GROUP BY scope;
+CREATE TRIGGER known_added AFTER INSERT ON known BEGIN
+    INSERT INTO list_counts (scope, known, total)
+        VALUES (NEW.scope, 1, NOT EXISTS (SELECT 1 FROM unknown WHERE scope = NEW.scope AND word = NEW.word))
+        ON CONFLICT (scope) DO UPDATE SET known = known + 1, total = total + excluded.total;
+END;
+CREATE TRIGGER unknown_added AFTER INSERT ON unknown BEGIN
+    INSERT INTO list_counts (scope, unknown, total)
+        VALUES (NEW.scope, 1, NOT EXISTS (SELECT 1 FROM known WHERE scope = NEW.scope AND word = NEW.word))
+        ON CONFLICT (scope) DO UPDATE SET unknown = unknown + 1, total = total + excluded.total;
+END;
+CREATE TRIGGER known_removed AFTER DELETE ON known BEGIN
+    UPDATE list_counts SET known = known - 1,
+        total = total - NOT EXISTS (SELECT 1 FROM unknown WHERE scope = OLD.scope AND word = OLD.word)
+        WHERE scope = OLD.scope;
+END;
+CREATE TRIGGER unknown_removed AFTER DELETE ON unknown BEGIN
+    UPDATE list_counts SET unknown = unknown - 1,
+        total = total - NOT EXISTS (SELECT 1 FROM known WHERE scope = OLD.scope AND word = OLD.word)
+        WHERE scope = OLD.scope;
+END;
+"""
+
+
+# One connection per (thread, database) shared by every user's state object
+_local = threading.local()
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conns[db_path] = conn
+    with _schema_lock:
+        if db_path not in _schema_ready:
+            conn.executescript(_SCHEMA)
+            _add_list_counts(conn)
+            _schema_ready.add(db_path)
+    return conn
+
+
+def _add_list_counts(conn: sqlite3.Connection) -> None:
+    # Databases from before list_counts get it filled in from their rows,
+    # in one transaction so no other worker's writes slip in between
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'list_counts'").fetchone()
+        if not exists:
+            statement = ""
+            for line in _COUNTS_SCHEMA.splitlines(keepends=True):
+                statement += line
+                if sqlite3.complete_statement(statement):
+                    conn.execute(statement)
+                    statement = ""
+
+
+class SQLiteState:
+    """
+    Learner state in a SQLite database in WAL mode, shared by every worker
+    process on the host. Each statement is its own small transaction, so
+    concurrent workers see one consistent known list, counter, recent
+    list and review queue (read in due order off an index) instead of
+    overwriting each other's JSON files. Every row carries
+    its user and language pair, so a write only ever touches that user's rows.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, scope: str = "", user: str = "", db_path: Path = None):
+        self.scope = scope
+        self.user = user
+        self.db_path = Path(db_path or STATE_DB_PATH)
+        # Rows of the shared learner keep the bare language pair as key
+        self._key = f"{user}:{scope}" if user else scope
+        empty = self._conn().execute(
+            "SELECT NOT EXISTS (SELECT 1 FROM known WHERE scope = ?)"
+            " AND NOT EXISTS (SELECT 1 FROM unknown WHERE scope = ?)",
+            (self._key, self._key),
+        ).fetchone()[0]
+        if empty and not user:
+            self._import_json()
+
+    def _conn(self) -> sqlite3.Connection:
+        return _connect(self.db_path)
+
+    def _import_json(self) -> None:
+        # First start on this scope: seed it from the JSON files
+        known_path, unknown_path, _, review_path = _state_paths(self.user, self.scope)
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR IGNORE INTO known VALUES (?, ?)",
+                             [(self._key, w) for w in _load_json(known_path, [])])
+            conn.executemany("INSERT OR IGNORE INTO unknown VALUES (?, ?)",
+                             [(self._key, w) for w in _load_json(unknown_path, [])])
+            conn.executemany("INSERT OR IGNORE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [(self._key, w, *self._review_row(c)) for w, c in ReviewLog(review_path).load().items()])
+
+    def is_known(self, word: str) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM known WHERE scope = ? AND word = ?", (self._key, word)
+        ).fetchone()
+        return row is not None
+
+    def known_words(self) -> list:
+        rows = self._conn().execute("SELECT word FROM known WHERE scope = ? ORDER BY word", (self._key,))
+        return [r[0] for r in rows]
+
+    def unknown_words(self) -> list:
+        rows = self._conn().execute("SELECT word FROM unknown WHERE scope = ? ORDER BY word", (self._key,))
+        return [r[0] for r in rows]
+
+    def page(self, which: str, cursor: str = None, limit: int = PAGE_SIZE, prefix: str = "",
+             contains: str = "", reverse: bool = False):
+        """A page of the "known" or "unknown" list, read off the (scope, word) primary key."""
+        table = "known" if which == "known" else "unknown"
+        sql = f"SELECT word FROM {table} WHERE scope = ?"
+        args = [self._key]
+        if prefix:
+            sql += " AND word >= ? AND word < ?"
+            args += [prefix, prefix + "\U0010ffff"]
+        if cursor is not None:
+            sql += " AND word < ?" if reverse else " AND word > ?"
+            args.append(cursor)
+        if contains:
+            sql += " AND instr(word, ?) > 0"
+            args.append(contains)
+        sql += f" ORDER BY word {'DESC' if reverse else 'ASC'} LIMIT ?"
+        args.append(limit + 1)
+        words = [r[0] for r in self._conn().execute(sql, args)]
+        if len(words) > limit:
+            words = words[:limit]
+            return words, words[-1]
+        return words, None
+
+    def counts(self) -> dict:
+        row = self._conn().execute(
+            "SELECT known, unknown, total FROM list_counts WHERE scope = ?", (self._key,)
+        ).fetchone()
+        known, unknown, total = row or (0, 0, 0)
+        return {"known": known, "unknown": unknown, "total": total}
+
+    def add_known(self, word: str) -> bool:
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute("INSERT OR IGNORE INTO known VALUES (?, ?)", (self._key, word))
+            conn.execute("DELETE FROM reviews WHERE scope = ? AND word = ?", (self._key, word))
+        return cur.rowcount > 0
+
+    def add_unknown(self, word: str) -> bool:
+        cur = self._conn().execute("INSERT OR IGNORE INTO unknown VALUES (?, ?)", (self._key, word))
+        return cur.rowcount > 0
+
+    def move(self, word: str, to_known: bool) -> None:
+        """Put `word` in one list and take it out of the other."""
+        src, dst = ("unknown", "known") if to_known else ("known", "unknown")
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"DELETE FROM {src} WHERE scope = ? AND word = ?", (self._key, word))
+            conn.execute(f"INSERT OR IGNORE INTO {dst} VALUES (?, ?)", (self._key, word))
+            if to_known:
+                conn.execute("DELETE FROM reviews WHERE scope = ? AND word = ?", (self._key, word))
+
+    def record_sighting(self, word: str) -> int:
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO sightings VALUES (?, ?, 1)"
+                " ON CONFLICT (scope, word) DO UPDATE SET n = n + 1",
+                (self._key, word),
+            )
+            return conn.execute(
+                "SELECT n FROM sightings WHERE scope = ? AND word = ?", (self._key, word)
+            ).fetchone()[0]
+
+    def touch_recent(self, word: str) -> None:
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR REPLACE INTO recent VALUES (?, ?, ?)", (self._key, word, now))
+            cur = conn.execute("INSERT INTO recent_sightings VALUES (?, ?, ?)", (self._key, now, word))
+            if cur.lastrowid % _TRIM_EVERY == 0:
+                # Everything older than the depth-th newest row, found on the (scope, ts) index
+                for table, keep in (("recent", RECENT_DEPTH), ("recent_sightings", RECENT_HISTORY)):
+                    conn.execute(
+                        f"DELETE FROM {table} WHERE scope = ? AND ts <"
+                        f" (SELECT ts FROM {table} WHERE scope = ? ORDER BY ts DESC LIMIT 1 OFFSET ?)",
+                        (self._key, self._key, keep - 1),
+                    )
+
+    def recent(self, limit: int = RECENT_LIMIT, since: float = None) -> list:
+        """[{"word", "timestamp"}] newest first, last seen at or after `since` if given."""
+        rows = self._conn().execute(
+            "SELECT word, ts FROM recent WHERE scope = ? AND ts >= ? ORDER BY ts DESC LIMIT ?",
+            (self._key, since or 0, limit),
+        )
+        return [{"word": w, "timestamp": ts} for w, ts in rows]
+
+    def top_recent(self, limit: int = RECENT_LIMIT, since: float = None) -> list:
+        """[{"word", "count", "timestamp"}] most sighted first, at or after `since` if given."""
+        rows = self._conn().execute(
+            "SELECT word, COUNT(*) AS n, MAX(ts) AS last FROM recent_sightings"
+            " WHERE scope = ? AND ts >= ? GROUP BY word ORDER BY n DESC, last DESC LIMIT ?",
+            (self._key, since or 0, limit),
+        )
+        return [{"word": w, "count": n, "timestamp": ts} for w, n, ts in rows]
+
+    @staticmethod
+    def _review_row(card: dict) -> tuple:
+        return card["due"], card["interval"], card["ease"], card["reps"], card["lapses"]
+
+    def enroll(self, words, now: float = None) -> int:
+        """Put the words not yet under review up for review now; how many were new."""
+        card = self._review_row(new_card(time.time() if now is None else now))
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [(self._key, w, *card) for w in dict.fromkeys(words)])
+            return conn.total_changes - before
+
+    def review(self, word: str, grade: str, now: float = None) -> dict:
+        """The card of `word` after answering `grade` (see review_schedule.schedule)."""
+        now = time.time() if now is None else now
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT due, interval, ease, reps, lapses FROM reviews WHERE scope = ? AND word = ?",
+                (self._key, word),
+            ).fetchone()
+            old = dict(zip(("due", "interval", "ease", "reps", "lapses"), row)) if row else new_card(now)
+            card = schedule(old, grade, now)
+            conn.execute("INSERT OR REPLACE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (self._key, word, *self._review_row(card)))
+        return card
+
+    def due_reviews(self, limit: int = REVIEW_LIMIT, now: float = None) -> list:
+        """[{"word", "due", "interval", "ease", "reps", "lapses"}] due by `now`, longest overdue first."""
+        rows = self._conn().execute(
+            "SELECT word, due, interval, ease, reps, lapses FROM reviews"
+            " WHERE scope = ? AND due <= ? ORDER BY due LIMIT ?",
+            (self._key, time.time() if now is None else now, limit),
+        )
+        return [{"word": w, "due": due, "interval": i, "ease": e, "reps": r, "lapses": n}
+                for w, due, i, e, r, n in rows]
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, "user": self.user, "scope": self.scope, "db": str(self.db_path), **self.counts()}
+
+
+def open_state(scope: str = "", user: str = ""):
+    """Learner state of `user` for `scope` from the backend picked by VOCAB_STATE_BACKEND."""
+    if STATE_BACKEND == "sqlite":
+        return SQLiteState(scope, user)
+    if STATE_BACKEND == "memory":
+        return InProcessState(scope, user)
+    raise ValueError(f"Unknown VOCAB_STATE_BACKEND: {STATE_BACKEND!r}")
+
+
+class StateRegistry:
+    """
+    Working set of learner states, keyed by (user, scope).
+
+    A state is opened on its user's first request and kept while the user
+    is active; past `max_resident` entries the least recently used one is
+    closed (its pending writes flushed) and dropped, so memory stays bounded
+    however many users exist. A dropped user is reloaded from disk on their
+    next request, unless the dropped state is still alive (a request still
+    holds it, or it has writes pending): that one is taken back instead, so
+    two objects never write the same files.
+
+    States are loaded outside the registry lock, so one user's load never
+    holds up the others' requests; concurrent requests for a state being
+    loaded wait on the same load.
+    """
+
+    def __init__(self, max_resident: int = MAX_RESIDENT_USERS):
+        self.max_resident = max_resident
+        self._states = OrderedDict()
+        self._evicted = weakref.WeakValueDictionary()
+        self._loading = {}  # key -> Future of the state being loaded
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+        self.revivals = 0
+
+    def get(self, user: str = "", scope: str = ""):
+        if not valid_user_id(user):
+            raise ValueError(f"Invalid user id: {user!r}")
+        key = (user, scope)
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None:
+                self._states.move_to_end(key)
+                return state
+            state = self._evicted.pop(key, None)
+            if state is not None:
+                self.revivals += 1
+                evicted = self._admit(key, state)
+            else:
+                loading = self._loading.get(key)
+                first = loading is None
+                if first:
+                    loading = self._loading[key] = Future()
+        if state is None:
+            if not first:
+                return loading.result()
+            try:
+                state = open_state(scope, user)
+            except BaseException as e:
+                with self._lock:
+                    del self._loading[key]
+                loading.set_exception(e)
+                raise
+            with self._lock:
+                del self._loading[key]
+                self.loads += 1
+                evicted = self._admit(key, state)
+            loading.set_result(state)
+        # Flushing takes disk writes; other users' requests don't wait for them
+        for old in evicted:
+            old.close()
+        return state
+
+    def _admit(self, key, state) -> list:
+        # Called with the lock held: make `state` resident; returns the
+        # states it pushed out, to be closed once the lock is released
+        self._states[key] = state
+        evicted = []
+        while len(self._states) > self.max_resident:
+            old_key, old = self._states.popitem(last=False)
+            self._evicted[old_key] = old
+            evicted.append(old)
+            self.evictions += 1
+        return evicted
+
+    def resident(self) -> list:
+        with self._lock:
+            return list(self._states.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": STATE_BACKEND,
+                "resident": len(self._states),
+                "max_resident": self.max_resident,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "revivals": self.revivals,
+            }
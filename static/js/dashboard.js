@@ -6,146 +6,160 @@ const btnCache = document.getElementById("btnCache");
 
 let currentList = "known"; // known, unknown, total, cache
 
+// Lists are fetched a page at a time; `next` is the cursor of the page after
+const PAGE_SIZE = 100;
+const listTools = document.getElementById("listTools");
+const searchInput = document.getElementById("searchInput");
+const searchMode = document.getElementById("searchMode");
+const sortOrder = document.getElementById("sortOrder");
+const LISTS = {
+    known: { url: "/dashboard/api/words/known", label: "known" },
+    unknown: { url: "/dashboard/api/words/unknown", label: "unknown" },
+    cache: { url: "/dashboard/api/cache/words", label: "cached" },
+};
+
 // Modal related
 const wordModal = new bootstrap.Modal(document.getElementById("wordModal"));
 const modalWordInput = document.getElementById("modalWord");
 const modalHindiInput = document.getElementById("modalHindi");
+const modalPosInput = document.getElementById("modalPos");
 const modalDescriptionInput = document.getElementById("modalDescription");
 const modalExamplesInput = document.getElementById("modalExamples");
+const modalSensesBtn = document.getElementById("modalSensesBtn");
+const modalSenses = document.getElementById("modalSenses");
+
+function pageUrl(list, cursor) {
+    const params = new URLSearchParams({ limit: PAGE_SIZE, sort: sortOrder.value });
+    const search = searchInput.value.trim();
+    if (search) params.set(searchMode.value, search);
+    if (cursor) params.set("cursor", cursor);
+    return `${LISTS[list].url}?${params}`;
+}
 
-// Fetch & display Known words list
-async function loadKnownWords() {
-    currentList = "known";
-    contentArea.innerHTML = "<p>Loading known words...</p>";
-    const res = await fetch("/dashboard/api/words/known");
+// Fetch & display the first page of a list; "Load more" fetches the next
+async function loadList(list) {
+    currentList = list;
+    listTools.hidden = false;
+    contentArea.innerHTML = `<p>Loading ${LISTS[list].label} words...</p>`;
+    const res = await fetch(pageUrl(list));
     const data = await res.json();
-    renderWordList(data.words, true);
+    if (currentList !== list) return;
+    if (data.words.length === 0) {
+        contentArea.innerHTML = `<p>No ${LISTS[list].label} words found.</p>`;
+        return;
+    }
+    const listGroup = document.createElement("div");
+    listGroup.className = "list-group";
+    contentArea.innerHTML = "";
+    contentArea.appendChild(listGroup);
+    appendPage(list, listGroup, data);
 }
 
-// Fetch & display Unknown words list
-async function loadUnknownWords() {
-    currentList = "unknown";
-    contentArea.innerHTML = "<p>Loading unknown words...</p>";
-    const res = await fetch("/dashboard/api/words/unknown");
-    const data = await res.json();
-    renderWordList(data.words, false);
+function appendPage(list, listGroup, data) {
+    data.words.forEach((word) => {
+        listGroup.appendChild(list === "cache" ? cacheItem(word) : wordItem(word, list === "known"));
+    });
+    if (!data.next) return;
+    const more = document.createElement("button");
+    more.className = "btn btn-outline-secondary mt-3";
+    more.textContent = "Load more";
+    more.addEventListener("click", async () => {
+        more.disabled = true;
+        const res = await fetch(pageUrl(list, data.next));
+        const page = await res.json();
+        more.remove();
+        if (currentList === list) appendPage(list, listGroup, page);
+    });
+    contentArea.appendChild(more);
 }
 
+const loadKnownWords = () => loadList("known");
+const loadUnknownWords = () => loadList("unknown");
+const loadCachedWords = () => loadList("cache");
+
 // Fetch & display total words count
 async function loadTotalWords() {
     currentList = "total";
+    listTools.hidden = true;
     contentArea.innerHTML = "<p>Loading total words count...</p>";
-    const res = await fetch("/dashboard/api/words/total");
+    const res = await fetch("/dashboard/api/stats");
     const data = await res.json();
     contentArea.innerHTML = `<h3>Total Unique Words: ${data.total}</h3>`;
 }
 
-// Fetch & display cached words list
-async function loadCachedWords() {
-    currentList = "cache";
-    contentArea.innerHTML = "<p>Loading cached words...</p>";
-    const res = await fetch("/dashboard/api/cache/words");
-    const data = await res.json();
-    renderCacheList(data.words);
+// A Known or Unknown word with action buttons
+function wordItem(word, isKnown) {
+    const item = document.createElement("div");
+    item.className =
+        "list-group-item d-flex justify-content-between align-items-center";
+
+    const wordSpan = document.createElement("span");
+    wordSpan.textContent = word;
+    item.appendChild(wordSpan);
+
+    const btnGroup = document.createElement("div");
+    btnGroup.className = "btn-group btn-group-sm";
+
+    // View Meaning button
+    const viewBtn = document.createElement("button");
+    viewBtn.className = "btn btn-info";
+    viewBtn.textContent = "View Meaning";
+    viewBtn.addEventListener("click", () => openWordModal(word, false));
+    btnGroup.appendChild(viewBtn);
+
+    // Edit button
+    const editBtn = document.createElement("button");
+    editBtn.className = "btn btn-warning";
+    editBtn.textContent = "Edit";
+    editBtn.addEventListener("click", () => openWordModal(word, true));
+    btnGroup.appendChild(editBtn);
+
+    // Move button (Known ↔ Unknown)
+    const moveBtn = document.createElement("button");
+    moveBtn.className = isKnown ? "btn btn-danger" : "btn btn-success";
+    moveBtn.textContent = isKnown ? "Move to Unknown" : "Move to Known";
+    moveBtn.addEventListener("click", () => moveWord(word, !isKnown));
+    btnGroup.appendChild(moveBtn);
+
+    item.appendChild(btnGroup);
+    return item;
 }
 
-// Render Known or Unknown word list with action buttons
-function renderWordList(words, isKnown) {
-    if (words.length === 0) {
-        contentArea.innerHTML = `<p>No ${isKnown ? "known" : "unknown"} words found.</p>`;
-        return;
-    }
-    const listGroup = document.createElement("div");
-    listGroup.className = "list-group";
-
-    words.forEach((word) => {
-        const item = document.createElement("div");
-        item.className =
-            "list-group-item d-flex justify-content-between align-items-center";
-
-        const wordSpan = document.createElement("span");
-        wordSpan.textContent = word;
-        item.appendChild(wordSpan);
-
-        const btnGroup = document.createElement("div");
-        btnGroup.className = "btn-group btn-group-sm";
-
-        // View Meaning button
-        const viewBtn = document.createElement("button");
-        viewBtn.className = "btn btn-info";
-        viewBtn.textContent = "View Meaning";
-        viewBtn.addEventListener("click", () => openWordModal(word, false));
-        btnGroup.appendChild(viewBtn);
-
-        // Edit button
-        const editBtn = document.createElement("button");
-        editBtn.className = "btn btn-warning";
-        editBtn.textContent = "Edit";
-        editBtn.addEventListener("click", () => openWordModal(word, true));
-        btnGroup.appendChild(editBtn);
-
-        // Move button (Known ↔ Unknown)
-        const moveBtn = document.createElement("button");
-        moveBtn.className = isKnown ? "btn btn-danger" : "btn btn-success";
-        moveBtn.textContent = isKnown ? "Move to Unknown" : "Move to Known";
-        moveBtn.addEventListener("click", () => moveWord(word, !isKnown));
-        btnGroup.appendChild(moveBtn);
-
-        item.appendChild(btnGroup);
-        listGroup.appendChild(item);
-    });
-
-    contentArea.innerHTML = "";
-    contentArea.appendChild(listGroup);
-}
-
-// Render cached words with View/Edit/Delete buttons
-function renderCacheList(words) {
-    if (words.length === 0) {
-        contentArea.innerHTML = "<p>No cached words found.</p>";
-        return;
-    }
-    const listGroup = document.createElement("div");
-    listGroup.className = "list-group";
-
-    words.forEach((word) => {
-        const item = document.createElement("div");
-        item.className = "list-group-item d-flex justify-content-between align-items-center";
-
-        const wordSpan = document.createElement("span");
-        wordSpan.textContent = word;
-        item.appendChild(wordSpan);
-
-        const btnGroup = document.createElement("div");
-        btnGroup.className = "btn-group btn-group-sm";
-
-        // View button
-        const viewBtn = document.createElement("button");
-        viewBtn.className = "btn btn-info";
-        viewBtn.textContent = "View";
-        viewBtn.addEventListener("click", () => openWordModal(word, false));
-        btnGroup.appendChild(viewBtn);
-
-        // Edit button
-        const editBtn = document.createElement("button");
-        editBtn.className = "btn btn-warning";
-        editBtn.textContent = "Edit";
-        editBtn.addEventListener("click", () => openWordModal(word, true));
-        btnGroup.appendChild(editBtn);
-
-        // Delete button
-        const delBtn = document.createElement("button");
-        delBtn.className = "btn btn-danger";
-        delBtn.textContent = "Delete";
-        delBtn.addEventListener("click", () => deleteCachedWord(word));
-        btnGroup.appendChild(delBtn);
-
-        item.appendChild(btnGroup);
-        listGroup.appendChild(item);
-    });
-
-    contentArea.innerHTML = "";
-    contentArea.appendChild(listGroup);
+// A cached word with View/Edit/Delete buttons
+function cacheItem(word) {
+    const item = document.createElement("div");
+    item.className = "list-group-item d-flex justify-content-between align-items-center";
+
+    const wordSpan = document.createElement("span");
+    wordSpan.textContent = word;
+    item.appendChild(wordSpan);
+
+    const btnGroup = document.createElement("div");
+    btnGroup.className = "btn-group btn-group-sm";
+
+    // View button
+    const viewBtn = document.createElement("button");
+    viewBtn.className = "btn btn-info";
+    viewBtn.textContent = "View";
+    viewBtn.addEventListener("click", () => openWordModal(word, false));
+    btnGroup.appendChild(viewBtn);
+
+    // Edit button
+    const editBtn = document.createElement("button");
+    editBtn.className = "btn btn-warning";
+    editBtn.textContent = "Edit";
+    editBtn.addEventListener("click", () => openWordModal(word, true));
+    btnGroup.appendChild(editBtn);
+
+    // Delete button
+    const delBtn = document.createElement("button");
+    delBtn.className = "btn btn-danger";
+    delBtn.textContent = "Delete";
+    delBtn.addEventListener("click", () => deleteCachedWord(word));
+    btnGroup.appendChild(delBtn);
+
+    item.appendChild(btnGroup);
+    return item;
 }
 
 async function openWordModal(word, editable = false) {
@@ -158,21 +172,52 @@ async function openWordModal(word, editable = false) {
 
     modalWordInput.value = data.word;
     modalHindiInput.value = data.info.hindi || "";
+    modalPosInput.value = data.info.pos || "";
     modalDescriptionInput.value = data.info.description || "";
     modalExamplesInput.value = (data.info.examples || []).join("\n");
 
     modalHindiInput.disabled = !editable;
+    modalPosInput.disabled = !editable;
     modalDescriptionInput.disabled = !editable;
     modalExamplesInput.disabled = !editable;
 
+    // The other senses are only fetched if asked for; null means not yet known
+    const senses = data.info.senses;
+    modalSenses.replaceChildren();
+    modalSensesBtn.classList.toggle("d-none", senses !== null && senses <= 1);
+    modalSensesBtn.textContent = senses ? `Show all ${senses} senses` : "Show all senses";
+
     wordModal.show();
 }
 
+modalSensesBtn.addEventListener("click", async () => {
+    const word = modalWordInput.value;
+    const res = await fetch(`/dashboard/api/word/senses?word=${encodeURIComponent(word)}`);
+    if (!res.ok) return;
+    const data = await res.json();
+    modalSenses.replaceChildren(
+        ...data.senses.map((sense) => {
+            const li = document.createElement("li");
+            const pos = sense.pos ? `(${sense.pos}) ` : "";
+            li.textContent = pos + sense.definition;
+            for (const ex of sense.examples) {
+                const p = document.createElement("div");
+                p.className = "text-muted fst-italic";
+                p.textContent = `“${ex}”`;
+                li.appendChild(p);
+            }
+            return li;
+        })
+    );
+    modalSensesBtn.classList.add("d-none");
+});
+
 document.getElementById("editForm").addEventListener("submit", async (e) => {
     e.preventDefault();
     const word = modalWordInput.value;
     const info = {
         hindi: modalHindiInput.value,
+        pos: modalPosInput.value,
         description: modalDescriptionInput.value,
         examples: modalExamplesInput.value.split("\n").filter((ex) => ex.trim()),
     };
@@ -227,27 +272,30 @@ async function deleteCachedWord(word) {
     }
 }
 
+function renderCounts(counts) {
+    btnKnown.textContent = `Known Words (${counts.known})`;
+    btnUnknown.textContent = `Unknown Words (${counts.unknown})`;
+    btnTotal.textContent = `Total Words (${counts.total})`;
+    btnCache.textContent = `Cached Words (${counts.cached})`;
+}
+
+// Counts are pushed by the server on connect and whenever they change.
+// Pushes come only from the worker holding the event stream, so they are
+// also fetched every COUNTS_POLL_MS to catch changes made through others
+const COUNTS_POLL_MS = 30000;
+
+function watchCounts() {
+    updateButtonCounts();
+    setInterval(updateButtonCounts, COUNTS_POLL_MS);
+    if (!window.EventSource) return;
+    const events = new EventSource("/dashboard/api/events");
+    events.addEventListener("counts", (e) => renderCounts(JSON.parse(e.data)));
+}
+
 async function updateButtonCounts() {
     try {
-        // Known words count
-        const resKnown = await fetch("/dashboard/api/words/known");
-        const knownData = await resKnown.json();
-        btnKnown.textContent = `Known Words (${knownData.words.length})`;
-
-        // Unknown words count
-        const resUnknown = await fetch("/dashboard/api/words/unknown");
-        const unknownData = await resUnknown.json();
-        btnUnknown.textContent = `Unknown Words (${unknownData.words.length})`;
-
-        // Total words count
-        const resTotal = await fetch("/dashboard/api/words/total");
-        const totalData = await resTotal.json();
-        btnTotal.textContent = `Total Words (${totalData.total})`;
-
-        // Cached words count
-        const resCache = await fetch("/dashboard/api/cache/words");
-        const cacheData = await resCache.json();
-        btnCache.textContent = `Cached Words (${cacheData.words.length})`;
+        const res = await fetch("/dashboard/api/stats");
+        renderCounts(await res.json());
     } catch (error) {
         console.error("Error updating button counts:", error);
     }
@@ -259,6 +307,51 @@ btnUnknown.addEventListener("click", loadUnknownWords);
 btnTotal.addEventListener("click", loadTotalWords);
 btnCache.addEventListener("click", loadCachedWords);
 
+// Searching and re-sorting start the current list over from its first page
+let searchTimer;
+searchInput.addEventListener("input", () => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => { if (LISTS[currentList]) loadList(currentList); }, 250);
+});
+[searchMode, sortOrder].forEach((el) =>
+    el.addEventListener("change", () => { if (LISTS[currentList]) loadList(currentList); }));
+
+// Look-up box: suggestions from the cache as you type, Enter opens the word
+const lookupInput = document.getElementById("lookupInput");
+const lookupSuggestions = document.getElementById("lookupSuggestions");
+let lookupTimer;
+let suggested = [];
+
+async function suggestWords() {
+    const query = lookupInput.value.trim().toLowerCase();
+    if (!query) {
+        lookupSuggestions.innerHTML = "";
+        return;
+    }
+    const res = await fetch(`/dashboard/api/word/search?q=${encodeURIComponent(query)}`);
+    const data = await res.json();
+    if (data.query !== lookupInput.value.trim().toLowerCase()) return;
+    suggested = data.suggestions.map((s) => s.word);
+    lookupSuggestions.innerHTML = "";
+    data.suggestions.forEach((s) => {
+        const option = document.createElement("option");
+        option.value = s.word;
+        if (s.match === "fuzzy") option.label = `${s.word} (did you mean?)`;
+        lookupSuggestions.appendChild(option);
+    });
+}
+
+lookupInput.addEventListener("input", () => {
+    clearTimeout(lookupTimer);
+    lookupTimer = setTimeout(suggestWords, 100);
+});
+document.getElementById("lookupForm").addEventListener("submit", (e) => {
+    e.preventDefault();
+    const query = lookupInput.value.trim().toLowerCase();
+    const word = suggested.includes(query) ? query : suggested[0];
+    if (word) openWordModal(word, true);
+});
+
 // Load known words by default on page load
 loadKnownWords();
-updateButtonCounts();
\ No newline at end of file
+watchCounts();
\ No newline at end of file
@@ -8,13 +8,13 @@ document.addEventListener("DOMContentLoaded", () => {
 
     let recognition;
     let listening = false;
+    // Identifies this page's own detections when they come back over the event stream
+    const clientId = Math.random().toString(36).slice(2);
+    let events = null;
+    let recentItems = [];
     const SpeechRec = window.SpeechRecognition || window.webkitSpeechRecognition;
-    if (!SpeechRec) {
-        alert("Web Speech API not supported (use Chrome or Edge).");
-        btnToggle.disabled = true;
-        return;
-    }
-    recognition = new SpeechRec();
+    // Without the Web Speech API the microphone's audio is recognized on the server
+    recognition = SpeechRec ? new SpeechRec() : serverRecognition();
     recognition.continuous = true;
     recognition.interimResults = true;
 
@@ -33,12 +33,21 @@ document.addEventListener("DOMContentLoaded", () => {
         transcriptEl.textContent = "";
         unknownEl.innerHTML = '<li class="list-group-item">No unknown words yet.</li>';
         recentEl.innerHTML = '<li class="list-group-item">No recent words yet.</li>';
+        connectEvents();
     });
     targetLangSelect.addEventListener("change", () => {
         unknownEl.innerHTML = '<li class="list-group-item">No unknown words yet.</li>';
         recentEl.innerHTML = '<li class="list-group-item">No recent words yet.</li>';
+        connectEvents();
     });
 
+    function langPair() {
+        return {
+            source_lang: sourceLangSelect.value.split("-")[0],
+            target_lang: targetLangSelect.value.split("-")[0],
+        };
+    }
+
     recognition.onresult = async (evt) => {
         let interim = "";
         let finalText = "";
@@ -57,7 +66,8 @@ document.addEventListener("DOMContentLoaded", () => {
 
         if (finalText.trim()) {
             await sendForDetection(finalText);
-            fetchRecentWords();
+            // Without a push channel, fall back to polling the recent list
+            if (!events) fetchRecentWords();
         }
     };
 
@@ -97,12 +107,101 @@ document.addEventListener("DOMContentLoaded", () => {
         listening ? stopListening() : startListening();
     });
 
+    // Same start/stop/lang/onerror as the Web Speech API, but the audio is
+    // posted to /api/vocab/listen as 16 kHz PCM every CHUNK_MS, and each reply
+    // brings the recognized text and its unknown words at once
+    function serverRecognition() {
+        const RATE = 16000;
+        const CHUNK_MS = 500;
+        const rec = { lang: "en-US", onerror: null, onend: null };
+        let audio = null;
+        let streamId = null;
+        let buffered = [];
+        let sending = Promise.resolve();
+        let timer = null;
+
+        function takeBuffered() {
+            const length = buffered.reduce((n, b) => n + b.length, 0);
+            const pcm = new Int16Array(length);
+            let offset = 0;
+            for (const b of buffered) {
+                pcm.set(b, offset);
+                offset += b.length;
+            }
+            buffered = [];
+            return pcm;
+        }
+
+        function post(id, pcm, final) {
+            // Chunks of one stream must arrive in order, so each waits for the last
+            sending = sending.then(async () => {
+                const res = await fetch(`/api/vocab/listen/${id}${final ? "?final=1" : ""}`, {
+                    method: "POST",
+                    headers: { "Content-Type": "application/octet-stream", "X-Client-Id": clientId },
+                    body: pcm.buffer,
+                });
+                if (!res.ok) throw new Error(res.statusText);
+                const data = await res.json();
+                const text = data.segments.map((s) => s.text).filter(Boolean).join(" ");
+                if (text) {
+                    transcriptEl.textContent += text + " ";
+                    transcriptEl.scrollTop = transcriptEl.scrollHeight;
+                    renderUnknowns(data.unknowns);
+                    if (!events) fetchRecentWords();
+                }
+            }).catch((err) => {
+                if (rec.onerror) rec.onerror(err);
+            });
+            return sending;
+        }
+
+        rec.start = async () => {
+            const params = new URLSearchParams({ ...langPair(), speech_lang: rec.lang, rate: RATE });
+            const res = await fetch(`/api/vocab/listen?${params}`, { method: "POST" });
+            if (!res.ok) {
+                alert("Speech recognition is not available in this browser or on the server.");
+                stopListening();
+                return;
+            }
+            streamId = (await res.json()).stream;
+            const media = await navigator.mediaDevices.getUserMedia({ audio: true });
+            const ctx = new AudioContext();
+            const source = ctx.createMediaStreamSource(media);
+            const processor = ctx.createScriptProcessor(4096, 1, 1);
+            const step = ctx.sampleRate / RATE;
+            processor.onaudioprocess = (e) => {
+                const input = e.inputBuffer.getChannelData(0);
+                const out = new Int16Array(Math.floor(input.length / step));
+                for (let i = 0; i < out.length; i++) {
+                    const v = Math.max(-1, Math.min(1, input[Math.floor(i * step)]));
+                    out[i] = v * 0x7fff;
+                }
+                buffered.push(out);
+            };
+            source.connect(processor);
+            processor.connect(ctx.destination);
+            audio = { media, ctx };
+            timer = setInterval(() => post(streamId, takeBuffered(), false), CHUNK_MS);
+        };
+
+        rec.stop = () => {
+            if (!audio) return;
+            clearInterval(timer);
+            audio.media.getTracks().forEach((t) => t.stop());
+            audio.ctx.close();
+            audio = null;
+            post(streamId, takeBuffered(), true);
+        };
+
+        return rec;
+    }
+
     async function sendForDetection(text) {
         try {
             const res = await fetch("/api/vocab/detect", {
                 method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ text }),
+                headers: { "Content-Type": "application/json", "X-Client-Id": clientId },
+                body: JSON.stringify({ text, ...langPair() }),
             });
             if (!res.ok) throw new Error(res.statusText);
             const data = await res.json();
@@ -156,14 +255,9 @@ document.addEventListener("DOMContentLoaded", () => {
                     const res = await fetch("/api/vocab/learn", {
                         method: "POST",
                         headers: { "Content-Type": "application/json" },
-                        body: JSON.stringify({
-                            word,
-                            source_lang: sourceLangSelect.value.split("-")[0],
-                            target_lang: targetLangSelect.value.split("-")[0]
-                        }),
+                        body: JSON.stringify({ word, ...langPair() }),
                     });
                     if (res.ok) btn.closest("li").remove();
-                    fetchRecentWords();
                 } catch (err) {
                     console.error("Learn API error:", err);
                 }
@@ -171,12 +265,35 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
+    // Server push: a snapshot on connect, then cards, recent-list items and
+    // counts as they change. EventSource reconnects by itself.
+    function connectEvents() {
+        if (!window.EventSource) return;
+        if (events) events.close();
+        events = new EventSource(`/api/vocab/events?${new URLSearchParams(langPair())}`);
+        events.addEventListener("snapshot", (e) => {
+            recentItems = JSON.parse(e.data).recent;
+            renderRecentWords(recentItems);
+        });
+        events.addEventListener("recent", (e) => {
+            const item = JSON.parse(e.data);
+            recentItems = [item, ...recentItems.filter((r) => r.word !== item.word)].slice(0, 10);
+            renderRecentWords(recentItems);
+        });
+        events.addEventListener("unknowns", (e) => {
+            const data = JSON.parse(e.data);
+            // Cards from this page were already rendered from the detect response
+            if (data.client !== clientId) renderUnknowns(data.unknowns);
+        });
+    }
+
     async function fetchRecentWords() {
         try {
-            const res = await fetch("/api/vocab/recent");
+            const res = await fetch(`/api/vocab/recent?${new URLSearchParams(langPair())}`);
             if (!res.ok) throw new Error(res.statusText);
             const data = await res.json();
-            renderRecentWords(data.recent);
+            recentItems = data.recent || [];
+            renderRecentWords(recentItems);
         } catch (err) {
             console.error("Failed to fetch recent words:", err);
         }
@@ -200,24 +317,32 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
+    // Pushes only come from the worker holding this page's event stream, so
+    // the recent list is also fetched now and then to catch changes made
+    // through the others (or, without EventSource, anywhere)
+    const RECENT_POLL_MS = 30000;
+    connectEvents();
     fetchRecentWords();
+    setInterval(fetchRecentWords, RECENT_POLL_MS);
 });
 
 async function playText(text) {
     if (!text) return;
-    try {
-        const res = await fetch("/api/vocab/speak", {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ text }),
-        });
-        if (!res.ok) throw new Error(await res.text());
-        const audioBlob = await res.blob();
-        const audioUrl = URL.createObjectURL(audioBlob);
-        const audio = new Audio(audioUrl);
-        audio.play();
-    } catch (err) {
-        console.error("TTS error:", err);
-        alert("Could not play audio.");
+    // A plain GET, so the browser keeps the clip and revalidates it by ETag
+    const url = "/api/vocab/speak?" + new URLSearchParams({ text });
+    for (let attempt = 0; ; attempt++) {
+        try {
+            await new Audio(url).play();
+            return;
+        } catch (err) {
+            // The server answers 503 while the clip is still rendering
+            if (attempt < 2) {
+                await new Promise((resolve) => setTimeout(resolve, 1000));
+                continue;
+            }
+            console.error("TTS error:", err);
+            alert("Could not play audio.");
+            return;
+        }
     }
 }
@@ -0,0 +1,212 @@
+import os
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+
+# Fold inflected forms onto their base form before lookups ("1" to enable)
+LEMMATIZE = os.environ.get("VOCAB_LEMMATIZE", "") == "1"
+
+# Characters that continue a word without being letters themselves: combining
+# marks (Devanagari vowel signs, viramas, accents) and the zero-width joiners
+# Indic scripts use inside words.
+_JOINERS = "\u200c\u200d"
+
+# Per-language settings. `script` limits words to one script's letters and
+# marks (char class bodies), so e.g. Devanagari in an English text isn't
+# sent to an English dictionary; None accepts letters of any script.
+# `clitics` are suffixes dropped from a token ("teacher's" -> "teacher").
+# Languages not listed use the defaults.
+LANGUAGES = {
+    "en": {
+        "script": ("A-Za-z\u00c0-\u00d6\u00d8-\u00f6\u00f8-\u024f", "\u0300-\u036f"),
+        "clitics": ("'s",),
+    },
+}
+_DEFAULT = {"script": None, "clitics": ()}
+
+# Language codes accepted from requests: ISO 639 with an optional region
+# or script subtag ("en", "hi", "zh-Hant"). They name files and URL path
+# segments, so nothing else gets through.
+_LANG_CODE = re.compile(r"[a-z]{2,3}(-[A-Za-z]{2,4})?")
+
+
+def valid_lang(code) -> bool:
+    return isinstance(code, str) and _LANG_CODE.fullmatch(code) is not None
+
+
+# Irregular English forms -> lemma, used by the English lemmatizer
+_IRREGULAR_EN = {
+    "ran": "run", "went": "go", "gone": "go", "was": "be", "were": "be",
+    "been": "be", "is": "be", "are": "be", "am": "be", "had": "have",
+    "has": "have", "did": "do", "does": "do", "done": "do", "saw": "see",
+    "seen": "see", "took": "take", "taken": "take", "came": "come",
+    "made": "make", "said": "say", "got": "get", "gotten": "get",
+    "knew": "know", "known": "know", "thought": "think", "told": "tell",
+    "found": "find", "gave": "give", "given": "give", "left": "leave",
+    "felt": "feel", "kept": "keep", "began": "begin", "begun": "begin",
+    "wrote": "write", "written": "write", "spoke": "speak", "spoken": "speak",
+    "children": "child", "men": "man", "women": "woman", "people": "person",
+    "feet": "foot", "teeth": "tooth", "mice": "mouse", "better": "good",
+    "best": "good", "worse": "bad", "worst": "bad",
+}
+
+
+def _mark_class() -> str:
+    # Ranges of every combining mark (categories Mn, Mc, Me), as a char class body
+    ranges = []
+    start = prev = None
+    for cp in range(sys.maxunicode + 1):
+        if unicodedata.category(chr(cp))[0] == "M":
+            if prev is not None and cp == prev + 1:
+                prev = cp
+                continue
+            if start is not None:
+                ranges.append((start, prev))
+            start = prev = cp
+    if start is not None:
+        ranges.append((start, prev))
+    return "".join(
+        re.escape(chr(a)) if a == b else f"{re.escape(chr(a))}-{re.escape(chr(b))}"
+        for a, b in ranges
+    )
+
+
+def _word_pattern(letter: str, marks: str, clitics: tuple) -> re.Pattern:
+    # A word starts with a letter and continues with letters and marks; an
+    # apostrophe between letters ("don't", "l'homme") stays inside the word.
+    # A trailing clitic is matched outside the captured group, so findall()
+    # returns the word without it. Runs on lowercased text with ’ -> '.
+    body = f"(?:{letter}|[{marks}])*"
+    clitic = "|".join(re.escape(c[1:]) for c in clitics)
+    if clitic:
+        return re.compile(f"({letter}{body}(?:'(?!(?:{clitic})\\b){letter}{body})*)(?:'(?:{clitic})\\b)?")
+    return re.compile(f"({letter}{body}(?:'{letter}{body})*)")
+
+
+def _classes(lang: str):
+    script = LANGUAGES.get(lang, _DEFAULT)["script"]
+    if script is not None:
+        letters, marks = script
+        return f"[{letters}]", marks
+    return r"[^\W\d_]", _any_script_marks()
+
+
+@lru_cache(maxsize=None)
+def _any_script_marks() -> str:
+    return _mark_class() + _JOINERS
+
+
+@lru_cache(maxsize=None)
+def pattern(lang: str) -> re.Pattern:
+    """Compiled word pattern for `lang`; built once and shared by every caller."""
+    letter, marks = _classes(lang)
+    return _word_pattern(letter, marks, LANGUAGES.get(lang, _DEFAULT)["clitics"])
+
+
+@lru_cache(maxsize=None)
+def _tail_pattern(lang: str) -> re.Pattern:
+    # The run of word characters at the end of a chunk, which may continue
+    # in the next one
+    letter, marks = _classes(lang)
+    return re.compile(f"(?:{letter}|[{marks}'])*\\Z")
+
+
+# How far back from a chunk's end to look for a word cut in two
+_TAIL_WINDOW = 256
+
+
+def _prepare(text: str) -> str:
+    return unicodedata.normalize("NFC", text).replace("’", "'").lower()
+
+
+def iter_words(text, lang: str = "en"):
+    """
+    Yield the normalized words of `text` one at a time, in order.
+
+    `text` is a string or any iterable of string chunks (a socket, a file
+    read piecewise, transcription results); a word split across two chunks
+    is yielded once, whole. Text is NFC-normalized so composed and
+    decomposed spellings give the same word, and lowercased. Each chunk is
+    scanned once, by the compiled pattern.
+    """
+    regex = pattern(lang)
+    if isinstance(text, str):
+        yield from regex.findall(_prepare(text))
+        return
+
+    tail = _tail_pattern(lang)
+    carry = ""
+    for chunk in text:
+        if not chunk:
+            continue
+        buf = carry + _prepare(chunk)
+        # Hold back a word touching the end of the buffer until the next chunk
+        start = max(0, len(buf) - _TAIL_WINDOW)
+        cut = tail.search(buf, start).start()
+        if cut == start and start:
+            cut = tail.search(buf).start()
+        carry = buf[cut:]
+        yield from regex.findall(buf, 0, cut)
+    if carry:
+        yield from regex.findall(carry)
+
+
+def tokenize(text, lang: str = "en") -> list:
+    return list(iter_words(text, lang))
+
+
+# Endings of the stems that take "-es" rather than "-s" in the plural or third person
+_ES_STEMS = ("s", "x", "z", "ch", "sh", "o")
+
+
+class Lemmatizer:
+    """
+    Maps inflected forms to a base form so "runs", "running" and "ran" share
+    one cache entry.
+
+    Only English is handled: irregular forms come from a small table, and
+    suffix rules propose candidates ("running" -> "run", "making" -> "make")
+    that are accepted only if `is_word(candidate)` says the lexicon has them,
+    so a lookup is never sent for a non-word like "mak". Other languages and
+    words with no accepted candidate are returned unchanged.
+    """
+
+    def __init__(self, is_word, lang: str = "en"):
+        self.is_word = is_word
+        self.lang = lang
+
+    def candidates(self, word: str) -> list:
+        out = []
+        if word in _IRREGULAR_EN:
+            out.append(_IRREGULAR_EN[word])
+        for suffix in ("ing", "ed"):
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                base = word[: -len(suffix)]
+                if len(base) >= 2 and base[-1] == base[-2] and base[-1] not in "lsz":
+                    out.append(base[:-1])
+                out.append(base + "e")
+                out.append(base)
+        if word.endswith("ies") and len(word) > 4:
+            out.append(word[:-3] + "y")
+        if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+            out.append(word[:-1])
+        # "-es" only where English adds it: boxes, buzzes, watches, wishes, goes
+        if word.endswith("es") and len(word) > 3 and word[:-2].endswith(_ES_STEMS):
+            out.append(word[:-2])
+        return out
+
+    def __call__(self, word: str) -> str:
+        if self.lang != "en":
+            return word
+        for candidate in self.candidates(word):
+            if candidate != word and self.is_word(candidate):
+                return candidate
+        return word
+
+
+def lemmatizer(is_word, lang: str = "en"):
+    """A Lemmatizer for `lang` if VOCAB_LEMMATIZE is on, else a no-op."""
+    if not LEMMATIZE:
+        return lambda word: word
+    return Lemmatizer(is_word, lang)
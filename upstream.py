@@ -0,0 +1,222 @@
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from urllib.parse import quote, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Upstream endpoints; override with env vars to point at a local stub server
+TRANSLATE_URL = os.environ.get("VOCAB_TRANSLATE_URL", "https://translate.googleapis.com/translate_a/single")
+DICTIONARY_URL = os.environ.get("VOCAB_DICTIONARY_URL", "https://api.dictionaryapi.dev/api/v2/entries")
+
+# Matches the fetch pool (VOCAB_IO_WORKERS) so every I/O thread can keep a connection
+POOL_SIZE = int(os.environ.get("VOCAB_HTTP_POOL_SIZE", "64"))
+TIMEOUT = 5
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.2   # seconds; doubled per attempt, with full jitter
+BACKOFF_MAX = 2.0
+# Circuit breaker: open after this many consecutive failures, probe again after the cooldown
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+# Latency histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS = (25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class NotFoundError(UpstreamError):
+    """The upstream answered, and the thing asked for doesn't exist."""
+
+
+class CircuitOpenError(UpstreamError):
+    """The host has been failing; the call was skipped without touching the network."""
+
+
+class _Breaker:
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < BREAKER_COOLDOWN or self.probing:
+            return False
+        self.probing = True  # half-open: let one request through
+        return True
+
+    def record(self, ok: bool) -> None:
+        self.probing = False
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+        else:
+            self.failures += 1
+            if self.failures >= BREAKER_THRESHOLD:
+                self.opened_at = time.monotonic()
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total_ms = 0.0
+        self.errors = 0
+
+    def observe(self, ms: float, ok: bool) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, ms)] += 1
+        self.total_ms += ms
+        if not ok:
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        n = sum(self.counts)
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}ms"]
+        return {
+            "count": n,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / n, 1) if n else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+_lock = threading.Lock()
+_sessions = {}
+_breakers = {}
+_histograms = {}
+
+
+def _session(host: str) -> requests.Session:
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def _breaker(host: str) -> _Breaker:
+    with _lock:
+        return _breakers.setdefault(host, _Breaker())
+
+
+def _observe(endpoint: str, ms: float, ok: bool) -> None:
+    with _lock:
+        _histograms.setdefault(endpoint, _Histogram()).observe(ms, ok)
+
+
+def get_json(url: str, params: dict = None, endpoint: str = None):
+    """
+    GET `url` through the pooled session for its host and return decoded JSON.
+    Connection errors, timeouts, 429 and 5xx are retried with jittered
+    exponential backoff; a 404 raises NotFoundError straight away.
+    """
+    host = urlsplit(url).netloc
+    endpoint = endpoint or host
+    breaker = _breaker(host)
+    session = _session(host)
+
+    for attempt in range(MAX_RETRIES + 1):
+        with _lock:
+            allowed = breaker.allow()
+        if not allowed:
+            raise CircuitOpenError(f"{host} is unavailable")
+
+        start = time.perf_counter()
+        try:
+            resp = session.get(url, params=params, timeout=TIMEOUT)
+            if resp.status_code == 404:
+                raise NotFoundError(f"{endpoint}: not found")
+            if resp.status_code in _RETRY_STATUS:
+                raise UpstreamError(f"{endpoint}: HTTP {resp.status_code}")
+            resp.raise_for_status()
+            data = resp.json()
+        except NotFoundError:
+            # A definitive answer: the service itself is healthy
+            _observe(endpoint, (time.perf_counter() - start) * 1000, True)
+            with _lock:
+                breaker.record(True)
+            raise
+        except (requests.RequestException, ValueError, UpstreamError) as e:
+            # Other 4xx responses are our fault, not the host's
+            client_error = isinstance(e, requests.HTTPError)
+            _observe(endpoint, (time.perf_counter() - start) * 1000, False)
+            with _lock:
+                breaker.record(client_error)
+            if client_error or attempt == MAX_RETRIES:
+                raise UpstreamError(str(e)) from e
+            time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+            continue
+
+        _observe(endpoint, (time.perf_counter() - start) * 1000, True)
+        with _lock:
+            breaker.record(True)
+        return data
+
+
+def translate(text: str, src: str, tgt: str) -> str:
+    data = get_json(
+        TRANSLATE_URL,
+        params={"client": "gtx", "sl": src, "tl": tgt, "dt": "t", "q": text},
+        endpoint="translate",
+    )
+    return data[0][0][0]
+
+
+def translate_batch(words: list, src: str, tgt: str) -> dict:
+    """
+    Translate many words with a single request by sending them newline-joined.
+    Returns {word: translation} for the words that came back; if the response
+    doesn't line up with the input, the words are retried one by one.
+    """
+    if not words:
+        return {}
+    try:
+        data = get_json(
+            TRANSLATE_URL,
+            params={"client": "gtx", "sl": src, "tl": tgt, "dt": "t", "q": "\n".join(words)},
+            endpoint="translate",
+        )
+        lines = "".join(seg[0] for seg in data[0] if seg and seg[0]).split("\n")
+        lines = [line.strip() for line in lines]
+    except UpstreamError:
+        return {}
+    except (TypeError, IndexError):
+        lines = []
+
+    if len(lines) == len(words):
+        return {w: t for w, t in zip(words, lines) if t}
+    if len(words) == 1:
+        return {}
+    # Segments got merged or split: fall back to one request per word
+    out = {}
+    for w in words:
+        out.update(translate_batch([w], src, tgt))
+    return out
+
+
+def lookup_entries(word: str, lang: str) -> list:
+    """Raw dictionaryapi.dev entries for `word`; raises NotFoundError if there are none."""
+    return get_json(f"{DICTIONARY_URL}/{quote(lang, safe='')}/{quote(word, safe='')}", endpoint="dictionary")
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "endpoints": {name: h.snapshot() for name, h in _histograms.items()},
+            "breakers": {
+                host: {"failures": b.failures, "open": b.opened_at is not None}
+                for host, b in _breakers.items()
+            },
+        }
@@ -0,0 +1,30 @@
+"""
+The vocabulary app: one Flask application over one shared Engine.
+
+    from vocab import create_app
+    app = create_app()
+
+or `gunicorn "vocab:create_app()"`. The learner's page and its API live in
+`vocab.main`, the dashboard under /dashboard in `vocab.dashboard`.
+"""
+from pathlib import Path
+
+from flask import Flask
+
+from vocab import dashboard, main
+from vocab.engine import Engine
+
+# templates/ and static/ sit next to the package, at the top of the repo
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def create_app(engine: Engine = None) -> Flask:
+    """The app with both blueprints over `engine`, a new Engine if not given."""
+    app = Flask(__name__, root_path=str(ROOT))
+    app.extensions["vocab"] = engine if engine is not None else Engine()
+    app.register_blueprint(main.bp)
+    app.register_blueprint(dashboard.bp)
+    # Where the multi-language page used to serve the same stats
+    app.add_url_rule("/api/state/stats", view_func=dashboard.get_state_stats)
+    app.add_url_rule("/api/upstream/stats", view_func=dashboard.get_upstream_stats)
+    return app
@@ -0,0 +1,259 @@
+"""The dashboard: word lists, cache maintenance and the stats pages, under /dashboard."""
+from flask import Blueprint, abort, jsonify, render_template, request
+
+import fetcher
+import providers
+import upstream
+from events import bus, channel, sse_response
+from ingest import decode_chunks, ingest, stream_response, upload_stream
+from sorted_words import MAX_PAGE_SIZE, PAGE_SIZE
+from word_search import SUGGESTIONS
+from vocab.engine import PREWARM_DIR, dashboard_view, from_dashboard
+from vocab.web import cards_response, current_state, engine, lang_pair, recent_options
+
+bp = Blueprint("dashboard", __name__, url_prefix="/dashboard")
+
+# Most suggestions one search may ask for
+MAX_SUGGESTIONS = 50
+
+
+@bp.route("")
+def dashboard():
+    return render_template("dashboard.html")
+
+
+def _page_options() -> dict:
+    """
+    Paging query parameters: `cursor` (the `next` of the previous page),
+    `limit`, `prefix`, `q` (substring) and `sort` ("word" or "-word").
+    """
+    args = request.args
+    try:
+        limit = int(args.get("limit", PAGE_SIZE))
+    except ValueError:
+        abort(400, "limit must be a number")
+    sort = args.get("sort", "word")
+    if sort not in ("word", "-word"):
+        abort(400, "sort must be word or -word")
+    return {
+        "cursor": args.get("cursor") or None,
+        "limit": max(1, min(limit, MAX_PAGE_SIZE)),
+        "prefix": args.get("prefix", "").lower(),
+        "contains": args.get("q", "").lower(),
+        "reverse": sort == "-word",
+    }
+
+
+def _page_response(page):
+    words, next_cursor = page
+    return jsonify({"words": words, "next": next_cursor})
+
+
+@bp.route("/api/words/known")
+def get_known_words():
+    return _page_response(current_state(*lang_pair()).page("known", **_page_options()))
+
+
+@bp.route("/api/words/unknown")
+def get_unknown_words():
+    return _page_response(current_state(*lang_pair()).page("unknown", **_page_options()))
+
+
+@bp.route("/api/words/total")
+def get_total_words():
+    return jsonify({"total": current_state(*lang_pair()).counts()["total"]})
+
+
+@bp.route("/api/stats")
+def get_stats():
+    """Sizes of the learner's lists and of the cache, all kept as counters."""
+    return jsonify(engine().word_counts(current_state(*lang_pair())))
+
+
+@bp.route("/api/word/info")
+def get_word_info_api():
+    word = request.args.get("word", "").lower()
+    if not word:
+        return jsonify({"error": "No word specified"}), 400
+    info = engine().word_entry(word, *lang_pair())
+    return jsonify({"word": word, "info": dashboard_view(info)})
+
+
+@bp.route("/api/word/senses")
+def get_word_senses_api():
+    """Every sense of a word, read from the senses log only when asked for."""
+    word = request.args.get("word", "").lower()
+    if not word:
+        return jsonify({"error": "No word specified"}), 400
+    return jsonify({"word": word, "senses": engine().word_senses(word, *lang_pair())})
+
+
+@bp.route("/api/word/search")
+def search_words():
+    """Up to `limit` cached words for `q`: exact, then by prefix, then with typos."""
+    query = request.args.get("q", "").strip().lower()
+    try:
+        limit = int(request.args.get("limit", SUGGESTIONS))
+    except ValueError:
+        abort(400, "limit must be a number")
+    limit = max(1, min(limit, MAX_SUGGESTIONS))
+    return jsonify({"query": query, "suggestions": engine().search_words(query, *lang_pair(), limit)})
+
+
+@bp.route("/api/word/edit", methods=["POST"])
+def edit_word():
+    data = request.json
+    word = data.get("word", "").lower()
+    info = data.get("info", {})
+    if not word or not isinstance(info, dict):
+        return jsonify({"error": "Invalid data"}), 400
+    src, tgt = lang_pair(data)
+    eng = engine()
+    eng.entries.edit(eng.cache_key(word, src, tgt), from_dashboard(info))
+    eng.publish_counts(current_state(src, tgt))
+    return jsonify({"status": "success"})
+
+
+@bp.route("/api/word/move", methods=["POST"])
+def move_word():
+    data = request.json
+    word = data.get("word", "").lower()
+    to_known = data.get("to_known", True)
+    if not word:
+        return jsonify({"error": "No word provided"}), 400
+
+    state = current_state(*lang_pair(data))
+    state.move(word, to_known)
+    engine().publish_counts(state)
+    return jsonify({"status": "success"})
+
+
+@bp.route("/api/cache/words")
+def get_cached_words():
+    return _page_response(engine().word_cache.page_keys(**_page_options()))
+
+
+@bp.route("/api/cache/stats")
+def get_cache_stats():
+    eng = engine()
+    return jsonify({**eng.word_cache.stats(), "negative": eng.negative_cache.stats(), "audio": eng.audio_cache.stats()})
+
+
+@bp.route("/api/upstream/stats")
+def get_upstream_stats():
+    return jsonify({**upstream.stats(), "fetch": fetcher.stats(), "providers": providers.stats(),
+                    "speech": engine().speech.stats()})
+
+
+@bp.route("/api/state/stats")
+def get_state_stats():
+    state = current_state(*lang_pair())
+    return jsonify({**engine().states.stats(), "current": state.stats(), "events": bus.stats()})
+
+
+def _prewarm_path(name):
+    if not name:
+        return None
+    path = (PREWARM_DIR / name).resolve()
+    if PREWARM_DIR.resolve() not in path.parents or not path.is_file():
+        abort(400, f"No such file in {PREWARM_DIR}: {name}")
+    return path
+
+
+@bp.route("/api/cache/prewarm", methods=["GET", "POST"])
+def prewarm_cache():
+    """
+    POST {"words": file, "dictionary": file, "limit": n, "offline": bool}
+    starts filling the cache in the background from files in PREWARM_DIR;
+    GET reports its progress.
+    """
+    if request.method == "GET":
+        return jsonify(engine().prewarm_progress())
+
+    data = request.get_json() or {}
+    words_path = _prewarm_path(data.get("words"))
+    dump_path = _prewarm_path(data.get("dictionary"))
+    if words_path is None and dump_path is None:
+        return jsonify({"error": "Give a word list, a dictionary dump or both"}), 400
+    limit = data.get("limit")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            limit = 0
+        if limit < 1:
+            return jsonify({"error": "limit must be a positive integer"}), 400
+    job = engine().start_prewarm(words_path, dump_path, limit, bool(data.get("offline")))
+    if job is None:
+        return jsonify({"error": "A prewarm job is already running"}), 409
+    return jsonify({"status": "started"}), 202
+
+
+@bp.route("/api/cache/delete", methods=["POST"])
+def delete_cached_word():
+    data = request.json
+    word = data.get("word", "").lower()
+    if not word:
+        return jsonify({"error": "No word provided"}), 400
+
+    src, tgt = lang_pair(data)
+    eng = engine()
+    if eng.entries.delete(eng.cache_key(word, src, tgt)):
+        eng.publish_counts(current_state(src, tgt))
+        return jsonify({"status": "deleted"})
+    else:
+        return jsonify({"error": "Word not found in cache"}), 404
+
+
+@bp.route("/api/vocab/detect", methods=["POST"])
+def dashboard_api_detect():
+    data = request.get_json()
+    text = data.get("text", "")
+    src, tgt = lang_pair(data)
+    state = current_state(src, tgt)
+    results = engine().detect(text, state, src, tgt, track_unknown=True)
+    engine().publish_counts(state)
+    cards = engine().card_fragments([r["word"] for r in results], src, tgt, "dashboard",
+                                    infos={r["word"]: r for r in results})
+    return cards_response("unknowns", cards)
+
+
+@bp.route("/api/vocab/recent", methods=["GET"])
+def dashboard_api_recent():
+    src, tgt = lang_pair()
+    items = current_state(src, tgt).recent(*recent_options())
+    return cards_response("recent", engine().card_fragments([item["word"] for item in items], src, tgt, "dashboard"))
+
+
+@bp.route("/api/vocab/recent/top", methods=["GET"])
+def dashboard_api_recent_top():
+    src, tgt = lang_pair()
+    items = current_state(src, tgt).top_recent(*recent_options())
+    cards = engine().card_fragments([item["word"] for item in items], src, tgt, "dashboard")
+    return cards_response("top", cards, [{"count": item["count"]} for item in items])
+
+
+@bp.route("/api/vocab/ingest", methods=["POST"])
+def dashboard_api_ingest():
+    """
+    Upload a document (raw body or a multipart file) and stream back its
+    unknown words as they are resolved: NDJSON, or SSE with ?format=sse.
+    """
+    src, tgt = lang_pair()
+    state = current_state(src, tgt)
+    eng = engine()
+
+    def get_word_infos(words):
+        # Resolved words are shown from their stored entry, as the other card endpoints do
+        infos = eng.word_infos(words, src, tgt)
+        return {w: dashboard_view(eng.entry_or(w, src, tgt, info)) for w, info in infos.items()}
+
+    events = ingest(decode_chunks(upload_stream()), src, state, get_word_infos, eng.lemmatizer(state, src, tgt))
+    return stream_response(eng.then_publish_counts(events, state))
+
+
+@bp.route("/api/events")
+def dashboard_api_events():
+    """Server-Sent Events: the word counts on connect and whenever they change."""
+    state = current_state(*lang_pair())
+    return sse_response(bus.stream(channel(state), [("counts", engine().word_counts(state))]))
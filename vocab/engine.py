@@ -0,0 +1,377 @@
+"""
+The vocabulary engine every page and API shares: the word cache, the
+negative cache, spoken audio, learner state and the lookups over them.
+
+One Engine per process; the blueprints reach it through `vocab.web.engine()`.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+
+from gtts import gTTS
+
+import providers
+import upstream
+from audio_cache import AudioCache
+from events import bus, channel
+from fetcher import fetch_word_infos
+from negative_cache import NegativeCache, ERROR, failure_kind, is_poisoned
+from prewarm import Prewarmer
+from recent_words import RECENT_LIMIT
+from review_schedule import GRADUATE_DAYS
+from speech import SpeechStreams, recognizer
+from state_backend import StateRegistry
+from tokenizer import iter_words, lemmatizer, valid_lang
+from word_cache import WordCache
+from word_entry import EntryCache, example_text, first_sense, has_details, senses_from_entries, summary, upgrade
+from word_search import SUGGESTIONS, max_typos
+from word_store import WordStore
+
+CACHE_JSON_PATH = Path("total_word.json")
+CACHE_LOG_PATH = Path("total_word.jsonl")
+# Every sense of words with more than one (see word_entry)
+SENSES_LOG_PATH = Path("total_word_senses.jsonl")
+NEGATIVE_LOG_PATH = Path("negative_word.jsonl")
+# Word lists and dictionary dumps the prewarm job may read
+PREWARM_DIR = Path(os.environ.get("VOCAB_PREWARM_DIR", "prewarm"))
+
+# Language pair of bare cache keys and of the unscoped learner state; the
+# English-Hindi pages used these before other pairs existed
+DEFAULT_PAIR = ("en", "hi")
+NO_TRANSLATION = "Translation not available"
+
+
+def render_speech(text: str, lang: str, fp) -> None:
+    gTTS(text=text, lang=lang).write_to_fp(fp)
+
+
+def get_senses(word: str, lang: str = "en") -> list:
+    """
+    Every sense the dictionary has for `word` (see word_entry.make_sense).
+    Raises upstream.NotFoundError if it has no entry, or
+    upstream.UpstreamError if it couldn't be reached.
+    """
+    if not word:
+        return []
+    return senses_from_entries(providers.lookup_entries(word, lang))
+
+
+def for_display(word: str, info: dict) -> dict:
+    # Failure placeholders are shown to the user but never cached
+    return {
+        "meaning": info.get("meaning") or NO_TRANSLATION,
+        "example": example_text(upgrade(info)) or f"No definition/example found for “{word}.”",
+    }
+
+
+def dashboard_view(info: dict) -> dict:
+    """An entry as the dashboard edits it: the translation and the first sense."""
+    entry = upgrade(info)
+    return {
+        "hindi": entry["meaning"] or NO_TRANSLATION,
+        "pos": entry["pos"],
+        "description": entry["definition"],
+        "examples": entry["examples"],
+        "senses": entry["senses"],
+    }
+
+
+def from_dashboard(info: dict) -> dict:
+    """The summary for a dashboard edit; the inverse of dashboard_view."""
+    return {
+        "meaning": info.get("hindi", ""),
+        "pos": (info.get("pos") or "").strip(),
+        "definition": (info.get("description") or "").strip(),
+        "examples": [ex.strip() for ex in info.get("examples", []) if ex.strip()],
+    }
+
+
+# How each page shows a word: the learner's page the display text, the
+# dashboard the fields it edits
+CARD_VIEWS = {
+    "main": lambda word, info: {"word": word, **for_display(word, info)},
+    "dashboard": lambda word, info: {"word": word, **dashboard_view(info)},
+}
+
+
+def card_json(word: str, info: dict, view: str = "main") -> bytes:
+    return json.dumps(CARD_VIEWS[view](word, info), ensure_ascii=False).encode("utf-8")
+
+
+class Engine:
+    """
+    Caches, learner state and lookups for every language pair.
+
+    Entries of the default pair are cached under the bare word, as the
+    English-Hindi pages always stored them; other pairs under
+    "<src>-<tgt>-<word>". Every entry is a word_entry summary, whichever
+    page looked it up; the rest of a word's senses are read only by
+    word_senses.
+    """
+
+    def __init__(self):
+        # Word cache: append-only log, migrated from total_word.json on first run.
+        # Served from memory; picks up writes from other processes via the log
+        # Searched one language pair at a time (see pair_of)
+        self.word_cache = WordCache(WordStore(CACHE_LOG_PATH, legacy_path=CACHE_JSON_PATH, legacy_transform=upgrade),
+                                    scope_of=self.pair_of)
+        # Summaries in the word cache, every sense in a log of its own
+        self.entries = EntryCache(self.word_cache, WordStore(SENSES_LOG_PATH))
+        # Failed lookups, with their re-probe schedule, kept out of the word cache
+        self.negative_cache = NegativeCache(WordCache(WordStore(NEGATIVE_LOG_PATH)))
+        # Spoken words, rendered once and kept on disk
+        self.audio_cache = AudioCache(render_speech)
+        # Known/unknown words, sighting counters and the recent list of each
+        # learner and language pair, kept in memory only while they are
+        # active; set VOCAB_STATE_BACKEND=sqlite when running several workers
+        self.states = StateRegistry()
+        # Audio of pages without in-browser recognition, transcribed on a
+        # pool of its own; no recognizer if speech_recognition is missing
+        self.speech = SpeechStreams(recognizer())
+        self._prewarm_job = None
+        self._prewarm_lock = threading.Lock()
+
+    @staticmethod
+    def pair_scope(src: str, tgt: str) -> str:
+        """Scope of a language pair in cache keys and learner state: "" for the default pair, else "src-tgt"."""
+        return "" if (src, tgt) == DEFAULT_PAIR else f"{src}-{tgt}"
+
+    @staticmethod
+    def cache_key(word: str, src: str, tgt: str) -> str:
+        return word if (src, tgt) == DEFAULT_PAIR else f"{src}-{tgt}-{word}"
+
+    @staticmethod
+    def pair_of(key: str) -> tuple:
+        """(pair scope, word) of a cache key. Words hold no "-", so the word is what follows the last one."""
+        scope, _, word = key.rpartition("-")
+        for i, c in enumerate(scope):
+            if c == "-" and valid_lang(scope[:i]) and valid_lang(scope[i + 1:]):
+                return scope, word
+        return "", key
+
+    def state(self, user: str, src: str, tgt: str):
+        return self.states.get(user, self.pair_scope(src, tgt))
+
+    def word_counts(self, state) -> dict:
+        return {**state.counts(), "cached": len(self.word_cache)}
+
+    def publish_counts(self, state) -> None:
+        """Push the learner's list sizes to their open pages."""
+        if bus.listening(channel(state)):
+            bus.publish(channel(state), "counts", self.word_counts(state))
+
+    def then_publish_counts(self, events, state):
+        """Pass `events` through, then publish the counts they changed."""
+        yield from events
+        self.publish_counts(state)
+
+    def lemmatizer(self, state, src: str, tgt: str):
+        return lemmatizer(lambda w: self.cache_key(w, src, tgt) in self.word_cache or state.is_known(w), src)
+
+    def word_entry(self, word: str, src: str, tgt: str) -> dict:
+        """The summary of one word, looked up if not cached; {} if that failed."""
+        key = self.cache_key(word, src, tgt)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.word_infos([word], src, tgt)
+            entry = self.entries.get(key)
+        return entry or {}
+
+    def entry_or(self, word: str, src: str, tgt: str, fallback: dict) -> dict:
+        """
+        The stored summary of `word`, or `fallback` (what word_infos answered)
+        while it has none worth showing. Cards are built from the summary, so
+        no view is derived from another view's display text.
+        """
+        entry = self.entries.get(self.cache_key(word, src, tgt))
+        if entry is None or is_poisoned(entry):
+            return fallback
+        return entry
+
+    def word_senses(self, word: str, src: str, tgt: str) -> list:
+        """
+        Every sense of one word, read from the senses log. Entries from
+        before it kept only their first sense; the others are looked up
+        now and stored, the cached first sense staying first.
+        """
+        key = self.cache_key(word, src, tgt)
+        entry = self.word_entry(word, src, tgt)
+        if entry and entry["senses"] is None:
+            try:
+                fetched = get_senses(word, src)
+            except upstream.UpstreamError:
+                fetched = []
+            senses = [first_sense(entry)] + fetched[1:]
+            self.entries.put(key, entry["meaning"], senses)
+            return senses
+        return self.entries.senses(key)
+
+    def word_infos(self, words: list, src: str, tgt: str) -> dict:
+        """
+        Look up many words at once: cached entries are returned directly and
+        all misses are fetched concurrently in one batch. Words that failed
+        recently are answered with placeholders until their re-probe is due.
+        """
+        negative_cache = self.negative_cache
+        infos = {}
+        misses = []
+        for w in words:
+            key = self.cache_key(w, src, tgt)
+            info = self.entries.get(key)
+            if info is not None and not is_poisoned(info):
+                infos[w] = for_display(w, info)
+                # Entries saved without a definition get re-probed on schedule
+                if has_details(info) or not negative_cache.due(key):
+                    continue
+            elif negative_cache.blocked(key):
+                infos[w] = for_display(w, {})
+                continue
+            misses.append(w)
+
+        def store(w, meaning, senses, error):
+            key = self.cache_key(w, src, tgt)
+            if meaning is None:
+                negative_cache.record(key, ERROR)
+                return
+            self.entries.put(key, meaning, senses or [])
+            if error is None:
+                negative_cache.clear(key)
+            else:
+                negative_cache.record(key, failure_kind(error))
+
+        fetched = fetch_word_infos(
+            misses,
+            lambda batch: providers.translate_batch(batch, src, tgt),
+            lambda w: get_senses(w, src),
+            store,
+            scope=f"{src}-{tgt}",
+        )
+        for w, (meaning, senses, error) in fetched.items():
+            if meaning is not None or w not in infos:
+                infos[w] = for_display(w, summary(meaning, senses or []))
+        return infos
+
+    def detect(self, text: str, state, src: str, tgt: str, track_unknown: bool = False) -> list:
+        """
+        Unknown words of `text` with their info, in order of appearance.
+        Words sighted five times become known; the rest are put up for
+        review. With `track_unknown` they are also added to the learner's
+        unknown list, as the dashboard does.
+        """
+        lemmatize = self.lemmatizer(state, src, tgt)
+        seen_this_batch = set()
+        unknowns = []
+
+        for w in iter_words(text, src):
+            w = lemmatize(w)
+            if w in seen_this_batch or state.is_known(w):
+                continue
+            seen_this_batch.add(w)
+
+            if state.record_sighting(w) >= 5:
+                state.move(w, to_known=True)
+                continue
+            if track_unknown:
+                state.add_unknown(w)
+            unknowns.append(w)
+        if unknowns:
+            state.enroll(unknowns)
+
+        # Words still in flight after the deadline are cached when they land
+        infos = self.word_infos(unknowns, src, tgt)
+        results = []
+        listening = bus.listening(channel(state))
+        for w in unknowns:
+            info = infos.get(w)
+            if info is not None:
+                results.append({"word": w, "meaning": info["meaning"], "example": info["example"]})
+
+            state.touch_recent(w)
+            if listening:
+                info = info or {}
+                bus.publish(channel(state), "recent", {
+                    "word": w,
+                    "meaning": info.get("meaning", ""),
+                    "example": info.get("example", ""),
+                })
+
+        # Playback is usually the next click, so have the clips ready
+        self.audio_cache.prerender([r["word"] for r in results], src)
+        return results
+
+    def review(self, state, word: str, grade: str) -> dict:
+        """
+        Record a review of `word`; its new card, with "known" true if the
+        interval reached GRADUATE_DAYS and the word moved to the known list.
+        """
+        card = state.review(word, grade)
+        known = card["interval"] >= GRADUATE_DAYS
+        if known:
+            state.move(word, to_known=True)
+            self.publish_counts(state)
+        return {"word": word, **card, "known": known}
+
+    def recent(self, state, src: str, tgt: str, limit: int = RECENT_LIMIT, since: float = None) -> list:
+        """The learner's latest unknown words with their info, newest first."""
+        items = state.recent(limit, since)
+        infos = self.word_infos([item["word"] for item in items], src, tgt)
+        output = []
+        for item in items:
+            w = item["word"]
+            info = infos.get(w) or for_display(w, {})
+            output.append({**item, "meaning": info["meaning"], "example": info["example"]})
+        return output
+
+    def card_fragments(self, words: list, src: str, tgt: str, view: str = "main", infos: dict = None) -> list:
+        """
+        The card of each word as JSON bytes (see card_json). Cards of cached
+        entries are kept by the word cache until the entry changes; the
+        rest are rendered from their stored entry, or from `infos` (looked
+        up as word_infos does if not given) for words that have none.
+        """
+        def render(word):
+            # Entries word_infos would not serve as they are go its way every time
+            def rendered(info):
+                info = upgrade(info)
+                if is_poisoned(info) or not has_details(info):
+                    return None
+                return card_json(word, info, view)
+            return rendered
+
+        cards = {}
+        missing = []
+        for w in words:
+            card = self.word_cache.fragment(self.cache_key(w, src, tgt), view, render(w))
+            if card is None:
+                missing.append(w)
+            else:
+                cards[w] = card
+        if missing:
+            if infos is None:
+                infos = self.word_infos(missing, src, tgt)
+            for w in missing:
+                cards[w] = card_json(w, self.entry_or(w, src, tgt, infos.get(w) or {}), view)
+        return [cards[w] for w in words]
+
+    def search_words(self, query: str, src: str, tgt: str, limit: int = SUGGESTIONS) -> list:
+        """Cached words of the pair like `query`, as WordCache.search finds them."""
+        return self.word_cache.search(query, limit, max_typos(query), self.pair_scope(src, tgt))
+
+    def start_prewarm(self, words_path, dump_path, limit=None, offline: bool = False):
+        """Fill the cache in the background; None if a job is already running."""
+        with self._prewarm_lock:
+            if self._prewarm_job is not None and self._prewarm_job.progress()["running"]:
+                return None
+            job = self._prewarm_job = Prewarmer(self.entries, self.negative_cache, get_senses)
+        threading.Thread(
+            target=job.run,
+            args=(words_path, dump_path, limit, offline),
+            name="vocab-prewarm",
+            daemon=True,
+        ).start()
+        return job
+
+    def prewarm_progress(self) -> dict:
+        job = self._prewarm_job
+        return job.progress() if job else {"running": False}
@@ -0,0 +1,220 @@
+"""The learner's page: live detection, the recent list, learning, reviews and speech."""
+from flask import Blueprint, jsonify, render_template, request, send_file
+
+from audio_cache import MAX_AGE as AUDIO_MAX_AGE
+from events import bus, channel, sse_response
+from ingest import READ_SIZE, decode_chunks, ingest, stream_response, upload_stream
+from io_pool import Overloaded
+from review_schedule import GRADES, MAX_REVIEW_LIMIT, REVIEW_LIMIT
+from speech import SAMPLE_RATE, StreamLimit
+from tokenizer import valid_lang
+from vocab.web import cards_response, current_state, current_user, engine, lang_pair, recent_options
+
+bp = Blueprint("main", __name__)
+
+
+@bp.route("/")
+def index():
+    return render_template("index.html")
+
+
+def _detect(text: str, src: str, tgt: str) -> list:
+    state = current_state(src, tgt)
+    results = engine().detect(text, state, src, tgt)
+    if bus.listening(channel(state)):
+        # Other pages of this learner get the cards too; the sender skips
+        # its own by client id
+        bus.publish(channel(state), "unknowns", {
+            "client": request.headers.get("X-Client-Id", ""),
+            "unknowns": results,
+        })
+        engine().publish_counts(state)
+    return results
+
+
+@bp.route("/api/vocab/detect", methods=["POST"])
+def api_detect():
+    data = request.get_json()
+    text = data.get("text", "")
+    src, tgt = lang_pair(data)
+    results = _detect(text, src, tgt)
+    cards = engine().card_fragments([r["word"] for r in results], src, tgt, infos={r["word"]: r for r in results})
+    return cards_response("unknowns", cards)
+
+
+@bp.route("/api/vocab/recent", methods=["GET"])
+def api_recent():
+    """The latest unknown words; `limit` of them, seen in the last `window` seconds if given."""
+    src, tgt = lang_pair()
+    items = current_state(src, tgt).recent(*recent_options())
+    cards = engine().card_fragments([item["word"] for item in items], src, tgt)
+    return cards_response("recent", cards, [{"timestamp": item["timestamp"]} for item in items])
+
+
+@bp.route("/api/vocab/recent/top", methods=["GET"])
+def api_recent_top():
+    """The most often met unknown words, with counts; `limit` and `window` as for /recent."""
+    src, tgt = lang_pair()
+    items = current_state(src, tgt).top_recent(*recent_options())
+    cards = engine().card_fragments([item["word"] for item in items], src, tgt)
+    return cards_response("top", cards, [{"count": item["count"], "timestamp": item["timestamp"]} for item in items])
+
+
+@bp.route("/api/vocab/senses", methods=["GET"])
+def api_senses():
+    """Every sense of one word: part of speech, definition and examples of each."""
+    word = request.args.get("word", "").strip().lower()
+    if not word:
+        return jsonify({"error": "No word specified"}), 400
+    return jsonify({"word": word, "senses": engine().word_senses(word, *lang_pair())})
+
+
+@bp.route("/api/vocab/events")
+def api_events():
+    """
+    Server-Sent Events for the learner's open pages on one language pair:
+    a "snapshot" with the recent list and counts on connect, then
+    "unknowns" cards, "recent" items (move to the top of the list) and
+    "counts" as they change.
+    """
+    src, tgt = lang_pair()
+    state = current_state(src, tgt)
+    snapshot = {"recent": engine().recent(state, src, tgt), "counts": engine().word_counts(state)}
+    return sse_response(bus.stream(channel(state), [("snapshot", snapshot)]))
+
+
+@bp.route("/api/vocab/ingest", methods=["POST"])
+def api_ingest():
+    """
+    Upload a document (raw body or a multipart file) and stream back its
+    unknown words as they are resolved: NDJSON, or SSE with ?format=sse.
+    """
+    src, tgt = lang_pair()
+    state = current_state(src, tgt)
+    eng = engine()
+    events = ingest(decode_chunks(upload_stream()), src, state,
+                    lambda words: eng.word_infos(words, src, tgt), eng.lemmatizer(state, src, tgt))
+    return stream_response(eng.then_publish_counts(events, state))
+
+
+@bp.route("/api/vocab/listen", methods=["POST"])
+def api_listen_open():
+    """
+    Open a speech stream for pages without the Web Speech API: post its
+    audio to /api/vocab/listen/<stream> (see speech.py). Query or JSON:
+    the language pair, `speech_lang` (e.g. en-US, default the source
+    language), `rate` and `channels` of raw PCM.
+    """
+    data = request.get_json(silent=True) or request.args
+    speech = engine().speech
+    if speech.recognize is None:
+        return jsonify({"error": "Speech recognition is not available on this server"}), 501
+    try:
+        rate = int(data.get("rate", SAMPLE_RATE))
+        channels = int(data.get("channels", 1))
+    except (TypeError, ValueError):
+        return jsonify({"error": "rate and channels must be numbers"}), 400
+    if not 8000 <= rate <= 48000 or not 1 <= channels <= 8:
+        return jsonify({"error": "rate must be 8000-48000 and channels 1-8"}), 400
+    src, tgt = lang_pair(data)
+    speech_lang = data.get("speech_lang") or src
+    if not valid_lang(speech_lang):
+        return jsonify({"error": "Invalid speech_lang"}), 400
+    try:
+        stream = speech.open(current_user(), (src, tgt), speech_lang, rate, channels)
+    except Overloaded:
+        return jsonify({"error": "Too many speech streams, try again"}), 503, {"Retry-After": "5"}
+    return jsonify({"stream": stream.id, "rate": rate}), 201
+
+
+@bp.route("/api/vocab/listen/<sid>", methods=["POST", "DELETE"])
+def api_listen(sid):
+    """
+    POST: the next chunk of the stream's audio as the body, `final=1` on
+    the last. Returns the utterances recognized since the previous post
+    and the unknown words they contain, as /api/vocab/detect would.
+    DELETE: drop the stream.
+    """
+    speech = engine().speech
+    user = current_user()
+    stream = speech.get(sid, user)
+    if stream is None:
+        return jsonify({"error": "No such speech stream"}), 404
+    if request.method == "DELETE":
+        speech.close(sid, user)
+        return "", 204
+    final = request.args.get("final") in ("1", "true")
+    body = request.stream
+    try:
+        segments = speech.feed(stream, iter(lambda: body.read(READ_SIZE), b""), final)
+    except ValueError as e:
+        # The decoder can't pick up after bad audio
+        speech.close(sid, user)
+        return jsonify({"error": str(e)}), 400
+    except StreamLimit as e:
+        speech.close(sid, user)
+        return jsonify({"error": str(e)}), 429
+    if final:
+        speech.close(sid, user)
+    text = " ".join(seg["text"] for seg in segments if seg["text"])
+    unknowns = _detect(text, *stream.pair) if text else []
+    return jsonify({"segments": segments, "unknowns": unknowns, "done": final})
+
+
+@bp.route("/api/vocab/learn", methods=["POST"])
+def api_learn():
+    data = request.get_json()
+    word = data.get("word")
+    if word:
+        state = current_state(*lang_pair(data))
+        if state.add_known(word):
+            engine().publish_counts(state)
+        return jsonify({"status": "ok"})
+    return jsonify({"status": "error", "message": "No word provided"}), 400
+
+
+@bp.route("/api/review", methods=["GET", "POST"])
+def api_review():
+    """
+    GET: the cards due now, longest overdue first, each with its schedule
+    (`limit`, default REVIEW_LIMIT). POST {"word", "grade"}: record a
+    review graded again, hard, good or easy, and return the new schedule.
+    """
+    if request.method == "GET":
+        try:
+            limit = int(request.args.get("limit", REVIEW_LIMIT))
+        except ValueError:
+            return jsonify({"error": "limit must be a number"}), 400
+        src, tgt = lang_pair()
+        items = current_state(src, tgt).due_reviews(max(1, min(limit, MAX_REVIEW_LIMIT)))
+        cards = engine().card_fragments([item["word"] for item in items], src, tgt)
+        return cards_response("due", cards, [{k: v for k, v in item.items() if k != "word"} for item in items])
+
+    data = request.get_json() or {}
+    word = (data.get("word") or "").strip().lower()
+    grade = data.get("grade")
+    if not word:
+        return jsonify({"error": "No word provided"}), 400
+    if grade not in GRADES:
+        return jsonify({"error": f"grade must be one of {', '.join(GRADES)}"}), 400
+    return jsonify(engine().review(current_state(*lang_pair(data)), word, grade))
+
+
+@bp.route("/api/vocab/speak", methods=["GET", "POST"])
+def api_speak():
+    # GET lets the browser cache the clip; POST is kept for older pages
+    data = request.args if request.method == "GET" else request.get_json()
+    text = data.get("text", "")
+    lang = data.get("lang", "en")  # Default to English if not provided
+
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+
+    try:
+        path, key = engine().audio_cache.get(text, lang)
+    except (Overloaded, TimeoutError):
+        # The clip is still rendering, or too many are; the page retries
+        return jsonify({"error": "Audio is busy, try again"}), 503, {"Retry-After": "1"}
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return send_file(path, mimetype="audio/mpeg", etag=key, max_age=AUDIO_MAX_AGE)
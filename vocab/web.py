@@ -0,0 +1,70 @@
+"""Request helpers shared by the blueprints."""
+import hashlib
+import json
+import time
+
+from flask import abort, current_app, request
+
+from recent_words import RECENT_DEPTH, RECENT_LIMIT
+from state_backend import InvalidScope, valid_user_id
+from tokenizer import valid_lang
+from vocab.engine import DEFAULT_PAIR
+
+
+def engine():
+    """The Engine of the running app."""
+    return current_app.extensions["vocab"]
+
+
+def current_user() -> str:
+    """The learner making this request, named by the X-User-Id header or vocab_user cookie."""
+    user = request.headers.get("X-User-Id") or request.cookies.get("vocab_user", "")
+    if not valid_user_id(user):
+        abort(400, "Invalid user id")
+    return user
+
+
+def lang_pair(data=None) -> tuple:
+    """(source_lang, target_lang) from a JSON body or the query string, English-Hindi if not given."""
+    data = request.args if data is None else data
+    src = data.get("source_lang") or DEFAULT_PAIR[0]
+    tgt = data.get("target_lang") or DEFAULT_PAIR[1]
+    if not valid_lang(src) or not valid_lang(tgt):
+        abort(400, "Invalid language code")
+    return src, tgt
+
+
+def current_state(src: str = DEFAULT_PAIR[0], tgt: str = DEFAULT_PAIR[1]):
+    """State of the learner making this request on one language pair."""
+    try:
+        return engine().state(current_user(), src, tgt)
+    except InvalidScope:
+        abort(400, "Invalid language pair")
+
+
+def recent_options() -> tuple:
+    """(limit, since) from `limit` and `window` (seconds back from now) in the query string."""
+    try:
+        limit = int(request.args.get("limit", RECENT_LIMIT))
+        window = request.args.get("window")
+        since = time.time() - float(window) if window else None
+    except ValueError:
+        abort(400, "limit and window must be numbers")
+    return max(1, min(limit, RECENT_DEPTH)), since
+
+
+def cards_response(name: str, cards: list, fields: list = None):
+    """
+    {name: [card, ...]} assembled from pre-rendered card JSON, each card
+    preceded by its entry of `fields` if given. The ETag is the body's
+    hash, so a poll that would get the same list back gets a 304.
+    """
+    if fields is not None:
+        cards = [
+            b"{" + json.dumps(extra)[1:-1].encode("utf-8") + b", " + card[1:] if extra else card
+            for extra, card in zip(fields, cards)
+        ]
+    body = b'{"' + name.encode("utf-8") + b'": [' + b", ".join(cards) + b"]}"
+    response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(hashlib.sha1(body).hexdigest())
+    return response.make_conditional(request)
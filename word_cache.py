@@ -0,0 +1,293 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sorted_words import SortedWords
+from word_search import SUGGESTIONS, WordSearch
+from word_store import WordStore
+
+# How often (seconds) to stat the log for writes made by other processes
+REFRESH_INTERVAL = 1.0
+# Decoded entries kept in memory per cache (about 600 bytes each); the
+# least recently read are dropped past this and decoded again from the log
+MAX_RESIDENT = int(os.environ.get("VOCAB_CACHE_RESIDENT", "100000"))
+
+# Field-name tuples shared by every resident entry with the same fields
+_shapes = {}
+
+
+def _pack(value):
+    # A dict entry is kept as (field names, *values): one small tuple, with
+    # the names shared, rather than a dict and its hash table per word
+    if not isinstance(value, dict):
+        return value
+    shape = tuple(value)
+    shape = _shapes.setdefault(shape, shape)
+    return (shape, *value.values())
+
+
+def _unpack(packed):
+    if not isinstance(packed, tuple):
+        return packed
+    return dict(zip(packed[0], packed[1:]))
+
+
+def _one_scope(key):
+    return "", key
+
+
+def _search_indexes(keys, scope_of) -> dict:
+    words = {}
+    for key in keys:
+        scope, word = scope_of(key)
+        words.setdefault(scope, []).append(word)
+    return {scope: WordSearch(ws) for scope, ws in words.items()}
+
+
+class WordCache:
+    """
+    Process-resident read cache in front of a WordStore.
+
+    Decoded entries are kept in memory after their first read, so repeated
+    lookups never touch the disk or the global file lock. Entries are held
+    packed (see _pack) and each get returns a fresh dict; past
+    `max_resident` the least recently read are dropped, to be decoded from
+    the mapped log again when next asked for. At most once per
+    REFRESH_INTERVAL the underlying log is checked for records appended by
+    another process; only the keys they touched are invalidated.
+
+    Views of an entry rendered for responses (see fragment) are kept next
+    to it and dropped whenever it is written, deleted, invalidated or
+    evicted.
+
+    Keys are split into scopes by `scope_of(key) -> (scope, word)` (by
+    default one scope holding every key as it is). The sorted keys, for
+    page_keys, and each scope's search index (see WordSearch), for search,
+    are built on first use and from then on kept up to date with each
+    write. An index is built without the lock, so reads and writes carry
+    on meanwhile; the writes it missed are replayed before it is put in.
+    """
+
+    def __init__(self, store: WordStore, refresh_interval: float = REFRESH_INTERVAL, scope_of=None,
+                 max_resident: int = MAX_RESIDENT):
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.scope_of = scope_of or _one_scope
+        self.max_resident = max_resident
+        self._entries = OrderedDict()  # key -> packed entry, least recently read first
+        self._fragments = {}  # key -> {view: rendered bytes}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._next_refresh = 0.0
+        self._sorted = None  # SortedWords of every key, once someone pages
+        self._searches = None  # {scope: WordSearch of its words}, once someone searches
+        self._building = None  # keys written while an index is built (None: the store was reloaded)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.fragment_hits = 0
+        self.evictions = 0
+
+    def _maybe_refresh(self) -> None:
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_interval
+        changed = self.store.refresh()
+        if changed is None:
+            with self._lock:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self._fragments.clear()
+                self._sorted = self._searches = None
+                if self._building is not None:
+                    self._building.append(None)
+        elif changed:
+            with self._lock:
+                for key in changed:
+                    self._fragments.pop(key, None)
+                    if self._entries.pop(key, None) is not None:
+                        self.invalidations += 1
+                    self._index_write(key, key in self.store)
+
+    def _keep(self, key, packed) -> None:
+        # Called with the lock held: make `key` the most recently read entry
+        # and drop the least recently read past max_resident
+        entries = self._entries
+        entries[key] = packed
+        entries.move_to_end(key)
+        while len(entries) > self.max_resident:
+            old, _ = entries.popitem(last=False)
+            self._fragments.pop(old, None)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        self._maybe_refresh()
+        with self._lock:
+            packed = self._entries.get(key)
+            if packed is not None:
+                self._entries.move_to_end(key)
+        if packed is not None:
+            self.hits += 1
+            return _unpack(packed)
+        self.misses += 1
+        generation = self.store.generation
+        value = self.store.get(key)
+        if value is None:
+            return default
+        with self._lock:
+            # Unless a write, delete or refresh came between the read and now:
+            # the value may already be stale, so it is returned but not kept
+            if self.store.generation == generation:
+                self._keep(key, _pack(value))
+        return value
+
+    def fragment(self, key, view: str, render):
+        """
+        `render(entry)` for the entry under `key`, typically its response
+        JSON as bytes, rendered once per view and kept until the entry
+        changes. None if there is no entry, or if `render` returns None
+        (which is not kept).
+        """
+        self._maybe_refresh()
+        with self._lock:
+            views = self._fragments.get(key)
+            rendered = views.get(view) if views is not None else None
+            if rendered is not None:
+                # Fragments live as long as their entry stays resident
+                self._entries.move_to_end(key)
+        if rendered is not None:
+            self.fragment_hits += 1
+            return rendered
+        value = self.get(key)
+        if value is None:
+            return None
+        rendered = render(value)
+        if rendered is not None:
+            with self._lock:
+                # Unless a write replaced the entry while it was rendered
+                if self._entries.get(key) == _pack(value):
+                    self._fragments.setdefault(key, {})[view] = rendered
+        return rendered
+
+    def __contains__(self, key) -> bool:
+        self._maybe_refresh()
+        return key in self._entries or key in self.store
+
+    def __len__(self) -> int:
+        self._maybe_refresh()
+        return len(self.store)
+
+    def keys(self) -> list:
+        self._maybe_refresh()
+        return self.store.keys()
+
+    def _index_write(self, key, present: bool) -> None:
+        # Called with the lock held: bring the indexes up to date with `key`
+        if self._building is not None:
+            self._building.append(key)
+        if self._sorted is not None:
+            if present:
+                self._sorted.add(key)
+            else:
+                self._sorted.discard(key)
+        if self._searches is not None:
+            scope, word = self.scope_of(key)
+            search = self._searches.get(scope)
+            if present:
+                if search is None:
+                    search = self._searches[scope] = WordSearch()
+                search.add(word)
+            elif search is not None:
+                search.discard(word)
+
+    def _index(self, name: str, build):
+        # The index in attribute `name`, built by `build(keys)` if there is
+        # none yet. One is built at a time, without the lock; the keys
+        # written meanwhile are replayed before it is put in place.
+        index = getattr(self, name)
+        if index is not None:
+            return index
+        with self._build_lock:
+            index = getattr(self, name)
+            if index is not None:
+                return index
+            with self._lock:
+                keys = self.store.keys()
+                self._building = written = []
+            try:
+                index = build(keys)
+            finally:
+                with self._lock:
+                    self._building = None
+                    # Unless the store was reloaded meanwhile: then this
+                    # index only answers the call that built it
+                    if index is not None and None not in written:
+                        setattr(self, name, index)
+                        for key in written:
+                            self._index_write(key, key in self.store)
+            return index
+
+    def page_keys(self, **options):
+        """A page of keys in sorted order; see SortedWords.page for the options."""
+        self._maybe_refresh()
+        index = self._index("_sorted", SortedWords)
+        with self._lock:
+            return index.page(**options)
+
+    def search(self, query: str, limit: int = SUGGESTIONS, typos: int = None, scope: str = "") -> list:
+        """
+        Words of `scope` matching `query` exactly, by prefix or with typos;
+        see WordSearch.suggest.
+        """
+        self._maybe_refresh()
+        searches = self._index("_searches", lambda keys: _search_indexes(keys, self.scope_of))
+        with self._lock:
+            search = searches.get(scope)
+            return search.suggest(query, limit, typos) if search is not None else []
+
+    def put(self, key, value) -> None:
+        self.store.put(key, value)
+        with self._lock:
+            self._fragments.pop(key, None)
+            self._keep(key, _pack(value))
+            self._index_write(key, True)
+
+    def put_many(self, items) -> None:
+        items = list(items)
+        self.store.put_many(items)
+        with self._lock:
+            for key, value in items:
+                self._fragments.pop(key, None)
+                self._keep(key, _pack(value))
+                self._index_write(key, True)
+
+    def delete(self, key) -> bool:
+        deleted = self.store.delete(key)
+        with self._lock:
+            # After the store, so an entry a get read just before is dropped too
+            self._entries.pop(key, None)
+            self._fragments.pop(key, None)
+            if deleted:
+                self._index_write(key, False)
+        return deleted
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        searches = self._searches
+        search = {scope: s.stats() for scope, s in list(searches.items())} if searches is not None else None
+        return {
+            "entries": len(self.store),
+            "resident": len(self._entries),
+            "max_resident": self.max_resident,
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "fragments": len(self._fragments),
+            "fragment_hits": self.fragment_hits,
+            "generation": self.store.generation,
+            "search": search,
+        }
@@ -0,0 +1,177 @@
+"""
+Cache entries: every sense of a word, in a versioned schema stored in two
+parts.
+
+Version 1 entries, still found in older caches, were {"meaning",
+"example"}, `example` being the display text of the first sense only
+("Part of Speech: ...\\nDefinition: ...\\nExample: “...”") or a list of
+its lines. Version 2 keeps
+
+  summary  {"v": 2, "meaning", "pos", "definition", "examples", "senses"}
+           in the word cache: the first sense and how many there are
+           (None when unknown, as for upgraded version 1 entries). It is
+           all that detection, the recent list and the dashboard read.
+  detail   {"v": 2, "senses": [{"pos", "definition", "examples"}, ...]}
+           in a log of its own, for words with more than one sense, read
+           only when someone asks for every sense (EntryCache.senses).
+
+upgrade() turns a version 1 entry into a summary; reads apply it, so old
+caches work before and after `python migrate_cache.py` rewrites them.
+"""
+SCHEMA_VERSION = 2
+# Senses kept per word, and examples per sense
+MAX_SENSES = 16
+MAX_EXAMPLES = 3
+
+
+def make_sense(pos: str, definition: str, examples=()) -> dict:
+    return {
+        "pos": pos or "",
+        "definition": definition or "",
+        "examples": [e for e in examples if e][:MAX_EXAMPLES],
+    }
+
+
+def senses_from_entries(entries) -> list:
+    """The senses of dictionary entries in the dictionaryapi.dev shape, in their order."""
+    senses = []
+    try:
+        for entry in entries:
+            for meaning in entry.get("meanings", []):
+                for d in meaning.get("definitions", []):
+                    senses.append(make_sense(meaning.get("partOfSpeech", ""), d.get("definition", ""),
+                                             [d.get("example", "")]))
+                    if len(senses) >= MAX_SENSES:
+                        return senses
+    except (AttributeError, TypeError):
+        pass
+    return senses
+
+
+def summary(meaning, senses: list) -> dict:
+    """The summary of an entry with these senses."""
+    first = senses[0] if senses else make_sense("", "")
+    return {
+        "v": SCHEMA_VERSION,
+        "meaning": meaning or "",
+        "pos": first["pos"],
+        "definition": first["definition"],
+        "examples": list(first["examples"]),
+        "senses": len(senses),
+    }
+
+
+def first_sense(entry: dict) -> dict:
+    return make_sense(entry.get("pos", ""), entry.get("definition", ""), entry.get("examples", []))
+
+
+def upgrade(entry: dict) -> dict:
+    """A summary for `entry`: itself if it is one, else parsed out of its version 1 text."""
+    if entry.get("v") == SCHEMA_VERSION:
+        return entry
+    example = entry.get("example") or ""
+    lines = example if isinstance(example, list) else example.split("\n")
+    pos = definition = ""
+    examples = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("No definition/example found"):
+            continue
+        if line.startswith("Part of Speech:"):
+            pos = line[len("Part of Speech:"):].strip()
+        elif line.startswith("Definition:"):
+            definition = line[len("Definition:"):].strip()
+        elif line.startswith("Example:"):
+            examples.append(line[len("Example:"):].strip().strip("“”"))
+        else:
+            examples.append(line)
+    senses = [make_sense(pos, definition, examples)] if pos or definition or examples else []
+    upgraded = summary(entry.get("meaning"), senses)
+    if senses:
+        # Whatever else the word meant was not kept
+        upgraded["senses"] = None
+    return upgraded
+
+
+def has_details(entry: dict) -> bool:
+    """Whether a summary has anything besides the meaning."""
+    return bool(entry["pos"] or entry["definition"] or entry["examples"])
+
+
+def format_example(part_of_speech: str, definition: str, example: str) -> str:
+    """Display text of a sense: part of speech, definition and example, one per line."""
+    parts = []
+    if part_of_speech:
+        parts.append(f"Part of Speech: {part_of_speech}")
+    if definition:
+        parts.append(f"Definition: {definition}")
+    if example:
+        parts.append(f"Example: “{example.rstrip('.')}.”")
+    return "\n".join(parts)
+
+
+def example_text(entry: dict) -> str:
+    """The display text of a summary's first sense, as the learner's page shows it."""
+    lines = [format_example(entry.get("pos", ""), entry.get("definition", ""), "")]
+    lines += [format_example("", "", e) for e in entry.get("examples", [])]
+    return "\n".join(line for line in lines if line)
+
+
+class EntryCache:
+    """
+    Version 2 entries over two stores: summaries in `summaries` (a
+    WordCache, read on every lookup) and sense lists in `details` (a
+    WordStore, read on demand). A word with one sense has no detail
+    record; its summary holds it all.
+    """
+
+    def __init__(self, summaries, details):
+        self.summaries = summaries
+        self.details = details
+
+    def __contains__(self, key) -> bool:
+        return key in self.summaries
+
+    def get(self, key):
+        """The summary under `key`, upgraded if it is older; None if there is none."""
+        entry = self.summaries.get(key)
+        return None if entry is None else upgrade(entry)
+
+    def put(self, key, meaning, senses: list) -> None:
+        self.put_many([(key, {"meaning": meaning, "senses": senses})])
+
+    def put_many(self, items) -> None:
+        """Store (key, {"meaning", "senses"}) pairs: summaries in one append, details in another."""
+        items = list(items)
+        details = [(key, {"v": SCHEMA_VERSION, "senses": e["senses"]}) for key, e in items if len(e["senses"]) > 1]
+        # Details first, so a reader that finds the summary finds its senses
+        if details:
+            self.details.put_many(details)
+        for key, e in items:
+            if len(e["senses"]) <= 1 and key in self.details:
+                self.details.delete(key)
+        self.summaries.put_many([(key, summary(e["meaning"], e["senses"])) for key, e in items])
+
+    def edit(self, key, entry: dict) -> None:
+        """Replace the meaning and first sense with those of summary `entry`, keeping the other senses."""
+        old = self.get(key)
+        senses = self.senses(key)
+        senses[:1] = [first_sense(entry)]
+        if len(senses) > 1:
+            self.details.put(key, {"v": SCHEMA_VERSION, "senses": senses})
+        edited = summary(entry.get("meaning"), senses)
+        if old is not None and old["senses"] is None:
+            edited["senses"] = None
+        self.summaries.put(key, edited)
+
+    def senses(self, key) -> list:
+        """Every sense stored under `key`; [] if there is no entry."""
+        detail = self.details.get(key)
+        if detail is not None:
+            return detail["senses"]
+        entry = self.get(key)
+        return [first_sense(entry)] if entry is not None and has_details(entry) else []
+
+    def delete(self, key) -> bool:
+        self.details.delete(key)
+        return self.summaries.delete(key)
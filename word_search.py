@@ -0,0 +1,280 @@
+"""
+Search over the cached words: exact, prefix and typo-tolerant matches.
+
+Prefix matches come from the sorted key list (SortedWords). One typo is
+found by looking the query's one-edit variants up in a set of the words;
+two through a segment index: each word is cut into MAX_TYPOS + 2 pieces,
+and a word within d edits of the query keeps at least (pieces - d) of them
+intact, each no more than d places from where it started. A search looks
+those pieces up among the query's substrings near the same positions, and
+checks the words found often enough with a bounded edit distance.
+"""
+import heapq
+from array import array
+from collections import Counter
+from itertools import chain
+
+from sorted_words import SortedWords
+
+# Suggestions returned when the caller doesn't say
+SUGGESTIONS = 10
+# Most edits a typo-tolerant search allows; the index cuts words into two
+# more pieces than this
+MAX_TYPOS = 2
+_PIECES = MAX_TYPOS + 2
+# Words checked with edit_distance per two-typo search at most, those
+# sharing the most pieces with the query first: with only two of four
+# pieces to go on, every word sharing a suffix with the query would be
+MAX_CHECKS = 100
+# Rebuild the segment lists once this share of their ids are deleted words
+_REBUILD_RATIO = 0.5
+
+
+def max_typos(query: str) -> int:
+    """Edits tolerated for a query of this length: none for 1-2 letters, one up to 5, then two."""
+    n = len(query)
+    return 0 if n <= 2 else 1 if n <= 5 else 2
+
+
+def _pieces(n: int) -> list:
+    # (start, length) of the pieces a word of length n is cut into, the
+    # longer ones last
+    short, extra = divmod(n, _PIECES)
+    out = []
+    start = 0
+    for i in range(_PIECES):
+        length = short + (i >= _PIECES - extra)
+        out.append((start, length))
+        start += length
+    return out
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein distance counting an adjacent swap as one edit, or
+    limit + 1 as soon as it is known to exceed `limit`. Only what lies
+    between the shared start and end is compared, and of that only the
+    band of cells within `limit` of the diagonal.
+    """
+    n, m = len(a), len(b)
+    if abs(n - m) > limit:
+        return limit + 1
+    # A shared start or end costs nothing
+    k = 0
+    while k < n and k < m and a[k] == b[k]:
+        k += 1
+    while n > k and m > k and a[n - 1] == b[m - 1]:
+        n -= 1
+        m -= 1
+    a, b = a[k:n], b[k:m]
+    n, m = n - k, m - k
+    if not n or not m:
+        return n + m if n + m <= limit else limit + 1
+    big = limit + 1
+    prev2 = None
+    prev = [j if j <= limit else big for j in range(m + 1)]
+    prev_min = 0
+    for i in range(1, n + 1):
+        ca = a[i - 1]
+        cur = [big] * (m + 1)
+        if i <= limit:
+            cur[0] = i
+        row_min = cur[0]
+        for j in range(max(1, i - limit), min(m, i + limit) + 1):
+            cb = b[j - 1]
+            if ca == cb:
+                d = prev[j - 1]
+            else:
+                d = min(prev[j], cur[j - 1], prev[j - 1]) + 1
+                if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb and prev2[j - 2] + 1 < d:
+                    d = prev2[j - 2] + 1
+                if d > big:
+                    d = big
+            cur[j] = d
+            if d < row_min:
+                row_min = d
+        # A swap reaches back two rows, so both must be past the limit
+        if row_min > limit and prev_min > limit:
+            return big
+        prev2, prev, prev_min = prev, cur, row_min
+    return prev[m] if prev[m] <= limit else big
+
+
+def _piece_texts(query: str, start: int, size: int, lo: int, hi: int) -> set:
+    # What a piece cut at `start` may look like in the query: the text
+    # moved by lo to hi places, and the same with its first or last letter
+    # swapped for its neighbour, for a swap across the cut
+    n = len(query)
+    texts = set()
+    for pos in range(max(0, start + lo), min(n - size, start + hi) + 1):
+        texts.add(query[pos:pos + size])
+        if pos > 0:
+            texts.add(query[pos - 1] + query[pos + 1:pos + size])
+        if pos + size < n:
+            texts.add(query[pos:pos + size - 1] + query[pos + size])
+    return texts
+
+
+class _SegmentIndex:
+    # Word ids per "length:piece:text". Words shorter than the number of
+    # pieces are kept aside by length and compared directly. Deleted words leave a
+    # None in _words until the next rebuild.
+
+    def __init__(self, words):
+        self._build(words)
+
+    def _build(self, words) -> None:
+        self._words = []
+        self._segments = {}
+        self._short = {}
+        self._dead = 0
+        for w in words:
+            self.add(w)
+
+    def add(self, word: str) -> None:
+        n = len(word)
+        if n < _PIECES:
+            self._short.setdefault(n, set()).add(word)
+            return
+        wid = len(self._words)
+        self._words.append(word)
+        segments = self._segments
+        for i, (start, length) in enumerate(_pieces(n)):
+            key = f"{n}:{i}:{word[start:start + length]}"
+            ids = segments.get(key)
+            if ids is None:
+                ids = segments[key] = array("i")
+            ids.append(wid)
+
+    def discard(self, word: str) -> None:
+        n = len(word)
+        if n < _PIECES:
+            self._short.get(n, set()).discard(word)
+            return
+        start, length = _pieces(n)[0]
+        for wid in self._segments.get(f"{n}:0:{word[:length]}", ()):
+            if self._words[wid] == word:
+                self._words[wid] = None
+                self._dead += 1
+                break
+        if self._dead > 1024 and self._dead > len(self._words) * _REBUILD_RATIO:
+            self._build([w for w in self._words if w is not None] + [w for ws in self._short.values() for w in ws])
+
+    def near(self, query: str, distance: int, checks: int = None) -> list:
+        """
+        (edit distance, word) for the words within `distance` (at most
+        MAX_TYPOS) of `query`; given `checks`, only among that many of them,
+        those sharing the most pieces with the query.
+        """
+        n = len(query)
+        out = []
+        for length in range(max(0, n - distance), min(_PIECES, n + distance + 1)):
+            for w in self._short.get(length, ()):
+                d = edit_distance(query, w, distance)
+                if d <= distance:
+                    out.append((d, w))
+        found = []
+        for length in range(max(_PIECES, n - distance), n + distance + 1):
+            # Edits turning a word of this length into the query insert
+            # `diff` letters more than they delete, so a piece moves by at
+            # least -deletions and at most +insertions places
+            diff = n - length
+            lo, hi = -((distance - diff) // 2), (distance + diff) // 2
+            for i, (start, size) in enumerate(_pieces(length)):
+                for text in _piece_texts(query, start, size, lo, hi):
+                    ids = self._segments.get(f"{length}:{i}:{text}")
+                    if ids:
+                        found.append(ids)
+        # A word is counted once for each of its pieces found in the query
+        need = _PIECES - distance
+        counts = Counter(chain.from_iterable(found))
+        likely = [(pieces, wid) for wid, pieces in counts.items() if pieces >= need]
+        if checks is not None and len(likely) > checks:
+            likely = heapq.nlargest(checks, likely)
+        words = self._words
+        for _, wid in likely:
+            w = words[wid]
+            if w is not None:
+                d = edit_distance(query, w, distance)
+                if d <= distance:
+                    out.append((d, w))
+        return out
+
+    def stats(self) -> dict:
+        return {"segments": len(self._segments), "ids": len(self._words), "deleted": self._dead}
+
+
+def _one_edit(word: str, letters) -> set:
+    # Every string one edit from `word`: a letter dropped, two neighbours
+    # swapped, a letter replaced by or inserted from `letters`
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    out = {a + b[1:] for a, b in splits if b}
+    out.update(a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1)
+    out.update(a + c + b[1:] for a, b in splits if b for c in letters)
+    out.update(a + c + b for a, b in splits for c in letters)
+    out.discard(word)
+    return out
+
+
+class WordSearch:
+    """
+    The words of a cache, sorted for paging and prefix lookups, hashed for
+    one-typo lookups and cut into the segment index for two-typo ones. All
+    three are built up front, so a search never builds anything; add and
+    discard keep them current, so edits and deletes show up in the next
+    search.
+    """
+
+    def __init__(self, words=()):
+        self.sorted = SortedWords(words)
+        self._set = set(self.sorted)
+        # Letters a typo may have replaced or dropped
+        self._letters = set("".join(self.sorted))
+        self._segments = _SegmentIndex(self.sorted)
+
+    def __len__(self) -> int:
+        return len(self.sorted)
+
+    def add(self, word: str) -> None:
+        if self.sorted.add(word):
+            self._set.add(word)
+            self._letters.update(word)
+            self._segments.add(word)
+
+    def discard(self, word: str) -> None:
+        if self.sorted.discard(word):
+            self._set.discard(word)
+            self._segments.discard(word)
+
+    def page(self, **options):
+        return self.sorted.page(**options)
+
+    def suggest(self, query: str, limit: int = SUGGESTIONS, typos: int = None) -> list:
+        """
+        Up to `limit` of {"word", "match", "distance"}: the word itself if
+        present, then words starting with it in word order. Failing those,
+        the closest words within `typos` edits (default: max_typos): one
+        edit away if there are any, looked up among the query's one-edit
+        variants, else two, found as near() does with MAX_CHECKS.
+        """
+        if not query:
+            return []
+        starting, _ = self.sorted.page(prefix=query, limit=limit)
+        if starting:
+            return [{"word": w, "match": "exact" if w == query else "prefix", "distance": 0} for w in starting]
+        typos = min(MAX_TYPOS, max_typos(query) if typos is None else typos)
+        if typos >= 1:
+            near = sorted(self._set.intersection(_one_edit(query, self._letters)))
+            if near:
+                return [{"word": w, "match": "fuzzy", "distance": 1} for w in near[:limit]]
+        if typos >= 2:
+            near = self._segments.near(query, 2, MAX_CHECKS)
+            if near:
+                return [{"word": w, "match": "fuzzy", "distance": d} for d, w in sorted(near)[:limit]]
+        return []
+
+    def stats(self) -> dict:
+        return {
+            "words": len(self.sorted),
+            "segment_index": self._segments.stats(),
+        }
@@ -0,0 +1,417 @@
+import json
+import mmap
+import os
+import threading
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no lock between processes, so run one worker
+    fcntl = None
+
+# Each record is one line: <json key>\t<json value>\n
+# A record with an empty value is a tombstone for a deleted key.
+_SEP = b"\t"
+_NL = b"\n"
+
+# Compact once dead records outnumber live ones (and there are enough to matter)
+COMPACT_MIN_DEAD = 1000
+COMPACT_RATIO = 1.0
+
+# Encodes keys exactly as json.dumps(key, ensure_ascii=False) does, without
+# building a new encoder on every lookup
+_KEY_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+# Slots in a new index; it doubles whenever it gets two-thirds full
+INDEX_MIN_CAPACITY = 1024
+
+
+class _Index:
+    """
+    Open-addressing hash table from encoded key to the offset of its record,
+    held in two flat arrays (16 bytes a slot) instead of a dict of tuples.
+    Keys themselves are not stored: a candidate slot is confirmed by
+    comparing against the key at the start of the record, via `matches`.
+    """
+
+    def __init__(self, matches, capacity: int = INDEX_MIN_CAPACITY):
+        self._matches = matches
+        self.count = 0
+        self._alloc(capacity)
+
+    def _alloc(self, capacity: int) -> None:
+        self._mask = capacity - 1
+        self._hashes = array("q", bytes(8 * capacity))
+        # record offset + 1; 0 is an empty slot, -1 a deleted one
+        self._locs = array("q", bytes(8 * capacity))
+        self._used = 0
+
+    def _probe(self, raw: bytes, h: int):
+        # (slot holding raw, True), or (slot to insert it at, False)
+        hashes, locs, mask = self._hashes, self._locs, self._mask
+        i = h & mask
+        free = None
+        while True:
+            loc = locs[i]
+            if loc == 0:
+                return (i if free is None else free), False
+            if loc < 0:
+                if free is None:
+                    free = i
+            elif hashes[i] == h and self._matches(loc - 1, raw):
+                return i, True
+            i = (i + 1) & mask
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, raw: bytes):
+        i, found = self._probe(raw, hash(raw))
+        return self._locs[i] - 1 if found else None
+
+    def set(self, raw: bytes, offset: int) -> bool:
+        """Point `raw` at the record at `offset`; True if it replaced one."""
+        h = hash(raw)
+        i, found = self._probe(raw, h)
+        if not found:
+            if self._locs[i] == 0:
+                self._used += 1
+            self.count += 1
+        self._hashes[i] = h
+        self._locs[i] = offset + 1
+        if self._used * 3 >= len(self._locs) * 2:
+            self._resize()
+        return found
+
+    def remove(self, raw: bytes) -> bool:
+        i, found = self._probe(raw, hash(raw))
+        if found:
+            self._locs[i] = -1
+            self.count -= 1
+        return found
+
+    def _resize(self) -> None:
+        hashes, locs = self._hashes, self._locs
+        capacity = len(locs)
+        while self.count * 2 >= capacity:
+            capacity *= 2
+        self._alloc(capacity)
+        mask = self._mask
+        for h, loc in zip(hashes, locs):
+            if loc > 0:
+                i = h & mask
+                while self._locs[i]:
+                    i = (i + 1) & mask
+                self._hashes[i] = h
+                self._locs[i] = loc
+                self._used += 1
+
+    def offsets(self) -> list:
+        return [loc - 1 for loc in self._locs if loc > 0]
+
+
+class WordStore:
+    """
+    Append-only log of cached word entries with an in-memory offset index.
+
+    Writes append a single line to the log, so adding a word costs O(1) I/O
+    regardless of how many words are cached. The log is memory-mapped and
+    the index holds only a hash and an offset per key (see _Index); keys and
+    values are read back from the mapping on demand, so their bytes live in
+    the page cache, shared by every worker process on the host. The log is
+    rewritten (compacted) once overwritten and deleted records pile up.
+
+    Every process sharing the log takes an exclusive lock on <log>.lock
+    to append or compact, and catches up with the log's tail under it
+    first, so a compaction never drops another worker's appends.
+    """
+
+    def __init__(self, path: Path, legacy_path: Path = None, legacy_transform=None):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+        self._index = _Index(self._key_matches)
+        self._file = None
+        self._mm = None
+        self._dead = 0
+        self._size = 0
+        self._inode = None
+        self._pending = set()  # keys picked up while catching up before an append
+        self._reloaded = False  # another process compacted the log under us
+        self.generation = 0
+
+        if not self.path.exists():
+            with self._exclusive():
+                # Unless another process imported it while this one waited
+                if not self.path.exists():
+                    self._import_legacy(legacy_path, legacy_transform)
+        self._load()
+
+    @contextmanager
+    def _exclusive(self):
+        # Held by one process at a time while it appends or compacts
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, "ab") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    # ---- loading ----
+
+    def _import_legacy(self, legacy_path: Path, transform=None) -> None:
+        # One-time migration from the old whole-file total_word.json, each
+        # value passed through `transform` if given
+        data = {}
+        if legacy_path is not None and Path(legacy_path).exists():
+            try:
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+        items = data.items()
+        if transform is not None:
+            items = ((key, transform(value)) for key, value in items if isinstance(value, dict))
+        self._write_snapshot(items)
+
+    def _write_snapshot(self, items) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            for key, value in items:
+                f.write(_encode(key, value))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        self._index = _Index(self._key_matches)
+        self._dead = 0
+        self._size = 0
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+        # Kept open so the mapping always follows the log we indexed, even
+        # after another process compacts it into a new file
+        self._file = open(self.path, "rb")
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._scan(collect=False)
+
+    def _mapped(self, end: int):
+        # The mapping, grown to cover at least `end` bytes if the log has
+        if self._mm is None or len(self._mm) < end:
+            size = os.fstat(self._file.fileno()).st_size
+            if size:
+                if self._mm is not None:
+                    self._mm.close()
+                self._mm = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def _key_matches(self, offset: int, raw: bytes) -> bool:
+        end = offset + len(raw)
+        mm = self._mapped(end + 1)
+        return mm[offset:end] == raw and mm[end] == _SEP[0]
+
+    def _record(self, offset: int):
+        # (key bytes, value bytes) of the record at `offset`
+        mm = self._mapped(self._size)
+        tab = mm.find(_SEP, offset)
+        return mm[offset:tab], mm[tab + 1:mm.find(_NL, tab)]
+
+    def _scan(self, collect: bool = True) -> set:
+        # Index records from self._size onwards; returns the keys touched
+        touched = set()
+        f = self._file
+        f.seek(self._size)
+        offset = self._size
+        for line in f:
+            if not line.endswith(_NL):
+                break  # partial write still in progress
+            key_raw, _, value_raw = line.partition(_SEP)
+            self._index_record(key_raw, offset, len(value_raw) > 1)
+            if collect:
+                touched.add(json.loads(key_raw))
+            offset += len(line)
+        self._size = offset
+        return touched
+
+    def _index_record(self, key_raw: bytes, offset: int, live: bool) -> None:
+        if live:
+            if self._index.set(key_raw, offset):
+                self._dead += 1
+        else:
+            self._index.remove(key_raw)
+            self._dead += 1
+
+    def refresh(self):
+        """
+        Pick up records appended (or a compaction done) by another process.
+        Returns the set of changed keys, or None if everything must be reloaded.
+        """
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return set()
+            if st.st_ino != self._inode or self._reloaded:
+                if st.st_ino != self._inode:
+                    self._load()
+                elif st.st_size > self._size:
+                    self._scan(collect=False)
+                self._pending = set()
+                self._reloaded = False
+                self.generation += 1
+                return None
+            touched, self._pending = self._pending, set()
+            if st.st_size > self._size:
+                touched |= self._scan()
+                self.generation += 1
+            return touched
+
+    # ---- reads ----
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return self._index.get(_key_bytes(key)) is not None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def keys(self) -> list:
+        with self._lock:
+            mm = self._mapped(self._size)
+            raws = [mm[offset:mm.find(_SEP, offset)] for offset in self._index.offsets()]
+        # Keys are JSON texts; decoding them as one array is much faster than one by one
+        return json.loads(b"[" + b",".join(raws) + b"]")
+
+    def get(self, key, default=None):
+        with self._lock:
+            offset = self._index.get(_key_bytes(key))
+            if offset is None:
+                return default
+            raw = self._record(offset)[1]
+        return json.loads(raw)
+
+    def items(self):
+        for key in self.keys():
+            value = self.get(key)
+            if value is not None:
+                yield key, value
+
+    # ---- writes ----
+
+    def put(self, key, value) -> None:
+        self._append(key, _encode(key, value))
+
+    def put_many(self, items) -> None:
+        with self._lock:
+            self._append_locked([(key, _encode(key, value)) for key, value in items])
+            self._maybe_compact()
+
+    def update_many(self, keys, transform) -> int:
+        """
+        Replace the value of each of `keys` with transform(value), skipping
+        keys it returns None for; how many were replaced. Values are read
+        and rewritten under the file lock, so a write another process made
+        in between is transformed rather than overwritten.
+        """
+        with self._lock:
+            with self._exclusive(), open(self.path, "ab") as f:
+                self._catch_up()
+                records = []
+                for key in keys:
+                    offset = self._index.get(_key_bytes(key))
+                    if offset is None:
+                        continue
+                    value = transform(json.loads(self._record(offset)[1]))
+                    if value is not None:
+                        records.append((key, _encode(key, value)))
+                self._write(f, records)
+            self._maybe_compact()
+        return len(records)
+
+    def delete(self, key) -> bool:
+        if key not in self:
+            return False
+        self._append(key, _key_bytes(key) + _SEP + _NL)
+        return True
+
+    def _append(self, key, record: bytes) -> None:
+        with self._lock:
+            self._append_locked([(key, record)])
+            self._maybe_compact()
+
+    def _catch_up(self) -> None:
+        # Index anything another process appended (or compacted) since we
+        # last looked; called with the file lock held, so nothing moves
+        st = os.stat(self.path)
+        if st.st_ino != self._inode:
+            self._load()
+            self._reloaded = True
+        elif st.st_size != self._size:
+            self._pending |= self._scan()
+
+    def _append_locked(self, records) -> None:
+        if not records:
+            return
+        with self._exclusive(), open(self.path, "ab") as f:
+            self._catch_up()
+            self._write(f, records)
+
+    def _write(self, f, records) -> None:
+        # Append (key, record) pairs at the end of the log we have indexed
+        if not records:
+            return
+        offset = self._size
+        f.write(b"".join(record for _, record in records))
+        f.flush()
+        for key, record in records:
+            key_len = record.index(_SEP)
+            self._index_record(record[:key_len], offset, len(record) - key_len > 2)
+            offset += len(record)
+        self._size = offset
+        self.generation += 1
+
+    # ---- compaction ----
+
+    def _maybe_compact(self) -> None:
+        if self._dead >= COMPACT_MIN_DEAD and self._dead > len(self._index) * COMPACT_RATIO:
+            self._compact_locked()
+
+    def compact(self) -> None:
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        with self._exclusive():
+            # The snapshot must hold what other processes appended too
+            self._catch_up()
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "wb") as dst:
+                for offset in self._index.offsets():
+                    key_raw, value_raw = self._record(offset)
+                    dst.write(key_raw + _SEP + value_raw + _NL)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp_path, self.path)
+            self._load()
+        self.generation += 1
+
+
+def _key_bytes(key) -> bytes:
+    return _KEY_ENCODER.encode(key).encode("utf-8")
+
+
+def _encode(key, value) -> bytes:
+    return (
+        _key_bytes(key)
+        + _SEP
+        + json.dumps(value, ensure_ascii=False).encode("utf-8")
+        + _NL
+    )
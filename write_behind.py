@@ -0,0 +1,189 @@
+import atexit
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+# Minimum gap between two writes of the same file, in milliseconds
+FLUSH_INTERVAL_MS = 500
+# The flusher thread exits after this many idle seconds and is restarted
+# by the next change
+IDLE_EXIT = 30.0
+# Seconds before a failed write (full disk, missing directory) is tried again
+RETRY_DELAY = 5.0
+
+log = logging.getLogger(__name__)
+
+_writers = set()
+_writers_lock = threading.Lock()
+
+# One thread writes every dirty file when its turn comes, however many
+# learners have files: a heap of (due time, tiebreak, writer)
+_due = []
+_due_cond = threading.Condition()
+_seq = itertools.count()
+_flusher = None
+
+
+def _schedule(writer, when: float) -> None:
+    global _flusher
+    with _due_cond:
+        if writer._scheduled:
+            return
+        writer._scheduled = True
+        heapq.heappush(_due, (when, next(_seq), writer))
+        if _flusher is None:
+            _flusher = threading.Thread(target=_run, name="write-behind", daemon=True)
+            _flusher.start()
+        _due_cond.notify()
+    with _writers_lock:
+        _writers.add(writer)
+
+
+def _next_due():
+    # The next writer whose turn has come; None once idle for IDLE_EXIT
+    global _flusher
+    with _due_cond:
+        while True:
+            if not _due:
+                _due_cond.wait(IDLE_EXIT)
+                if not _due:
+                    _flusher = None
+                    return None
+                continue
+            when, seq, writer = _due[0]
+            # No sooner than `interval` after the file's last write, nor
+            # before a failed one is due to be retried
+            ready = max(writer._last_flush + writer.interval, writer._retry_at)
+            if when < ready:
+                heapq.heapreplace(_due, (ready, seq, writer))
+                continue
+            delay = when - time.monotonic()
+            if delay <= 0:
+                heapq.heappop(_due)
+                writer._scheduled = False
+                return writer
+            _due_cond.wait(delay)
+
+
+def _run() -> None:
+    while True:
+        writer = _next_due()
+        if writer is None:
+            return
+        try:
+            writer.flush()
+        except Exception as e:
+            log.error("write-behind: writing %s failed (%s); retrying in %g s", writer.path, e, RETRY_DELAY)
+            writer._retry_at = time.monotonic() + RETRY_DELAY
+            _schedule(writer, writer._retry_at)
+
+
+class WriteBehind:
+    """
+    Debounced, coalescing background writer for one JSON file.
+
+    Callers mutate their in-memory state and call mark_dirty(); the shared
+    flusher thread writes `snapshot()` at most once per FLUSH_INTERVAL_MS,
+    however many changes came in meanwhile. Writes go to a temp file that is renamed
+    over the target, so readers never see a half-written file. Anything
+    still pending is flushed at interpreter exit, or by close(). A failed
+    write is logged and the changes stay pending, retried RETRY_DELAY later.
+    """
+
+    def __init__(self, path: Path, snapshot, interval_ms: int = FLUSH_INTERVAL_MS):
+        self.path = Path(path)
+        self.snapshot = snapshot
+        self.interval = interval_ms / 1000
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = 0
+        self._last_flush = 0.0
+        self._retry_at = 0.0
+        self.flushes = 0
+        self.coalesced = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.errors = 0
+        self.last_error = None
+        self._scheduled = False  # queued for the flusher; guarded by _due_cond
+
+    def mark_dirty(self) -> None:
+        with self._pending_lock:
+            self._pending += 1
+        _schedule(self, time.monotonic())
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, 0
+            if not pending:
+                return
+            start = time.perf_counter()
+            try:
+                data = self._take_snapshot()
+                tmp_path = self.path.with_name(self.path.name + ".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                # Still dirty: the next flush writes these changes too
+                with self._pending_lock:
+                    self._pending += pending
+                self.errors += 1
+                self.last_error = str(e)
+                raise
+            elapsed = (time.perf_counter() - start) * 1000
+            self._last_flush = time.monotonic()
+            self.flushes += 1
+            self.coalesced += pending - 1
+            self.last_flush_ms = elapsed
+            self.max_flush_ms = max(self.max_flush_ms, elapsed)
+
+    def close(self) -> None:
+        """Write anything pending and forget this writer until it is dirtied again."""
+        try:
+            self.flush()
+        except Exception as e:
+            # Left registered, so the exit flush tries once more
+            log.error("write-behind: writing %s on close failed (%s)", self.path, e)
+            return
+        with _writers_lock:
+            _writers.discard(self)
+
+    def _take_snapshot(self):
+        # The snapshot copies live sets/dicts that request threads may be
+        # mutating; a copy that races with a resize is simply retried.
+        for _ in range(10):
+            try:
+                return self.snapshot()
+            except RuntimeError:
+                continue
+        return self.snapshot()
+
+    def stats(self) -> dict:
+        return {
+            "file": self.path.name,
+            "queue_depth": self._pending,
+            "flushes": self.flushes,
+            "coalesced": self.coalesced,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+@atexit.register
+def flush_all() -> None:
+    with _writers_lock:
+        writers = list(_writers)
+    for writer in writers:
+        try:
+            writer.flush()
+        except Exception as e:
+            log.error("write-behind: writing %s at exit failed (%s)", writer.path, e)